@@ -0,0 +1,140 @@
+"""
+HTTP连接池基准测试
+
+对比两种请求方式在本地模拟HTTPS服务上的 p50/p99 延迟：
+1. before: 每次请求新建 httpx.AsyncClient（旧实现）
+2. after:  复用共享连接池（keep-alive）
+
+运行方式（在项目根目录）：
+    python benchmarks/bench_http_pool.py --requests 200 --concurrency 4
+
+依赖 openssl 命令行生成临时自签名证书。
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import ssl
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Awaitable, Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import httpx
+from search.proxy.common import create_http_client
+
+class MockHandler(BaseHTTPRequestHandler):
+    """模拟搜索API，返回固定的JSON响应"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    body = json.dumps({"web": {"results": [{"title": "t", "url": "https://example.com"}]}}).encode()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, format, *args):
+        pass
+
+def generate_cert(directory: str) -> tuple[str, str]:
+    """生成本地自签名证书"""
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "1",
+            "-subj", "/CN=localhost",
+            "-addext", "subjectAltName=DNS:localhost,IP:127.0.0.1"
+        ],
+        check=True,
+        capture_output=True
+    )
+    return cert, key
+
+def start_server(cert: str, key: str) -> ThreadingHTTPServer:
+    """在后台线程启动HTTPS服务"""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    httpd.socket = context.wrap_socket(httpd.socket, server_side=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+async def measure(
+    request: Callable[[], Awaitable[None]],
+    total: int,
+    concurrency: int
+) -> List[float]:
+    """并发执行请求并记录每次请求的耗时(毫秒)"""
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await request()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(one() for _ in range(total)))
+    return latencies
+
+def percentile(values: List[float], pct: float) -> float:
+    """计算百分位数"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def report(name: str, latencies: List[float]) -> None:
+    print(
+        f"{name:<8} p50={percentile(latencies, 50):7.2f}ms  "
+        f"p99={percentile(latencies, 99):7.2f}ms  "
+        f"mean={statistics.mean(latencies):7.2f}ms"
+    )
+
+async def run(total: int, concurrency: int, url: str, verify: ssl.SSLContext) -> None:
+    async def before():
+        async with httpx.AsyncClient(verify=verify) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+
+    pooled = create_http_client(verify=verify)
+
+    async def after():
+        response = await pooled.get(url)
+        response.raise_for_status()
+
+    try:
+        report("before", await measure(before, total, concurrency))
+        report("after", await measure(after, total, concurrency))
+    finally:
+        await pooled.aclose()
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP连接池延迟基准测试")
+    parser.add_argument("--requests", type=int, default=200, help="每种方式的请求次数")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = generate_cert(directory)
+        httpd = start_server(cert, key)
+        verify = ssl.create_default_context(cafile=cert)
+        url = f"https://127.0.0.1:{httpd.server_address[1]}/res/v1/web/search"
+        try:
+            asyncio.run(run(args.requests, args.concurrency, url, verify))
+        finally:
+            httpd.shutdown()
+
+if __name__ == "__main__":
+    main()
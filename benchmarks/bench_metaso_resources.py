@@ -0,0 +1,175 @@
+"""
+秘塔浏览器资源拦截基准测试
+
+在本地模拟的秘塔站点上对比启用/不启用ResourcePolicy时，
+打开 /search/{id} 页面并收完searchV2流的耗时和传输字节数。
+
+模拟站点包含：带meta-token的HTML、页面脚本、样式表、字体、图片、
+统计脚本，以及由页面脚本请求的searchV2事件流。所有响应都带
+Cache-Control: no-store，每次导航都会重新下载。
+
+运行方式（在项目根目录，需已执行 playwright install chromium）：
+    python benchmarks/bench_metaso_resources.py --runs 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from playwright.async_api import async_playwright, Browser
+from search.proxy.metaso.browser import BROWSER_ARGS
+from search.proxy.metaso.resource_policy import ResourcePolicy, DEFAULT_BLOCKED_TYPES
+
+IMAGE_COUNT = 12
+ASSET_DELAY = 0.02  # 模拟静态资源的网络延迟(秒)
+
+def _search_stream(chunks: int) -> bytes:
+    """生成searchV2事件流"""
+    events = [{"type": "append-text", "text": f"第{i}段回答内容。"} for i in range(chunks)]
+    lines = [f"data:{json.dumps(event, ensure_ascii=False)}\n\n" for event in events]
+    lines.append("data:[DONE]\n\n")
+    return "".join(lines).encode()
+
+def _page_html(body_script: str) -> bytes:
+    """生成引用各类静态资源的页面"""
+    images = "".join(f'<img src="/static/img/{i}.png">' for i in range(IMAGE_COUNT))
+    return f"""<!doctype html>
+<html><head>
+<meta id="meta-token" content="bench-token">
+<link rel="stylesheet" href="/static/main.css">
+<script src="/analytics/hm.js"></script>
+</head><body>{images}
+<script src="/static/app.js"></script>
+<script>{body_script}</script>
+</body></html>""".encode()
+
+SEARCH_SCRIPT = """
+(async () => {
+    const id = location.pathname.split('/').pop();
+    const response = await fetch('/api/searchV2?sessionId=' + id);
+    await response.text();
+    window.__done = true;
+})();
+"""
+
+ASSETS: Dict[str, Tuple[str, bytes]] = {
+    "/static/main.css": (
+        "text/css",
+        b"@font-face{font-family:f;src:url(/static/font.woff2)}body{font-family:f}"
+        + b".x{color:red}" * 4000
+    ),
+    "/static/font.woff2": ("font/woff2", os.urandom(120 * 1024)),
+    "/static/app.js": ("application/javascript", b"window.__app=1;" + b"//" + b"x" * 80 * 1024),
+    "/analytics/hm.js": ("application/javascript", b"//" + b"a" * 40 * 1024),
+}
+IMAGE = ("image/png", os.urandom(60 * 1024))
+
+class MockMetasoHandler(BaseHTTPRequestHandler):
+    """模拟秘塔站点，记录发送的字节数"""
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    stream = _search_stream(500)
+    bytes_sent = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self._send("text/html", _page_html(""))
+        elif path.startswith("/search/"):
+            self._send("text/html", _page_html(SEARCH_SCRIPT))
+        elif path == "/api/searchV2":
+            self._send("text/event-stream", self.stream)
+        elif path.startswith("/static/img/"):
+            time.sleep(ASSET_DELAY)
+            self._send(*IMAGE)
+        elif path in ASSETS:
+            time.sleep(ASSET_DELAY)
+            self._send(*ASSETS[path])
+        else:
+            self.send_error(404)
+
+    def _send(self, content_type: str, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+        with self.lock:
+            MockMetasoHandler.bytes_sent += len(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server() -> ThreadingHTTPServer:
+    """在后台线程启动模拟站点"""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), MockMetasoHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+async def run(
+    browser: Browser,
+    base_url: str,
+    policy: Optional[ResourcePolicy],
+    runs: int
+) -> Tuple[List[float], List[int]]:
+    """多次打开搜索页面，返回每次的耗时(毫秒)和传输字节数"""
+    context = await browser.new_context()
+    if policy:
+        await policy.install(context)
+    page = await context.new_page()
+    timings: List[float] = []
+    transferred: List[int] = []
+    try:
+        for i in range(runs):
+            before = MockMetasoHandler.bytes_sent
+            start = time.perf_counter()
+            await page.goto(f"{base_url}/search/conv{i}")
+            await page.wait_for_function("window.__done === true")
+            timings.append((time.perf_counter() - start) * 1000)
+            transferred.append(MockMetasoHandler.bytes_sent - before)
+    finally:
+        await context.close()
+    return timings, transferred
+
+def report(name: str, timings: List[float], transferred: List[int]):
+    print(
+        f"{name:<10} p50={statistics.median(timings):8.1f}ms  "
+        f"max={max(timings):8.1f}ms  "
+        f"bytes/nav={statistics.median(transferred) / 1024:8.1f}KiB"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description="秘塔浏览器资源拦截基准测试")
+    parser.add_argument("--runs", type=int, default=10, help="每种模式的导航次数")
+    args = parser.parse_args()
+
+    httpd = start_server()
+    base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    policy = ResourcePolicy(DEFAULT_BLOCKED_TYPES, ["*/analytics/*"])
+    try:
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch(headless=True, args=BROWSER_ARGS)
+            try:
+                # 先预热一次，排除浏览器冷启动的影响
+                await run(browser, base_url, None, 1)
+                report("no-policy", *await run(browser, base_url, None, args.runs))
+                report("policy", *await run(browser, base_url, policy, args.runs))
+                print(f"policy stats: {policy.stats()}")
+            finally:
+                await browser.close()
+    finally:
+        httpd.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(main())
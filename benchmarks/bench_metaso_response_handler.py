@@ -0,0 +1,127 @@
+"""
+秘塔响应处理器基准测试
+
+在大量参考文献的合成长回答上对比：
+1. legacy: 旧实现，update-reference 逐条遍历全部参考文献，format_markdown 每个参考文献执行一次 re.sub，
+   额外图片通过列表成员判断（逐个比较字典）过滤
+2. handler: 当前 MetasoResponseHandler，按id索引参考文献，一次扫描替换引用标记
+
+输出两者的耗时，并校验两者生成的markdown一致。
+
+运行方式（在项目根目录）：
+    python benchmarks/bench_metaso_response_handler.py
+    python benchmarks/bench_metaso_response_handler.py --references 2000 --updates 20
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from search.proxy.metaso.response_handler import MetasoResponseHandler
+
+class LegacyHandler(MetasoResponseHandler):
+    """旧实现：只替换 update-reference 和 format_markdown 的处理方式"""
+
+    def clean_response(self, text: str) -> str:
+        body = text[5:] if text.startswith("data:") else text
+        if '"update-reference"' in body:
+            data = json.loads(body)
+            if data.get("type") == "update-reference":
+                for update in data.get("list", []):
+                    ref_id = update.get("id")
+                    for ref in self._references:
+                        if ref["id"] == ref_id:
+                            ref["matched_snippet"] = update.get("matched_snippet")
+                return ""
+        return super().clean_response(text)
+
+    def format_markdown(self, data=None) -> str:
+        content = "".join(self._content_parts)
+        for ref in self._references:
+            ref_id = ref.get("display_id")
+            if ref_id:
+                pattern = r'\[\[' + re.escape(str(ref_id)) + r'\]\]'
+                content = re.sub(pattern, f"[{ref_id}]", content)
+        if self._images:
+            extra_images = [img for img in self._images
+                           if img not in self._markdown_images]
+            if extra_images:
+                content += "\n\n**相关图片:**\n"
+                for img in extra_images:
+                    if img.get("name") and img.get("thumbnail_url"):
+                        caption = img.get("caption", img["name"])
+                        content += f"![{caption}]({img['thumbnail_url']})\n"
+        return content.strip()
+
+def synthesize_events(chunks: int, references: int, updates: int, images: int) -> List[str]:
+    """生成类似长篇学术回答的SSE事件"""
+    events = [{"type": "query", "id": "q1", "realQuestion": "示例问题", "data": []}]
+    events.append({
+        "type": "set-reference",
+        "list": [
+            {"id": f"ref{i}", "title": f"参考资料{i}", "link": f"https://example.com/{i}",
+             "abstract": "摘要内容" * 20, "display": {"refer_id": i + 1}}
+            for i in range(references)
+        ]
+    })
+    for i in range(chunks):
+        text = f"第{i}段回答内容，引用[[{i % references + 1}]]"
+        if i % 7 == 0:
+            # 未知编号的引用标记保持原样
+            text += f"和[[{references + i}]]"
+        if i % 200 == 0:
+            text += f"。![图{i}](https://example.com/md/{i}.png)"
+        events.append({"type": "append-text", "text": text + "。"})
+        if chunks >= updates and i % (chunks // updates) == 0:
+            events.append({
+                "type": "update-reference",
+                "list": [{"id": f"ref{j}", "matched_snippet": f"片段{i}"} for j in range(references)]
+            })
+    events.append({
+        "type": "img-meta",
+        "list": [
+            {"name": f"图片{i}", "url": f"https://example.com/img/{i}.png",
+             "thumbnail_url": f"https://example.com/thumb/{i}.png"}
+            for i in range(images)
+        ]
+    })
+    return [f"data:{json.dumps(event, ensure_ascii=False)}" for event in events]
+
+def run(handler_class: Callable[[], MetasoResponseHandler], events: List[str]) -> str:
+    handler = handler_class()
+    for event in events:
+        handler.clean_response(event)
+    return handler.format_markdown({})
+
+def bench(name: str, handler_class, events: List[str], repeat: int) -> str:
+    timings: List[float] = []
+    output = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = run(handler_class, events)
+        timings.append(time.perf_counter() - start)
+    print(f"{name:<10} best={min(timings) * 1000:9.2f}ms  output={len(output)} chars")
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description="秘塔响应处理器基准测试")
+    parser.add_argument("--chunks", type=int, default=5000, help="append-text事件数")
+    parser.add_argument("--references", type=int, default=500, help="参考文献数")
+    parser.add_argument("--updates", type=int, default=10, help="update-reference事件数（每个事件更新全部参考文献）")
+    parser.add_argument("--images", type=int, default=300, help="img-meta中的图片数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    events = synthesize_events(args.chunks, args.references, args.updates, args.images)
+    legacy = bench("legacy", LegacyHandler, events, args.repeat)
+    current = bench("handler", MetasoResponseHandler, events, args.repeat)
+    print("outputs identical:", legacy == current)
+
+if __name__ == "__main__":
+    main()
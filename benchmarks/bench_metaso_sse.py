@@ -0,0 +1,109 @@
+"""
+秘塔SSE流解析基准测试
+
+在录制（或合成）的searchV2响应流上对比：
+1. legacy: 旧实现，每256字节 buffer += data 后 split("data:")
+2. decoder: 增量式SSEDecoder，分别使用256字节和可配置的大块读取
+
+输出吞吐量、模拟的IO.read往返次数以及解析出的事件数。
+
+运行方式（在项目根目录）：
+    python benchmarks/bench_metaso_sse.py
+    python benchmarks/bench_metaso_sse.py --stream recorded_stream.txt --read-size 65536
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from search.proxy.metaso.sse import SSEDecoder
+
+def synthesize_stream(chunks: int, references: int) -> str:
+    """生成类似searchV2的SSE响应流"""
+    events = [{"type": "query", "id": "q1", "realQuestion": "示例问题", "data": []}]
+    events.append({
+        "type": "set-reference",
+        "list": [
+            {"id": f"ref{i}", "title": f"参考资料{i}", "link": f"https://example.com/{i}",
+             "abstract": "摘要内容" * 100, "display": {"refer_id": i + 1}}
+            for i in range(references)
+        ]
+    })
+    for i in range(chunks):
+        # 正文中偶尔出现"data:"，旧实现会在此处错误切分
+        text = f"第{i}段回答内容，引用[[{i % references + 1}]]。" + (" data: 示例" if i % 50 == 0 else "")
+        events.append({"type": "append-text", "text": text})
+        if i % 100 == 0:
+            events.append({"type": "heartbeat"})
+    events.append({
+        "type": "update-reference",
+        "list": [{"id": f"ref{i}", "matched_snippet": "片段"} for i in range(references)]
+    })
+    lines = [f"data:{json.dumps(event, ensure_ascii=False)}\n\n" for event in events]
+    lines.append("data:[DONE]\n\n")
+    return "".join(lines)
+
+def legacy_parse(stream: str, read_size: int) -> int:
+    """旧实现的解析方式，返回解析出的片段数"""
+    count = 0
+    buffer = ""
+    for i in range(0, len(stream), read_size):
+        buffer += stream[i:i + read_size]
+        parts = buffer.split("data:")
+        for part in parts[:-1]:
+            if part.strip():
+                count += 1
+        buffer = "data:" + parts[-1] if parts else ""
+    if buffer.strip():
+        count += 1
+    return count
+
+def decoder_parse(stream: str, read_size: int) -> int:
+    """SSEDecoder解析，返回解析出的事件数"""
+    decoder = SSEDecoder()
+    count = 0
+    for i in range(0, len(stream), read_size):
+        count += len(decoder.feed(stream[i:i + read_size]))
+    count += len(decoder.flush())
+    return count
+
+def bench(name: str, parse: Callable[[str, int], int], stream: str, read_size: int, repeat: int):
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        events = parse(stream, read_size)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    size_mb = len(stream.encode("utf-8")) / 1024 / 1024
+    round_trips = (len(stream) + read_size - 1) // read_size
+    print(
+        f"{name:<18} read_size={read_size:<6} round_trips={round_trips:<7} "
+        f"events={events:<6} best={best * 1000:8.2f}ms  {size_mb / best:8.1f} MB/s"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="秘塔SSE流解析基准测试")
+    parser.add_argument("--stream", help="录制的searchV2响应流文件，不指定则使用合成数据")
+    parser.add_argument("--chunks", type=int, default=5000, help="合成数据的append-text事件数")
+    parser.add_argument("--references", type=int, default=200, help="合成数据的参考文献数")
+    parser.add_argument("--read-size", type=int, default=64 * 1024, help="大块读取的字节数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次")
+    args = parser.parse_args()
+
+    if args.stream:
+        with open(args.stream, encoding="utf-8") as f:
+            stream = f.read()
+    else:
+        stream = synthesize_stream(args.chunks, args.references)
+
+    bench("legacy", legacy_parse, stream, 256, args.repeat)
+    bench("decoder", decoder_parse, stream, 256, args.repeat)
+    bench("decoder", decoder_parse, stream, args.read_size, args.repeat)
+
+if __name__ == "__main__":
+    main()
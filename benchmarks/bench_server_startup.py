@@ -0,0 +1,99 @@
+"""
+搜索服务启动时间基准测试
+
+以子进程方式冷启动MCP服务（stdio），测量：
+1. initialize: 从启动进程到收到initialize响应的时间
+2. tools/list: 从启动进程到收到tools/list响应的时间（包含按需加载搜索引擎模块）
+
+每个引擎分别测量，取多次启动中最快的一次，可在各版本之间对比。
+
+运行方式（在项目根目录）：
+    python benchmarks/bench_server_startup.py
+    python benchmarks/bench_server_startup.py --engines bocha metaso --repeat 10
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+PROTOCOL_VERSION = "2024-11-05"
+
+def send(process: subprocess.Popen, message: Dict):
+    process.stdin.write(json.dumps(message) + "\n")
+    process.stdin.flush()
+
+def wait_response(process: subprocess.Popen, request_id: int) -> Dict:
+    """读取stdout直到收到指定id的响应"""
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"服务进程已退出: {process.stderr.read()}")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+def measure(engine: str) -> Dict[str, float]:
+    """冷启动一次服务，返回各阶段耗时(秒)"""
+    env = dict(os.environ, SEARCH_ENGINE=engine, SEARCH_PREWARM="false", PYTHONPATH=SRC_DIR)
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-c", "import search; search.main()"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env=env,
+        text=True,
+        encoding="utf-8"
+    )
+    try:
+        send(process, {
+            "jsonrpc": "2.0", "id": 1, "method": "initialize",
+            "params": {
+                "protocolVersion": PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "bench", "version": "0"}
+            }
+        })
+        wait_response(process, 1)
+        initialized = time.perf_counter() - start
+        send(process, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send(process, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        response = wait_response(process, 2)
+        if "error" in response:
+            raise RuntimeError(f"tools/list失败: {response['error']}")
+        listed = time.perf_counter() - start
+    finally:
+        process.stdin.close()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    return {"initialize": initialized, "tools/list": listed}
+
+def main():
+    parser = argparse.ArgumentParser(description="搜索服务启动时间基准测试")
+    parser.add_argument("--engines", nargs="+", default=["bocha", "brave", "metaso"], help="要测量的搜索引擎")
+    parser.add_argument("--repeat", type=int, default=5, help="每个引擎的启动次数，取最快一次")
+    args = parser.parse_args()
+
+    for engine in args.engines:
+        timings: List[Dict[str, float]] = []
+        try:
+            for _ in range(args.repeat):
+                timings.append(measure(engine))
+        except Exception as e:
+            print(f"{engine:<8} 失败: {e}")
+            continue
+        best_init = min(t["initialize"] for t in timings)
+        best_list = min(t["tools/list"] for t in timings)
+        print(f"{engine:<8} initialize={best_init * 1000:8.1f}ms  tools/list={best_list * 1000:8.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""In-memory result cache for tool calls
+
+Results are keyed on engine, tool name and normalized arguments, expire after
+a per-engine TTL and are evicted in LRU order once the entry-count or
+byte-size limit is reached.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# 参与缓存键计算的参数
+CACHE_KEY_ARGUMENTS = ("query", "count", "offset", "page", "freshness", "summary", "mode", "conversation_id")
+
+def _normalize_value(value: Any) -> Any:
+    """规范化单个参数值，使等价的写法得到相同的键"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+def make_cache_key(
+    engine: str,
+    tool: str,
+    arguments: Dict[str, Any],
+    defaults: Optional[Dict[str, Any]] = None
+) -> Tuple[Hashable, ...]:
+    """生成缓存键
+
+    Args:
+        engine: 搜索引擎名称
+        tool: 工具名称
+        arguments: 工具调用参数
+        defaults: 工具参数的默认值，未传入的参数按默认值参与计算
+
+    Returns:
+        Tuple: 可哈希的缓存键
+    """
+    merged = {**(defaults or {}), **arguments}
+    normalized = tuple(
+        (name, _normalize_value(merged[name]))
+        for name in CACHE_KEY_ARGUMENTS if name in merged
+    )
+    return (engine, tool, normalized)
+
+class ResultCache:
+    """带TTL的LRU结果缓存"""
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 0
+    ):
+        """初始化缓存
+
+        Args:
+            max_entries: 最大条目数
+            max_bytes: 所有条目的最大总字节数
+            ttls: 各搜索引擎的有效期(秒)，键为缓存键中的引擎名
+            default_ttl: 未配置引擎的有效期(秒)，0表示不缓存
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._ttls = ttls or {}
+        self._default_ttl = default_ttl
+        # key -> (过期时间, 字节数, 值)
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _ttl_for(self, key: Hashable) -> float:
+        """获取缓存键对应引擎的有效期"""
+        engine = key[0] if isinstance(key, tuple) and key else None
+        return self._ttls.get(engine, self._default_ttl)
+
+    def _remove(self, key: Hashable) -> None:
+        """删除条目并更新字节计数"""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Any]: 命中且未过期时返回缓存值，否则返回None
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self._remove(key)
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: Any, size: int) -> bool:
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            size: 值的字节数
+
+        Returns:
+            bool: 是否写入成功（TTL为0或单个值超过容量时不写入）
+        """
+        ttl = self._ttl_for(key)
+        if ttl <= 0 or size > self.max_bytes or self.max_entries <= 0:
+            return False
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self._bytes += size
+
+        # 按LRU顺序淘汰，直到满足条目数和字节数限制
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return True
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计信息"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
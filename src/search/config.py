@@ -0,0 +1,36 @@
+"""Configuration for the MCP search server
+
+This module contains server-level settings shared by all search engines.
+"""
+
+import os
+from .proxy.common import env_bool
+
+# 结果缓存配置
+CACHE_CONFIG = {
+    "enabled": env_bool("SEARCH_CACHE_ENABLED", True),                          # 是否启用结果缓存
+    "max_entries": int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "512")),           # 最大缓存条目数
+    "max_bytes": int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),  # 最大缓存字节数
+    "ttl": {                                                                    # 各搜索引擎的缓存有效期(秒)，0表示不缓存
+        "brave": float(os.getenv("SEARCH_CACHE_TTL_BRAVE", "600")),
+        "bocha": float(os.getenv("SEARCH_CACHE_TTL_BOCHA", "600")),
+        "metaso": float(os.getenv("SEARCH_CACHE_TTL_METASO", "3600"))
+    }
+}
+
+# 合并相同的并发搜索请求（只向上游发送一次）
+COALESCE_ENABLED = env_bool("SEARCH_COALESCE_ENABLED", True)
+
+# 服务启动时在后台预热搜索引擎（如启动Metaso浏览器），工具调用会等待预热完成
+PREWARM_ENABLED = env_bool("SEARCH_PREWARM", False)
+
+# 分页搜索的下一页预取（可选）：返回第N页后，在速率限制有余量时于后台获取第N+1页写入结果缓存
+PREFETCH_CONFIG = {
+    "enabled": env_bool("SEARCH_PREFETCH", False),                              # 是否启用预取（需启用结果缓存）
+    "budget": int(os.getenv("SEARCH_PREFETCH_BUDGET", "10")),                   # 每分钟最多预取次数
+    "min_headroom": float(os.getenv("SEARCH_PREFETCH_MIN_HEADROOM", "1")),      # 速率限制至少剩余多少许可时才预取（且不少于预取的上游请求数）
+    "max_wait": float(os.getenv("SEARCH_PREFETCH_MAX_WAIT", "2")),              # 等待速率余量的最长时间(秒)
+    "unused_after": float(os.getenv("SEARCH_PREFETCH_UNUSED_AFTER", "300")),    # 预取结果多久(秒)未被请求视为浪费
+    "backoff_after": int(os.getenv("SEARCH_PREFETCH_BACKOFF_AFTER", "3")),      # 连续浪费多少次后暂停预取
+    "backoff": float(os.getenv("SEARCH_PREFETCH_BACKOFF", "60"))                # 基础暂停时间(秒)，连续暂停时按指数增长
+}
@@ -0,0 +1,241 @@
+"""Speculative next-page prefetch for paginated searches
+
+Agents usually read results page by page. After page N of a paginated tool is
+served, page N+1 is fetched in the background into the result cache, but only
+when the engine's rate limiter has spare permits and the prefetch budget
+allows it. Prefetched pages that are later requested count as hits; pages
+that expire unused count as waste, and repeated waste backs prefetching off
+for an exponentially growing period.
+"""
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set
+
+from .proxy.common import TokenBucket
+
+def next_page_arguments(
+    arguments: Dict[str, Any],
+    param: str,
+    defaults: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """生成下一页的调用参数
+
+    Args:
+        arguments: 当前调用参数
+        param: 分页参数名（如page、offset）
+        defaults: 工具参数的默认值
+
+    Returns:
+        Dict: 分页参数加1后的调用参数
+    """
+    current = arguments.get(param, (defaults or {}).get(param, 0))
+    return {**arguments, param: int(current) + 1}
+
+class Prefetcher:
+    """下一页预取器"""
+
+    def __init__(
+        self,
+        budget: int = 10,
+        min_headroom: float = 1,
+        max_wait: float = 2,
+        unused_after: float = 300,
+        backoff_after: int = 3,
+        backoff: float = 60
+    ):
+        """初始化
+
+        Args:
+            budget: 每分钟最多的预取次数
+            min_headroom: 速率限制器至少有多少可用许可时才预取（预取需要多次上游请求时按请求数要求）
+            max_wait: 等待速率余量的最长时间(秒)，超时则放弃本次预取
+            unused_after: 预取结果多久(秒)未被请求视为浪费
+            backoff_after: 连续多少次预取被浪费后暂停预取
+            backoff: 基础暂停时间(秒)，连续暂停时按指数增长
+        """
+        self.min_headroom = min_headroom
+        self.max_wait = max_wait
+        self.unused_after = unused_after
+        self.backoff_after = backoff_after
+        self.backoff = backoff
+        self._budget = TokenBucket(budget, 60) if budget > 0 else None
+        # 已写入缓存、尚未被请求的预取结果：缓存键 -> 视为浪费的时间
+        self._outstanding: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._inflight: Set[Hashable] = set()
+        self._claimed: Set[Hashable] = set()
+        self._waiting: Dict[Hashable, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._timers: Set[asyncio.TimerHandle] = set()
+        self._wasted_streak = 0
+        self._backoffs = 0
+        self._paused_until = 0.0
+        self.scheduled = 0
+        self.completed = 0
+        self.hits = 0
+        self.wasted = 0
+        self.skipped = 0
+
+    @property
+    def paused(self) -> bool:
+        """是否处于退避暂停期"""
+        return time.monotonic() < self._paused_until
+
+    def _expire(self):
+        """把超时未被请求的预取结果记为浪费，连续浪费过多时暂停预取"""
+        now = time.monotonic()
+        while self._outstanding:
+            key, deadline = next(iter(self._outstanding.items()))
+            if deadline > now + 0.001:
+                break
+            del self._outstanding[key]
+            self.wasted += 1
+            self._wasted_streak += 1
+            if self._wasted_streak >= self.backoff_after:
+                duration = min(self.backoff * 2 ** self._backoffs, self.backoff * 32)
+                self._backoffs += 1
+                self._wasted_streak = 0
+                self._paused_until = now + duration
+                print(f"Prefetch paused for {duration:.0f}s: prefetched pages went unused", file=sys.stderr)
+
+    def record_request(self, key: Hashable) -> bool:
+        """记录一次工具调用，命中预取结果（已缓存或正在预取）时计为命中
+
+        Args:
+            key: 调用的缓存键
+
+        Returns:
+            bool: 是否命中预取结果
+        """
+        self._expire()
+        waiting = self._waiting.pop(key, None)
+        if waiting is not None:
+            # 预取还在等待速率余量，由本次调用直接请求，取消预取避免重复请求
+            waiting.cancel()
+            return False
+        if key in self._outstanding:
+            del self._outstanding[key]
+        elif key in self._inflight and key not in self._claimed:
+            self._claimed.add(key)
+        else:
+            return False
+        self.hits += 1
+        self._wasted_streak = 0
+        self._backoffs = 0
+        return True
+
+    def schedule(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[bool]],
+        headroom: Callable[[], float],
+        requests: int = 1
+    ) -> bool:
+        """在后台预取
+
+        Args:
+            key: 预取结果的缓存键
+            fetch: 执行调用并写入缓存的协程函数，结果写入缓存时返回True
+            headroom: 返回引擎速率限制器当前可用许可数的函数
+            requests: 预取需要的上游请求数（自动分页的页数），0表示无需预取（如超出分页范围）
+
+        Returns:
+            bool: 是否已安排预取
+        """
+        self._expire()
+        if requests < 1 or self.paused or key in self._inflight or key in self._outstanding:
+            return False
+        if self._budget is not None:
+            if self._budget.available() < 1:
+                self.skipped += 1
+                return False
+            self._budget.consume()
+        self._inflight.add(key)
+        self.scheduled += 1
+        task = asyncio.ensure_future(self._run(key, fetch, headroom, max(self.min_headroom, requests)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _wait_headroom(self, headroom: Callable[[], float], required: float) -> bool:
+        """等待速率限制器的可用许可足够预取的全部上游请求，不抢占正常请求的许可"""
+        deadline = time.monotonic() + self.max_wait
+        while headroom() < required:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.2)
+        return True
+
+    async def _run(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[bool]],
+        headroom: Callable[[], float],
+        required: float
+    ):
+        """执行一次预取，速率余量不足时放弃"""
+        try:
+            self._waiting[key] = asyncio.current_task()
+            try:
+                ready = await self._wait_headroom(headroom, required)
+            finally:
+                self._waiting.pop(key, None)
+            if not ready:
+                self.skipped += 1
+                return
+            cached = await fetch()
+            self.completed += 1
+            if cached and key not in self._claimed:
+                self._outstanding[key] = time.monotonic() + self.unused_after
+                # 没有新请求时也按时判定浪费，使退避及时生效
+                self._start_expire_timer()
+        except asyncio.CancelledError:
+            self.skipped += 1
+            raise
+        except Exception as e:
+            print(f"Error during prefetch: {e}", file=sys.stderr)
+        finally:
+            self._inflight.discard(key)
+            self._claimed.discard(key)
+
+    def _start_expire_timer(self):
+        """在预取结果到期时检查是否被浪费"""
+        timer = None
+
+        def expire():
+            self._timers.discard(timer)
+            self._expire()
+
+        timer = asyncio.get_running_loop().call_later(self.unused_after, expire)
+        self._timers.add(timer)
+
+    async def close(self):
+        """取消进行中的预取和到期检查"""
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        """预取统计：命中率为被请求的预取结果占已判定（命中或浪费）的预取结果的比例"""
+        self._expire()
+        decided = self.hits + self.wasted
+        return {
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "skipped": self.skipped,
+            "outstanding": len(self._outstanding),
+            "hit_rate": self.hits / decided if decided else 0.0,
+            "paused": self.paused
+        }
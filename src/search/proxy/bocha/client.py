@@ -7,8 +7,9 @@ This module provides the core client functionality for interacting with Bocha Se
 """
 
 import httpx
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 import json
+from ..common import collect_results, get_http_client, iter_pages, plan_pages
 from .exceptions import (
     BochaException, BochaRequestError, 
     BochaResponseError, raise_for_error_code
@@ -16,7 +17,8 @@ from .exceptions import (
 from .config import (
     BOCHA_API_KEY, API_ENDPOINT, FRESHNESS_RANGES,
     DEFAULT_COUNT, DEFAULT_FRESHNESS, DEFAULT_SUMMARY,
-    DEFAULT_PAGE, check_rate_limit
+    DEFAULT_PAGE, MAX_PAGE_COUNT, MAX_COUNT, PAGE_CONCURRENCY,
+    check_rate_limit
 )
 
 class BochaClient:
@@ -60,13 +62,13 @@ class BochaClient:
             BochaRequestError: 请求发送失败
             BochaResponseError: 响应解析失败
         """
-        check_rate_limit()
+        await check_rate_limit()
         
         # 验证参数
         if not query:
             raise ValueError("搜索查询不能为空")
-        if not 1 <= count <= 10:
-            raise ValueError("count必须在1-10之间")
+        if not 1 <= count <= MAX_PAGE_COUNT:
+            raise ValueError(f"count必须在1-{MAX_PAGE_COUNT}之间")
         if page < 1:
             raise ValueError("page必须大于0")
         if freshness not in FRESHNESS_RANGES.values():
@@ -81,38 +83,160 @@ class BochaClient:
             "summary": summary
         }
         
-        # 发送请求
-        async with httpx.AsyncClient() as client:
+        # 发送请求（复用共享连接池）
+        client = get_http_client()
+        try:
+            response = await client.post(
+                API_ENDPOINT,
+                json=data,
+                headers=self._get_headers()
+            )
+            
+            # 解析响应数据
             try:
-                response = await client.post(
-                    API_ENDPOINT,
-                    json=data,
-                    headers=self._get_headers()
+                response_data = response.json()
+            except json.JSONDecodeError:
+                raise BochaResponseError("API返回数据解析失败")
+            
+            # 检查响应状态
+            if response.status_code != 200:
+                raise_for_error_code(
+                    str(response_data.get("code", "unknown")),
+                    response_data.get("msg", "未知错误")
                 )
+            
+            # 验证响应格式
+            if not isinstance(response_data, dict):
+                raise BochaResponseError("API返回数据格式错误")
                 
-                # 解析响应数据
-                try:
-                    response_data = response.json()
-                except json.JSONDecodeError:
-                    raise BochaResponseError("API返回数据解析失败")
-                
-                # 检查响应状态
-                if response.status_code != 200:
-                    raise_for_error_code(
-                        str(response_data.get("code", "unknown")),
-                        response_data.get("msg", "未知错误")
-                    )
-                
-                # 验证响应格式
-                if not isinstance(response_data, dict):
-                    raise BochaResponseError("API返回数据格式错误")
-                    
-                # 返回完整响应
-                return response_data
-                
-            except httpx.RequestError as e:
-                raise BochaRequestError(f"请求失败: {str(e)}")
+            # 返回完整响应
+            return response_data
             
+        except httpx.RequestError as e:
+            raise BochaRequestError(f"请求失败: {str(e)}")
+        
+    async def _search_page(
+        self,
+        query: str,
+        page_size: int,
+        index: int,
+        freshness: str,
+        summary: bool
+    ) -> Tuple[Dict[str, Any], List[Dict[str, Any]], bool]:
+        """请求一页搜索结果
+        
+        Args:
+            page_size: 每页结果数
+            index: 页码，从0开始
+            
+        Returns:
+            Tuple: (完整的API响应, 网页结果列表, 是否还有后续结果)
+        """
+        response = await self.web_search(query, page_size, index + 1, freshness, summary)
+        web_pages = (response.get("data") or {}).get("webPages") or {}
+        values = web_pages.get("value") or []
+        total = web_pages.get("totalEstimatedMatches") or 0
+        has_more = len(values) >= page_size and (not total or (index + 1) * page_size < total)
+        return response, values, has_more
+        
+    def _plan(self, count: int, page: int) -> Tuple[int, range, int]:
+        """计算自动分页的每页结果数、页码范围(从0开始)和第一页需要跳过的结果数"""
+        if not 1 <= count <= MAX_COUNT:
+            raise ValueError(f"count必须在1-{MAX_COUNT}之间")
+        if page < 1:
+            raise ValueError("page必须大于0")
+        page_size = min(count, MAX_PAGE_COUNT)
+        # 页码以count条结果为一页，即从第(page-1)*count条结果开始
+        pages, skip = plan_pages((page - 1) * count, count, page_size)
+        return page_size, pages, skip
+        
+    async def iter_web_search(
+        self,
+        query: str,
+        count: int = DEFAULT_COUNT,
+        page: int = DEFAULT_PAGE,
+        freshness: str = DEFAULT_FRESHNESS,
+        summary: bool = DEFAULT_SUMMARY,
+        concurrency: int = 1
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """逐页产出网页结果，count超过单次请求上限时自动分页
+        
+        Args:
+            query: 搜索查询
+            count: 结果总数(1-MAX_COUNT)
+            page: 页码，从1开始，以count条结果为一页
+            freshness: 时间范围，可选值见FRESHNESS_RANGES
+            summary: 是否显示摘要
+            concurrency: 同时请求的页数，为1时只在取下一页时才请求
+            
+        Yields:
+            List[Dict]: 每页的网页结果（未去重）
+            
+        Raises:
+            BochaResponseError: 某页返回错误状态
+        """
+        page_size, pages, skip = self._plan(count, page)
+        
+        async def fetch_page(index: int):
+            response, values, has_more = await self._search_page(query, page_size, index, freshness, summary)
+            if response.get("code") != 200:
+                raise BochaResponseError(response.get("msg", "未知错误"))
+            return values, has_more
+            
+        async for values in iter_pages(fetch_page, pages, concurrency, skip):
+            yield values
+            
+    async def web_search_all(
+        self,
+        query: str,
+        count: int = DEFAULT_COUNT,
+        page: int = DEFAULT_PAGE,
+        freshness: str = DEFAULT_FRESHNESS,
+        summary: bool = DEFAULT_SUMMARY
+    ) -> Dict[str, Any]:
+        """执行网页搜索，count超过单次请求上限时并发获取多页
+        
+        Args:
+            query: 搜索查询
+            count: 结果数量(1-MAX_COUNT)
+            page: 页码，从1开始，以count条结果为一页
+            freshness: 时间范围，可选值见FRESHNESS_RANGES
+            summary: 是否显示摘要
+            
+        Returns:
+            Dict: 与web_search格式相同的API响应，其中网页结果为各页按排名顺序去重合并后的结果，
+                统计信息和图片来自第一页；第一页之后的请求失败时包含partial字段（错误信息），
+                网页结果不完整
+        """
+        page_size, pages, skip = self._plan(count, page)
+        first_response: Dict[str, Any] = {}
+        
+        async def fetch_page(index: int):
+            nonlocal first_response
+            response, values, has_more = await self._search_page(query, page_size, index, freshness, summary)
+            if index == pages[0]:
+                first_response = response
+                if response.get("code") != 200:
+                    # 第一页出错时直接返回该响应
+                    return [], False
+            elif response.get("code") != 200:
+                raise BochaResponseError(response.get("msg", "未知错误"))
+            return values, has_more
+            
+        values, error = await collect_results(
+            iter_pages(fetch_page, pages, PAGE_CONCURRENCY, skip),
+            count,
+            key=lambda result: result.get("url") or result.get("name")
+        )
+        data = first_response.get("data")
+        if first_response.get("code") != 200 or not data:
+            return first_response
+        web_pages = dict(data.get("webPages") or {}, value=values)
+        response = dict(first_response, data=dict(data, webPages=web_pages))
+        if error is not None:
+            response["partial"] = str(error)
+        return response
+        
     def _get_headers(self) -> Dict[str, str]:
         """获取API请求头
         
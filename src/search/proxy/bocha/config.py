@@ -7,8 +7,9 @@ This module contains configuration settings and constants for the Bocha Search A
 """
 
 import os
-import time
 from typing import Dict
+from .exceptions import BochaRateLimitError
+from ..common import RateLimiter, RateLimitTimeout
 
 # API配置
 BOCHA_API_KEY = os.getenv("BOCHA_API_KEY", "")
@@ -32,39 +33,37 @@ DEFAULT_FRESHNESS = "noLimit" # 默认时间范围
 DEFAULT_SUMMARY = False       # 默认不显示摘要
 DEFAULT_PAGE = 1             # 默认页码
 
+# 每次请求的结果数上限
+MAX_PAGE_COUNT = 10
+
+# 自动分页：search工具单次调用最多返回的结果数，以及同时请求的页数
+MAX_COUNT = int(os.getenv("BOCHA_MAX_COUNT", "50"))
+PAGE_CONCURRENCY = int(os.getenv("BOCHA_PAGE_CONCURRENCY", "3"))
+
 # 速率限制配置
 RATE_LIMIT = {
     "per_second": 2,
     "per_minute": 60
 }
 
-request_count = {
-    "second": 0,
-    "minute": 0,
-    "last_reset": time.time(),
-    "last_minute_reset": time.time()
-}
+# 等待速率限制许可的最长时间(秒)
+RATE_LIMIT_MAX_WAIT = float(os.getenv("BOCHA_RATE_LIMIT_MAX_WAIT", "10"))
+
+rate_limiter = RateLimiter.from_config(RATE_LIMIT)
 
-def check_rate_limit():
-    """检查并更新速率限制"""
-    now = time.time()
+async def check_rate_limit(max_wait: float = RATE_LIMIT_MAX_WAIT):
+    """等待速率限制许可
     
-    # 重置秒级计数器
-    if now - request_count["last_reset"] > 1:
-        request_count["second"] = 0
-        request_count["last_reset"] = now
+    Args:
+        max_wait: 最长等待秒数
         
-    # 重置分钟级计数器
-    if now - request_count["last_minute_reset"] > 60:
-        request_count["minute"] = 0
-        request_count["last_minute_reset"] = now
-    
-    if (request_count["second"] >= RATE_LIMIT["per_second"] or 
-        request_count["minute"] >= RATE_LIMIT["per_minute"]):
-        raise Exception("超出速率限制")
-    
-    request_count["second"] += 1
-    request_count["minute"] += 1
+    Raises:
+        BochaRateLimitError: 超过最长等待时间仍未获得许可
+    """
+    try:
+        await rate_limiter.acquire(max_wait)
+    except RateLimitTimeout as e:
+        raise BochaRateLimitError(f"超出速率限制: {e}")
 
 def validate_api_key() -> None:
     """验证API密钥是否有效
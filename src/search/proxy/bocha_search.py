@@ -7,9 +7,11 @@ It includes the MCP tool descriptions and handlers.
 网站: AI全书（https://aibook.ren）
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import mcp.types as types
+from .common import PARTIAL_PREFIX, close_http_client, plan_pages
 from .bocha import BochaClient, BochaException, FRESHNESS_RANGES
+from .bocha.config import MAX_COUNT, MAX_PAGE_COUNT, rate_limiter
 
 def get_tool_descriptions() -> list[types.Tool]:
     """返回博查搜索工具的描述列表"""
@@ -23,7 +25,7 @@ def get_tool_descriptions() -> list[types.Tool]:
                 "- 时间范围过滤\n"
                 "- 显示详细摘要\n"
                 "- 分页获取\n"
-                "每次请求最多返回10个结果。"
+                f"每次请求最多返回{MAX_COUNT}个结果（超过10个时自动并发获取多页）。"
                 "（当前使用博查搜索API实现）"
             ),
             inputSchema={
@@ -35,12 +37,12 @@ def get_tool_descriptions() -> list[types.Tool]:
                     },
                     "count": {
                         "type": "number",
-                        "description": "结果数量(1-10，默认10)",
+                        "description": f"结果数量(1-{MAX_COUNT}，默认10，超过{MAX_COUNT}时按{MAX_COUNT}处理)",
                         "default": 10
                     },
                     "page": {
                         "type": "number",
-                        "description": "页码，从1开始",
+                        "description": "页码，从1开始，以count条结果为一页",
                         "default": 1
                     },
                     "freshness": {
@@ -60,22 +62,50 @@ def get_tool_descriptions() -> list[types.Tool]:
         )
     ]
 
+_client: Optional[BochaClient] = None
+
+def _get_client() -> BochaClient:
+    """获取复用的客户端实例"""
+    global _client
+    if _client is None:
+        _client = BochaClient()
+    return _client
+
+def rate_limit_headroom() -> float:
+    """速率限制器当前可立即发出的请求数，供预取判断是否有余量"""
+    return rate_limiter.headroom()
+
+def upstream_request_count(name: str, arguments: Dict[str, Any]) -> int:
+    """工具调用需要的上游请求数（自动分页的页数），参数无效时返回0，供预取判断所需的速率余量"""
+    if name != "search":
+        return 1
+    count = max(1, min(int(arguments.get("count", 10)), MAX_COUNT))
+    page = int(arguments.get("page", 1))
+    if page < 1:
+        return 0
+    pages, _ = plan_pages((page - 1) * count, count, min(count, MAX_PAGE_COUNT))
+    return len(pages)
+
+async def shutdown() -> None:
+    """关闭共享连接池"""
+    await close_http_client()
+
 async def handle_tool_call(name: str, arguments: Dict[str, Any]) -> types.TextContent:
     """统一处理工具调用"""
     if not arguments or "query" not in arguments:
         raise ValueError("缺少query参数")
 
     query = arguments["query"]
-    client = BochaClient()
+    client = _get_client()
     
     try:
         if name == "search":
-            count = arguments.get("count", 10)
-            page = arguments.get("page", 1)
+            count = max(1, min(int(arguments.get("count", 10)), MAX_COUNT))
+            page = int(arguments.get("page", 1))
             freshness = arguments.get("freshness", "noLimit")
             summary = arguments.get("summary", False)
             
-            response = await client.web_search(
+            response = await client.web_search_all(
                 query=query,
                 count=count,
                 page=page,
@@ -101,6 +131,10 @@ async def handle_tool_call(name: str, arguments: Dict[str, Any]) -> types.TextCo
             # 格式化输出
             formatted_results = []
             
+            # 部分分页请求失败时标明结果不完整（不写入缓存）
+            if response.get("partial"):
+                formatted_results.append(f"{PARTIAL_PREFIX} 部分分页请求失败（{response['partial']}），以下结果不完整。")
+                
             # 首先添加统计信息
             web_pages = data.get("webPages", {})
             total_results = web_pages.get("totalEstimatedMatches", 0)
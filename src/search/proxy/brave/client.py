@@ -3,11 +3,19 @@
 This module provides the core client functionality for interacting with Brave Search API.
 """
 
-import httpx
-from typing import Dict, Any, List, Optional
-import os
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
+import asyncio
 from .exceptions import BraveException
-from .config import BRAVE_API_KEY, check_rate_limit
+from .config import (
+    BRAVE_API_KEY, MAX_PAGE_COUNT, MAX_OFFSET, PAGE_CONCURRENCY,
+    LOCAL_MAX_IDS, LOCATION_CACHE_TTL, LOCATION_CACHE_MAX_ENTRIES,
+    LOCATION_BATCH_WINDOW, check_rate_limit
+)
+from .location_cache import LocationCache
+from ..common import MicroBatcher, collect_results, get_http_client, iter_pages, plan_pages
+
+POIS_URL = "https://api.search.brave.com/res/v1/local/pois"
+DESCRIPTIONS_URL = "https://api.search.brave.com/res/v1/local/descriptions"
 
 class BraveClient:
     """Brave Search API客户端
@@ -24,6 +32,10 @@ class BraveClient:
         self.api_key = api_key or BRAVE_API_KEY
         if not self.api_key:
             raise BraveException("需要提供API密钥")
+        self._location_cache = LocationCache(LOCATION_CACHE_TTL, LOCATION_CACHE_MAX_ENTRIES)
+        self._location_batcher = MicroBatcher(
+            self._fetch_location_batch, LOCAL_MAX_IDS, LOCATION_BATCH_WINDOW
+        )
             
     async def web_search(self, query: str, count: int = 10, offset: int = 0) -> List[Dict[str, str]]:
         """执行网络搜索
@@ -36,35 +48,106 @@ class BraveClient:
         Returns:
             List[Dict]: 搜索结果列表，每个结果包含title、description和url
         """
-        check_rate_limit()
+        results, _ = await self._web_search_page(query, count, offset)
+        return results
+        
+    async def _web_search_page(self, query: str, count: int, offset: int) -> Tuple[List[Dict[str, str]], bool]:
+        """请求一页网络搜索结果
+        
+        Returns:
+            Tuple: (搜索结果列表, 是否还有后续结果)
+        """
+        await check_rate_limit()
         
         url = "https://api.search.brave.com/res/v1/web/search"
         params = {
             "q": query,
-            "count": min(count, 20),
+            "count": min(count, MAX_PAGE_COUNT),
             "offset": offset
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                params=params,
-                headers=self._get_headers()
-            )
+        client = get_http_client()
+        response = await client.get(
+            url,
+            params=params,
+            headers=self._get_headers()
+        )
+        
+        if response.status_code != 200:
+            raise BraveException(f"API错误: {response.status_code} {response.text}")
+            
+        data = response.json()
+        results = self._parse_web_results(data)
+        has_more = data.get("query", {}).get("more_results_available", len(results) >= params["count"])
+        return results, bool(has_more)
+        
+    async def iter_web_search(
+        self,
+        query: str,
+        count: int = 10,
+        offset: int = 0,
+        concurrency: int = 1
+    ) -> AsyncIterator[List[Dict[str, str]]]:
+        """逐页产出网络搜索结果，count超过单次请求上限时自动分页
+        
+        offset与web_search相同，以count条结果为一页，即从第offset*count条结果开始。
+        
+        Args:
+            query: 搜索查询
+            count: 结果总数，受最大分页偏移量限制
+            offset: 分页偏移量
+            concurrency: 同时请求的页数，为1时只在取下一页时才请求
+            
+        Yields:
+            List[Dict]: 每页的搜索结果（未去重）
+        """
+        if count < 1:
+            return
+        page_size = min(count, MAX_PAGE_COUNT)
+        pages, skip = plan_pages(offset * count, count, page_size, MAX_OFFSET + 1)
+        async for results in iter_pages(
+            lambda page: self._web_search_page(query, page_size, page),
+            pages,
+            concurrency,
+            skip
+        ):
+            yield results
+            
+    async def web_search_all(
+        self,
+        query: str,
+        count: int = 10,
+        offset: int = 0
+    ) -> Tuple[List[Dict[str, str]], Optional[Exception]]:
+        """执行网络搜索，count超过单次请求上限时并发获取多页
+        
+        Args:
+            query: 搜索查询
+            count: 结果数量
+            offset: 分页偏移量，含义同iter_web_search
+            
+        Returns:
+            Tuple[List[Dict], Optional[Exception]]: (按排名顺序去重后的搜索结果,
+                第一页之后的请求失败时的异常，结果完整时为None)
+        """
+        return await collect_results(
+            self.iter_web_search(query, count, offset, PAGE_CONCURRENCY),
+            count,
+            key=lambda result: result["url"] or result["title"]
+        )
+        
+    @staticmethod
+    def _parse_web_results(data: Dict[str, Any]) -> List[Dict[str, str]]:
+        """从搜索响应中提取网络搜索结果"""
+        results = []
+        for result in data.get("web", {}).get("results", []):
+            results.append({
+                "title": result.get("title", ""),
+                "description": result.get("description", ""),
+                "url": result.get("url", "")
+            })
             
-            if response.status_code != 200:
-                raise BraveException(f"API错误: {response.status_code} {response.text}")
-                
-            data = response.json()
-            results = []
-            for result in data.get("web", {}).get("results", []):
-                results.append({
-                    "title": result.get("title", ""),
-                    "description": result.get("description", ""),
-                    "url": result.get("url", "")
-                })
-                
-            return results
+        return results
             
     async def location_search(self, query: str, count: int = 5) -> List[Dict[str, Any]]:
         """执行地理位置搜索
@@ -76,87 +159,124 @@ class BraveClient:
         Returns:
             List[Dict]: 位置搜索结果列表
         """
-        check_rate_limit()
+        await check_rate_limit()
         
-        # 初始搜索获取位置ID
+        # 初始搜索获取位置ID，同时请求网络结果，没有位置结果时直接作为回退结果
         web_url = "https://api.search.brave.com/res/v1/web/search"
         params = {
             "q": query,
-            "search_lang": "en",
-            "result_filter": "locations",
+            "result_filter": "web,locations",
             "count": min(count, 20)
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                web_url,
-                params=params,
-                headers=self._get_headers()
-            )
-            
-            if response.status_code != 200:
-                raise BraveException(f"API错误: {response.status_code} {response.text}")
-                
-            data = response.json()
-            location_ids = [
-                r["id"] for r in data.get("locations", {}).get("results", [])
-                if "id" in r
-            ]
-            
-            if not location_ids:
-                # 如果没有位置结果，返回网络搜索结果
-                return await self.web_search(query, count)
-                
-            # 并行获取POI详情和描述
-            pois_url = "https://api.search.brave.com/res/v1/local/pois"
-            desc_url = "https://api.search.brave.com/res/v1/local/descriptions"
-            
-            pois_response = await client.get(
-                pois_url,
-                params={"ids": location_ids},
-                headers=self._get_headers()
-            )
-            
-            desc_response = await client.get(
-                desc_url,
-                params={"ids": location_ids},
-                headers=self._get_headers()
-            )
+        client = get_http_client()
+        response = await client.get(
+            web_url,
+            params=params,
+            headers=self._get_headers()
+        )
+        
+        if response.status_code != 200:
+            raise BraveException(f"API错误: {response.status_code} {response.text}")
             
-            if pois_response.status_code != 200 or desc_response.status_code != 200:
-                raise BraveException("获取POI详情或描述失败")
-                
-            pois_data = pois_response.json()
-            desc_data = desc_response.json()
+        data = response.json()
+        location_ids = list(dict.fromkeys(
+            r["id"] for r in data.get("locations", {}).get("results", [])
+            if "id" in r
+        ))
+        
+        if not location_ids:
+            # 如果没有位置结果，返回同一响应中的网络搜索结果
+            return self._parse_web_results(data)
             
-            results = []
-            for poi in pois_data.get("results", []):
-                address_parts = [
-                    poi.get("address", {}).get("streetAddress", ""),
-                    poi.get("address", {}).get("addressLocality", ""),
-                    poi.get("address", {}).get("addressRegion", ""),
-                    poi.get("address", {}).get("postalCode", "")
-                ]
-                address = ", ".join(filter(None, address_parts))
-                
-                rating = poi.get("rating", {})
-                description = desc_data.get("descriptions", {}).get(poi["id"], "暂无描述")
-                
-                results.append({
-                    "name": poi.get("name", "暂无"),
-                    "address": address or "暂无",
-                    "phone": poi.get("phone", "暂无"),
-                    "rating": {
-                        "value": rating.get("ratingValue", "暂无"),
-                        "count": rating.get("ratingCount", 0)
-                    },
-                    "price_range": poi.get("priceRange", "暂无"),
-                    "opening_hours": poi.get("openingHours", []),
-                    "description": description
-                })
-                
-            return results
+        details = await self._get_location_details(location_ids)
+        return [
+            self._format_location(*details[location_id])
+            for location_id in location_ids if location_id in details
+        ]
+        
+    async def _get_location_details(
+        self, location_ids: List[str]
+    ) -> Dict[str, Tuple[Dict[str, Any], Optional[str]]]:
+        """获取位置的POI详情和描述，只请求缓存中没有的位置
+        
+        Args:
+            location_ids: 位置ID列表
             
+        Returns:
+            Dict: 位置ID -> (POI详情, 描述)，接口未返回POI的位置不包含在内
+        """
+        details = {}
+        missing = []
+        for location_id in location_ids:
+            cached = self._location_cache.get(location_id)
+            if cached is not None:
+                details[location_id] = cached
+            else:
+                missing.append(location_id)
+        if missing:
+            # 并发调用方的位置ID在时间窗口内合并为共享的批量请求
+            details.update(await self._location_batcher.load(missing))
+        return details
+        
+    async def _fetch_location_batch(
+        self, location_ids: List[str]
+    ) -> Dict[str, Tuple[Dict[str, Any], Optional[str]]]:
+        """并行获取一批（不超过接口ID数上限）位置的POI详情和描述，并写入缓存"""
+        pois_data, desc_data = await asyncio.gather(
+            self._get_local(POIS_URL, location_ids),
+            self._get_local(DESCRIPTIONS_URL, location_ids)
+        )
+        descriptions = desc_data.get("descriptions", {})
+        
+        details = {}
+        for poi in pois_data.get("results", []):
+            location_id = poi.get("id")
+            if location_id is None:
+                continue
+            description = descriptions.get(location_id)
+            self._location_cache.set(location_id, poi, description)
+            details[location_id] = (poi, description)
+        return details
+        
+    async def _get_local(self, url: str, location_ids: List[str]) -> Dict[str, Any]:
+        """请求一批位置的POI详情或描述"""
+        client = get_http_client()
+        response = await client.get(
+            url,
+            params={"ids": location_ids},
+            headers=self._get_headers()
+        )
+        if response.status_code != 200:
+            raise BraveException("获取POI详情或描述失败")
+        return response.json()
+        
+    @staticmethod
+    def _format_location(poi: Dict[str, Any], description: Optional[str]) -> Dict[str, Any]:
+        """把POI详情和描述整理为位置搜索结果"""
+        address_parts = [
+            poi.get("address", {}).get("streetAddress", ""),
+            poi.get("address", {}).get("addressLocality", ""),
+            poi.get("address", {}).get("addressRegion", ""),
+            poi.get("address", {}).get("postalCode", "")
+        ]
+        address = ", ".join(filter(None, address_parts))
+        
+        rating = poi.get("rating", {})
+        
+        return {
+            "name": poi.get("name", "暂无"),
+            "address": address or "暂无",
+            "phone": poi.get("phone", "暂无"),
+            "rating": {
+                "value": rating.get("ratingValue", "暂无"),
+                "count": rating.get("ratingCount", 0)
+            },
+            "price_range": poi.get("priceRange", "暂无"),
+            "opening_hours": poi.get("openingHours", []),
+            "description": description if description is not None else "暂无描述"
+        }
+        
     def _get_headers(self) -> Dict[str, str]:
         """获取API请求头
         
@@ -1,7 +1,8 @@
 """Configuration for Brave Search API"""
 
 import os
-import time
+from .exceptions import BraveRateLimitError
+from ..common import RateLimiter, RateLimitTimeout
 
 # 检查API密钥
 BRAVE_API_KEY = os.getenv("BRAVE_API_KEY")
@@ -11,28 +12,45 @@ if not BRAVE_API_KEY:
 if not BRAVE_API_KEY:
     raise ValueError("需要设置BRAVE_API_KEY环境变量")
 
+# 网络搜索每次请求的结果数上限和最大分页偏移量
+MAX_PAGE_COUNT = 20
+MAX_OFFSET = 9
+
+# 自动分页：search工具单次调用最多返回的结果数，以及同时请求的页数
+MAX_COUNT = int(os.getenv("BRAVE_MAX_COUNT", "50"))
+PAGE_CONCURRENCY = int(os.getenv("BRAVE_PAGE_CONCURRENCY", "2"))
+
+# 位置详情接口（/local/pois、/local/descriptions）每次请求最多的位置ID数
+LOCAL_MAX_IDS = 20
+
+# 位置详情缓存：有效期(秒，0表示不缓存)和最大条目数
+LOCATION_CACHE_TTL = float(os.getenv("BRAVE_LOCATION_CACHE_TTL", "3600"))
+LOCATION_CACHE_MAX_ENTRIES = int(os.getenv("BRAVE_LOCATION_CACHE_MAX_ENTRIES", "1024"))
+
+# 位置详情请求合并：并发位置搜索在该时间窗口(秒)内的位置ID合并为批量请求
+LOCATION_BATCH_WINDOW = float(os.getenv("BRAVE_LOCATION_BATCH_WINDOW", "0.005"))
+
 # 速率限制配置
 RATE_LIMIT = {
     "per_second": 1,
     "per_month": 15000
 }
 
-request_count = {
-    "second": 0,
-    "month": 0,
-    "last_reset": time.time()
-}
+# 等待速率限制许可的最长时间(秒)
+RATE_LIMIT_MAX_WAIT = float(os.getenv("BRAVE_RATE_LIMIT_MAX_WAIT", "10"))
 
-def check_rate_limit():
-    """检查并更新速率限制"""
-    now = time.time()
-    if now - request_count["last_reset"] > 1:
-        request_count["second"] = 0
-        request_count["last_reset"] = now
-    
-    if (request_count["second"] >= RATE_LIMIT["per_second"] or 
-        request_count["month"] >= RATE_LIMIT["per_month"]):
-        raise Exception("超出速率限制")
+rate_limiter = RateLimiter.from_config(RATE_LIMIT)
+
+async def check_rate_limit(max_wait: float = RATE_LIMIT_MAX_WAIT):
+    """等待速率限制许可
     
-    request_count["second"] += 1
-    request_count["month"] += 1 
\ No newline at end of file
+    Args:
+        max_wait: 最长等待秒数
+        
+    Raises:
+        BraveRateLimitError: 超过最长等待时间仍未获得许可
+    """
+    try:
+        await rate_limiter.acquire(max_wait)
+    except RateLimitTimeout as e:
+        raise BraveRateLimitError(f"超出速率限制: {e}")
@@ -0,0 +1,68 @@
+"""Per-location cache for Brave POI details and descriptions
+
+Location search resolves location IDs first and then fetches details for each
+ID. Details change rarely, so they are cached by location ID: repeated and
+overlapping location searches only fetch the IDs that are not cached yet.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class LocationCache:
+    """带TTL的LRU位置详情缓存"""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 1024):
+        """初始化缓存
+
+        Args:
+            ttl: 有效期(秒)，0表示不缓存
+            max_entries: 最大条目数
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # 位置ID -> (过期时间, POI详情, 描述)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any], Optional[str]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, location_id: str) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
+        """读取位置详情
+
+        Args:
+            location_id: 位置ID
+
+        Returns:
+            Optional[Tuple]: 命中且未过期时返回(POI详情, 描述)，否则返回None
+        """
+        entry = self._entries.get(location_id)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(location_id)
+                self.hits += 1
+                return entry[1], entry[2]
+            del self._entries[location_id]
+        self.misses += 1
+        return None
+
+    def set(self, location_id: str, poi: Dict[str, Any], description: Optional[str]):
+        """写入位置详情
+
+        Args:
+            location_id: 位置ID
+            poi: POI详情
+            description: 描述，没有描述时为None
+        """
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        self._entries[location_id] = (time.monotonic() + self.ttl, poi, description)
+        self._entries.move_to_end(location_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
@@ -4,9 +4,11 @@ This module provides web search and location-based search functionality using Br
 It includes the MCP tool descriptions and handlers.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import mcp.types as types
+from .common import PARTIAL_PREFIX, close_http_client, plan_pages
 from .brave import BraveClient, BraveException
+from .brave.config import MAX_COUNT, MAX_OFFSET, MAX_PAGE_COUNT, rate_limiter
 
 def get_tool_descriptions() -> list[types.Tool]:
     """返回Brave搜索工具的描述列表"""
@@ -17,7 +19,7 @@ def get_tool_descriptions() -> list[types.Tool]:
                 "执行网络搜索，查找网页、新闻、文章等在线内容。"
                 "适合广泛的信息收集、近期事件，或需要多样化网络来源时使用。"
                 "支持分页、内容过滤和时效性控制。"
-                "每次请求最多返回20个结果，支持分页偏移。"
+                f"每次请求最多返回{MAX_COUNT}个结果（超过20个时自动并发获取多页），支持分页偏移。"
                 "（当前使用Brave Search API实现）"
             ),
             inputSchema={
@@ -29,12 +31,15 @@ def get_tool_descriptions() -> list[types.Tool]:
                     },
                     "count": {
                         "type": "number",
-                        "description": "结果数量(1-20，默认10)",
+                        "description": f"结果数量(1-{MAX_COUNT}，默认10，超过{MAX_COUNT}时按{MAX_COUNT}处理)",
                         "default": 10
                     },
                     "offset": {
                         "type": "number", 
-                        "description": "分页偏移量(最大9，默认0)",
+                        "description": (
+                            f"分页偏移量(以count条结果为一页，最大{MAX_OFFSET}，"
+                            f"且最多只能获取前{(MAX_OFFSET + 1) * MAX_PAGE_COUNT}条结果，默认0)"
+                        ),
                         "default": 0
                     }
                 },
@@ -71,22 +76,54 @@ def get_tool_descriptions() -> list[types.Tool]:
         )
     ]
 
+_client: Optional[BraveClient] = None
+
+def _get_client() -> BraveClient:
+    """获取复用的客户端实例"""
+    global _client
+    if _client is None:
+        _client = BraveClient()
+    return _client
+
+def rate_limit_headroom() -> float:
+    """速率限制器当前可立即发出的请求数，供预取判断是否有余量"""
+    return rate_limiter.headroom()
+
+def upstream_request_count(name: str, arguments: Dict[str, Any]) -> int:
+    """工具调用需要的上游请求数（自动分页的页数），超出分页范围时返回0，供预取判断所需的速率余量"""
+    if name != "search":
+        return 1
+    count = max(1, min(int(arguments.get("count", 10)), MAX_COUNT))
+    offset = int(arguments.get("offset", 0))
+    try:
+        pages, _ = plan_pages(offset * count, count, min(count, MAX_PAGE_COUNT), MAX_OFFSET + 1)
+    except ValueError:
+        return 0
+    return len(pages)
+
+async def shutdown() -> None:
+    """关闭共享连接池"""
+    await close_http_client()
+
 async def handle_tool_call(name: str, arguments: Dict[str, Any]) -> types.TextContent:
     """统一处理工具调用"""
     if not arguments or "query" not in arguments:
         raise ValueError("缺少query参数")
 
     query = arguments["query"]
-    client = BraveClient()
+    client = _get_client()
     
     try:
         if name == "search":
-            count = arguments.get("count", 10)
-            offset = arguments.get("offset", 0)
-            results = await client.web_search(query, count, offset)
+            count = max(1, min(int(arguments.get("count", 10)), MAX_COUNT))
+            offset = int(arguments.get("offset", 0))
+            results, error = await client.web_search_all(query, count, offset)
             
             # 格式化输出
             formatted_results = []
+            if error is not None:
+                # 部分分页请求失败时标明结果不完整（不写入缓存）
+                formatted_results.append(f"{PARTIAL_PREFIX} 部分分页请求失败（{error}），以下结果不完整。")
             for result in results:
                 formatted_results.append(
                     f"标题: {result['title']}\n"
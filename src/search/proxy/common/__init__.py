@@ -0,0 +1,30 @@
+"""
+Shared utilities for search engine proxies.
+This module provides infrastructure used by all search engine clients.
+"""
+
+from .config import HTTP_POOL_CONFIG, PARTIAL_PREFIX, env_bool
+from .http_client import create_http_client, get_http_client, close_http_client
+from .rate_limit import RateLimiter, RateLimitTimeout, TokenBucket
+from .jobs import Job, JobQueue, JobQueueFull
+from .batching import MicroBatcher
+from .pagination import collect_results, iter_pages, plan_pages
+
+__all__ = [
+    'HTTP_POOL_CONFIG',
+    'PARTIAL_PREFIX',
+    'env_bool',
+    'create_http_client',
+    'get_http_client',
+    'close_http_client',
+    'RateLimiter',
+    'RateLimitTimeout',
+    'TokenBucket',
+    'Job',
+    'JobQueue',
+    'JobQueueFull',
+    'MicroBatcher',
+    'collect_results',
+    'iter_pages',
+    'plan_pages'
+]
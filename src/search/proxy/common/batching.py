@@ -0,0 +1,129 @@
+"""Micro-batching of concurrent key lookups
+
+Callers request values for a few keys at a time; keys requested by concurrent
+callers within a short time window are merged into shared batch requests of at
+most max_batch keys, and each caller receives only the values for its own
+keys. A key that is already pending or being fetched is shared rather than
+requested again.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set
+
+BatchFetch = Callable[[list], Awaitable[Dict[Hashable, Any]]]
+
+def _consume_exception(future: asyncio.Future):
+    """调用方已取消等待时，避免"Future exception was never retrieved"警告"""
+    if not future.cancelled():
+        future.exception()
+
+class MicroBatcher:
+    """在时间窗口内合并并发调用方的键，批量获取"""
+
+    def __init__(self, fetch: BatchFetch, max_batch: int, window: float = 0.005):
+        """初始化
+
+        Args:
+            fetch: 批量获取函数，参数为键列表，返回 键 -> 值，未返回的键视为不存在
+            max_batch: 每批最多的键数
+            window: 收集键的时间窗口(秒)，攒满一批时立即发出
+        """
+        if max_batch < 1:
+            raise ValueError("max_batch必须大于0")
+        self._fetch = fetch
+        self.max_batch = max_batch
+        self.window = window
+        self._pending: "OrderedDict[Hashable, asyncio.Future]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.keys = 0
+        self.requested = 0
+
+    async def load(self, keys: Iterable[Hashable]) -> Dict[Hashable, Any]:
+        """获取一组键的值
+
+        Args:
+            keys: 键列表
+
+        Returns:
+            Dict: 键 -> 值，不存在的键不包含在内
+
+        Raises:
+            Exception: 所在批次的获取函数抛出的异常
+        """
+        loop = asyncio.get_running_loop()
+        futures: Dict[Hashable, asyncio.Future] = {}
+        for key in keys:
+            if key in futures:
+                continue
+            self.requested += 1
+            future = self._inflight.get(key) or self._pending.get(key)
+            if future is None:
+                future = loop.create_future()
+                future.add_done_callback(_consume_exception)
+                self._pending[key] = future
+            futures[key] = future
+        if not futures:
+            return {}
+
+        if len(self._pending) >= self.max_batch:
+            self._flush(full_only=True)
+        if self._pending and self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        # 共享的future被多个调用方等待，单个调用方取消时不能取消它
+        values = await asyncio.gather(*(asyncio.shield(future) for future in futures.values()))
+        return {key: value for key, value in zip(futures, values) if value is not None}
+
+    def _flush(self, full_only: bool = False):
+        """把等待中的键按批次发出
+
+        Args:
+            full_only: 只发出攒满的批次，其余的键继续等待时间窗口结束
+        """
+        if not full_only and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending and (not full_only or len(self._pending) >= self.max_batch):
+            batch = OrderedDict()
+            while self._pending and len(batch) < self.max_batch:
+                key, future = self._pending.popitem(last=False)
+                batch[key] = future
+                self._inflight[key] = future
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: "OrderedDict[Hashable, asyncio.Future]"):
+        """执行一批获取并把结果分发给各个键"""
+        self.batches += 1
+        self.keys += len(batch)
+        try:
+            values = await self._fetch(list(batch))
+        except asyncio.CancelledError:
+            for future in batch.values():
+                future.cancel()
+            raise
+        except Exception as e:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for key, future in batch.items():
+                if not future.done():
+                    future.set_result(values.get(key))
+        finally:
+            for key in batch:
+                self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """批次统计：调用方请求的键数、实际获取的键数和批次数"""
+        return {
+            "requested": self.requested,
+            "fetched": self.keys,
+            "batches": self.batches,
+            "average_batch": self.keys / self.batches if self.batches else 0.0
+        }
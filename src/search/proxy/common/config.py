@@ -0,0 +1,25 @@
+"""Shared configuration for search engine proxies
+
+This module contains settings shared by all search engine clients.
+"""
+
+import os
+
+# 以此开头的工具结果不完整（截止时间已到或部分分页请求失败），不写入缓存
+PARTIAL_PREFIX = "[部分结果]"
+
+def env_bool(name: str, default: bool) -> bool:
+    """读取布尔类型的环境变量"""
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# HTTP连接池配置
+HTTP_POOL_CONFIG = {
+    "max_connections": int(os.getenv("SEARCH_HTTP_MAX_CONNECTIONS", "100")),            # 最大连接数
+    "max_keepalive_connections": int(os.getenv("SEARCH_HTTP_MAX_KEEPALIVE", "20")),    # 最大保活连接数
+    "keepalive_expiry": float(os.getenv("SEARCH_HTTP_KEEPALIVE_EXPIRY", "30")),        # 保活连接过期时间(秒)
+    "timeout": float(os.getenv("SEARCH_HTTP_TIMEOUT", "5")),                           # 请求超时时间(秒)
+    "http2": env_bool("SEARCH_HTTP2", False)                                          # 是否启用HTTP/2(需安装h2)
+}
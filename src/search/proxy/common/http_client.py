@@ -0,0 +1,65 @@
+"""Shared HTTP connection pool
+
+This module provides a process-wide httpx.AsyncClient with keep-alive connections,
+so that every search request reuses pooled DNS/TCP/TLS connections.
+"""
+
+import asyncio
+import importlib.util
+import sys
+from typing import Any, Optional
+import httpx
+from .config import HTTP_POOL_CONFIG
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def create_http_client(**overrides: Any) -> httpx.AsyncClient:
+    """按连接池配置创建一个新的AsyncClient
+
+    Args:
+        overrides: 覆盖默认配置的httpx.AsyncClient参数
+
+    Returns:
+        httpx.AsyncClient: 新建的客户端
+    """
+    http2 = HTTP_POOL_CONFIG["http2"]
+    if http2 and importlib.util.find_spec("h2") is None:
+        print("HTTP/2需要安装h2依赖(pip install httpx[http2])，已回退到HTTP/1.1", file=sys.stderr)
+        http2 = False
+
+    options = {
+        "limits": httpx.Limits(
+            max_connections=HTTP_POOL_CONFIG["max_connections"],
+            max_keepalive_connections=HTTP_POOL_CONFIG["max_keepalive_connections"],
+            keepalive_expiry=HTTP_POOL_CONFIG["keepalive_expiry"]
+        ),
+        "timeout": httpx.Timeout(HTTP_POOL_CONFIG["timeout"]),
+        "http2": http2
+    }
+    options.update(overrides)
+    return httpx.AsyncClient(**options)
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取进程级共享的AsyncClient
+
+    客户端在首次使用时创建；如果已关闭或事件循环发生变化，会重新创建。
+
+    Returns:
+        httpx.AsyncClient: 共享客户端
+    """
+    global _client, _client_loop
+
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = create_http_client()
+        _client_loop = loop
+    return _client
+
+async def close_http_client() -> None:
+    """关闭共享的AsyncClient，释放所有连接"""
+    global _client, _client_loop
+
+    client, _client, _client_loop = _client, None, None
+    if client is not None and not client.is_closed:
+        await client.aclose()
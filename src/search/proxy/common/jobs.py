@@ -0,0 +1,203 @@
+"""Bounded background job queue for slow searches
+
+Long-running calls are submitted as jobs and executed by a fixed number of
+worker tasks, so the submitting request returns a job ID immediately. Finished
+results are kept until they are fetched or their TTL expires; the number of
+unfinished jobs is capped so the queue cannot grow without bound.
+"""
+
+import asyncio
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# 任务状态
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+class JobQueueFull(Exception):
+    """未完成的任务数已达上限"""
+    pass
+
+class Job:
+    """一个后台任务"""
+
+    def __init__(self, job_id: str, fn: Callable[[], Awaitable[Any]]):
+        self.id = job_id
+        self.fn = fn
+        self.status = PENDING
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        """任务是否已结束"""
+        return self.status in FINISHED_STATES
+
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None):
+        self.status = status
+        self.result = result
+        self.error = error
+        self.finished_at = time.time()
+        self.fn = None
+
+class JobQueue:
+    """有界后台任务队列"""
+
+    def __init__(self, workers: int = 1, max_pending: int = 16, result_ttl: float = 1800):
+        """初始化任务队列
+
+        Args:
+            workers: 同时执行的任务数
+            max_pending: 未完成（排队中和执行中）任务数上限
+            result_ttl: 已结束任务的结果保留时间(秒)
+        """
+        if workers < 1:
+            raise ValueError("workers必须大于0")
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    def _unfinished(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.finished)
+
+    def _purge(self):
+        """删除超过保留时间的已结束任务"""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and now - job.finished_at >= self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _ensure_workers(self):
+        """按需启动工作任务（绑定到当前事件循环）"""
+        self._workers = [worker for worker in self._workers if not worker.done()]
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        while len(self._workers) < self.workers:
+            self._workers.append(asyncio.ensure_future(self._worker()))
+
+    def submit(self, fn: Callable[[], Awaitable[Any]]) -> str:
+        """提交任务
+
+        Args:
+            fn: 执行任务的协程函数
+
+        Returns:
+            str: 任务ID
+
+        Raises:
+            JobQueueFull: 未完成的任务数已达上限
+        """
+        self._purge()
+        if self._unfinished() >= self.max_pending:
+            raise JobQueueFull(f"未完成的任务数已达上限({self.max_pending})")
+        self._ensure_workers()
+        job = Job(uuid.uuid4().hex, fn)
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job.id
+
+    def get(self, job_id: str, pop_finished: bool = False) -> Optional[Job]:
+        """查询任务
+
+        Args:
+            job_id: 任务ID
+            pop_finished: 任务已结束时是否同时删除（结果只返回一次）
+
+        Returns:
+            Optional[Job]: 任务，不存在或已过期时返回None
+        """
+        self._purge()
+        job = self._jobs.get(job_id)
+        if job is not None and pop_finished and job.finished:
+            del self._jobs[job_id]
+        return job
+
+    def position(self, job_id: str) -> int:
+        """排队中的任务前面还有多少个任务在排队，不在排队时返回0"""
+        ahead = 0
+        for job in self._jobs.values():
+            if job.id == job_id:
+                return ahead if job.status == PENDING else 0
+            if job.status == PENDING:
+                ahead += 1
+        return 0
+
+    def cancel(self, job_id: str) -> bool:
+        """取消任务
+
+        Returns:
+            bool: 任务存在且尚未结束时返回True
+        """
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+        if job.task is not None:
+            job.task.cancel()
+        job._finish(CANCELLED)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        counts = {state: 0 for state in (PENDING, RUNNING, *FINISHED_STATES)}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    async def close(self):
+        """取消所有未完成的任务并停止工作任务"""
+        for job in list(self._jobs.values()):
+            self.cancel(job.id)
+        workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.cancel()
+        for worker in workers:
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        self._queue = None
+
+    async def _worker(self):
+        """依次执行队列中的任务"""
+        while True:
+            job = await self._queue.get()
+            if job.status != PENDING:
+                # 排队期间已被取消
+                continue
+            job.status = RUNNING
+            job.started_at = time.time()
+            job.task = asyncio.ensure_future(job.fn())
+            try:
+                result = await job.task
+            except asyncio.CancelledError:
+                if not job.task.cancelled():
+                    # 工作任务本身被取消（关闭队列）
+                    job.task.cancel()
+                    raise
+                if not job.finished:
+                    job._finish(CANCELLED)
+            except Exception as e:
+                print(f"Job {job.id} failed: {e}", file=sys.stderr)
+                job._finish(FAILED, error=str(e))
+            else:
+                if not job.finished:
+                    job._finish(DONE, result=result)
+            finally:
+                job.task = None
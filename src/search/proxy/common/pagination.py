@@ -0,0 +1,143 @@
+"""Automatic pagination for engines with a per-request result limit
+
+Search APIs cap the number of results per request. To return more, the
+required pages are fetched with bounded concurrency (each request still waits
+for the engine's rate limiter) and yielded in page order. Pagination stops
+early when a page reports that no more results are available, and pages that
+are no longer needed are cancelled. Results are deduplicated in rank order.
+When a page after the first fails, the results collected so far are returned
+together with the error so that callers can mark them as incomplete.
+"""
+
+import asyncio
+import sys
+from collections import deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Hashable, Iterable, List, Optional, Tuple
+
+# 获取一页的函数：参数为页码，返回(本页结果, 是否还有后续结果)
+PageFetch = Callable[[int], Awaitable[Tuple[List[Any], bool]]]
+
+def plan_pages(
+    first_result: int,
+    count: int,
+    page_size: int,
+    max_pages: Optional[int] = None
+) -> Tuple[range, int]:
+    """计算覆盖第first_result条起的count条结果所需的页
+
+    Args:
+        first_result: 第一条结果的位置(从0开始)
+        count: 结果数
+        page_size: 每页结果数
+        max_pages: 接口允许的页数（页码从0开始时为最大页码+1），None表示不限制
+
+    Returns:
+        Tuple[range, int]: (页码范围(从0开始), 第一页中需要跳过的结果数)
+
+    Raises:
+        ValueError: 第一条结果超出接口允许的分页范围
+    """
+    first_page, skip = divmod(first_result, page_size)
+    last_page = (first_result + count - 1) // page_size
+    if max_pages is not None:
+        if first_page >= max_pages:
+            raise ValueError(f"分页超出范围，最多只能获取前{max_pages * page_size}条结果")
+        last_page = min(last_page, max_pages - 1)
+    return range(first_page, last_page + 1), skip
+
+def _consume_exception(task: asyncio.Task):
+    """已取消等待的页请求失败时，避免"Task exception was never retrieved"警告"""
+    if not task.cancelled():
+        task.exception()
+
+async def iter_pages(
+    fetch_page: PageFetch,
+    pages: Iterable[int],
+    concurrency: int = 1,
+    skip: int = 0
+) -> AsyncIterator[List[Any]]:
+    """按页码顺序逐页产出结果
+
+    最多同时请求concurrency页，concurrency为1时只在调用方取下一页时才请求。
+    某页表示没有后续结果时停止，调用方提前结束迭代时取消未完成的请求。
+
+    Args:
+        fetch_page: 获取一页的函数
+        pages: 页码序列
+        concurrency: 同时请求的页数
+        skip: 第一页中需要跳过的结果数
+
+    Yields:
+        List: 每页的结果
+    """
+    pending = iter(pages)
+    tasks: Deque[asyncio.Task] = deque()
+
+    def schedule(limit: int):
+        while len(tasks) < limit:
+            page = next(pending, None)
+            if page is None:
+                return
+            task = asyncio.ensure_future(fetch_page(page))
+            task.add_done_callback(_consume_exception)
+            tasks.append(task)
+
+    try:
+        schedule(max(concurrency, 1))
+        while tasks:
+            results, has_more = await tasks.popleft()
+            if skip:
+                results, skip = results[skip:], 0
+            if not has_more:
+                yield results
+                return
+            # 调用方处理本页期间最多预取concurrency-1页
+            schedule(concurrency - 1)
+            yield results
+            schedule(max(concurrency, 1))
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def collect_results(
+    pages: AsyncIterator[List[Any]],
+    count: int,
+    key: Callable[[Any], Hashable]
+) -> Tuple[List[Any], Optional[Exception]]:
+    """按排名顺序收集并去重，收集到count条后停止
+
+    第一页之后的请求失败时返回已收集的结果和该异常，调用方需把结果标记为不完整（不写入缓存）。
+
+    Args:
+        pages: iter_pages返回的迭代器
+        count: 需要的结果数
+        key: 去重键
+
+    Returns:
+        Tuple[List, Optional[Exception]]: (去重后的结果, 提前停止时的异常，结果完整时为None)
+
+    Raises:
+        Exception: 第一页请求失败时的异常
+    """
+    results: List[Any] = []
+    seen = set()
+    first = True
+    try:
+        async for page in pages:
+            first = False
+            for item in page:
+                item_key = key(item)
+                if item_key in seen:
+                    continue
+                seen.add(item_key)
+                results.append(item)
+                if len(results) >= count:
+                    return results, None
+    except Exception as e:
+        if first:
+            raise
+        print(f"Pagination stopped early: {e}", file=sys.stderr)
+        return results, e
+    finally:
+        await pages.aclose()
+    return results, None
@@ -0,0 +1,154 @@
+"""Shared asyncio token-bucket rate limiter
+
+Callers await a permit instead of failing immediately, so bursty traffic is
+smoothed out to the allowed rate. Each limiter combines per-second, per-minute
+and per-month buckets; a permit is only granted when every bucket has a token.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+# 各时间窗口对应的秒数
+PERIODS: Dict[str, float] = {
+    "per_second": 1,
+    "per_minute": 60,
+    "per_month": 30 * 24 * 3600
+}
+
+class RateLimitTimeout(Exception):
+    """在最长等待时间内无法获得许可"""
+    pass
+
+class TokenBucket:
+    """令牌桶
+
+    容量为capacity，每period秒匀速补满。
+    """
+
+    def __init__(self, capacity: int, period: float):
+        """初始化令牌桶
+
+        Args:
+            capacity: 桶容量（窗口内允许的请求数）
+            period: 补满整个桶所需的秒数
+        """
+        self.capacity = float(capacity)
+        self.rate = capacity / period
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        """按流逝的时间补充令牌"""
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def available(self, now: Optional[float] = None) -> float:
+        """当前可用的令牌数"""
+        self._refill(time.monotonic() if now is None else now)
+        return self._tokens
+
+    def wait_time(self, now: float) -> float:
+        """距离下一个可用令牌还需等待的秒数"""
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    def consume(self) -> None:
+        """消耗一个令牌"""
+        self._tokens -= 1
+
+class RateLimiter:
+    """多窗口令牌桶限流器
+
+    请求按到达顺序排队等待许可（FIFO）。
+    """
+
+    def __init__(
+        self,
+        per_second: Optional[int] = None,
+        per_minute: Optional[int] = None,
+        per_month: Optional[int] = None
+    ):
+        """初始化限流器
+
+        Args:
+            per_second: 每秒允许的请求数
+            per_minute: 每分钟允许的请求数
+            per_month: 每月允许的请求数
+        """
+        limits = {
+            "per_second": per_second,
+            "per_minute": per_minute,
+            "per_month": per_month
+        }
+        self._buckets: List[TokenBucket] = [
+            TokenBucket(limit, PERIODS[name])
+            for name, limit in limits.items() if limit
+        ]
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, int]) -> "RateLimiter":
+        """根据RATE_LIMIT配置字典创建限流器
+
+        Args:
+            config: 形如 {"per_second": 1, "per_minute": 60} 的配置
+
+        Returns:
+            RateLimiter: 限流器实例
+        """
+        unknown = set(config) - set(PERIODS)
+        if unknown:
+            raise ValueError(f"不支持的速率限制配置: {sorted(unknown)}")
+        return cls(**config)
+
+    def _get_lock(self) -> asyncio.Lock:
+        """获取绑定到当前事件循环的排队锁"""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def headroom(self) -> float:
+        """当前可立即发出的请求数（各窗口可用令牌的最小值）"""
+        if not self._buckets:
+            return float("inf")
+        now = time.monotonic()
+        return min(bucket.available(now) for bucket in self._buckets)
+
+    async def acquire(self, max_wait: Optional[float] = None) -> None:
+        """等待并获取一个请求许可
+
+        Args:
+            max_wait: 最长等待秒数，None表示一直等待
+
+        Raises:
+            RateLimitTimeout: 在max_wait内无法获得许可
+        """
+        start = time.monotonic()
+        lock = self._get_lock()
+        try:
+            await asyncio.wait_for(lock.acquire(), timeout=max_wait)
+        except asyncio.TimeoutError:
+            raise RateLimitTimeout(f"等待超过{max_wait}秒")
+
+        try:
+            while True:
+                now = time.monotonic()
+                wait = max((bucket.wait_time(now) for bucket in self._buckets), default=0.0)
+                if wait <= 0:
+                    for bucket in self._buckets:
+                        bucket.consume()
+                    return
+                # 等待时间超出期限时立即失败，不再占用队列
+                if max_wait is not None and now + wait - start > max_wait:
+                    raise RateLimitTimeout(f"需要等待{wait:.1f}秒，超过{max_wait}秒")
+                await asyncio.sleep(wait)
+        finally:
+            lock.release()
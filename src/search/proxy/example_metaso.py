@@ -64,8 +64,8 @@ async def verify_credentials(uid: str, sid: str) -> bool:
     """
     try:
         async with MetasoClient(uid, sid) as client:
-            # 尝试获取 meta token
-            await client._get_meta_token()
+            # 尝试获取 meta token 和 cookies（优先使用持久化的缓存，失效时通过浏览器重新获取）
+            await client._get_credentials()
             return True
     except MetasoException as e:
         logger.error(f"凭证验证失败: {e}")
@@ -0,0 +1,169 @@
+"""
+秘塔AI浏览器管理器
+
+浏览器只启动一次并在多次调用间复用；浏览器崩溃或被关闭后，
+下一次使用时会自动重新启动。
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import asyncio
+import sys
+from typing import Optional
+from playwright.async_api import async_playwright, Playwright, BrowserContext, Page
+from .constants import BASE_URL, FAKE_HEADERS
+from .resource_policy import ResourcePolicy
+
+# 隐藏webdriver特征
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => false,
+    });
+    window.navigator.chrome = {
+        runtime: {}
+    };
+    delete navigator.__proto__.webdriver;
+"""
+
+# 浏览器启动参数
+BROWSER_ARGS = [
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--hide-scrollbars",
+    "--mute-audio",
+    "--disable-gpu",
+    "--disable-web-security",
+    "--process-per-tab"
+]
+
+class MetasoBrowser:
+    """长期运行的浏览器管理器"""
+
+    def __init__(
+        self,
+        uid: str,
+        sid: str,
+        browser_data_dir: str,
+        resource_policy: Optional[ResourcePolicy] = None
+    ):
+        """初始化管理器
+
+        Args:
+            uid: 用户ID
+            sid: 会话ID
+            browser_data_dir: 浏览器数据目录
+            resource_policy: 资源拦截策略，为None时不拦截
+        """
+        self._uid = uid
+        self._sid = sid
+        self._browser_data_dir = browser_data_dir
+        self.resource_policy = resource_policy
+        self._playwright: Optional[Playwright] = None
+        self._context: Optional[BrowserContext] = None
+        self._alive = False
+        self._lock = asyncio.Lock()
+        self.generation = 0  # 每次(重新)启动后递增，用于让依赖方感知重启
+        self.restarts = 0
+
+    @property
+    def is_alive(self) -> bool:
+        """浏览器是否在运行"""
+        return self._alive
+
+    @property
+    def context(self) -> Optional[BrowserContext]:
+        """当前的浏览器上下文"""
+        return self._context
+
+    async def ensure_started(self) -> BrowserContext:
+        """确保浏览器已启动，崩溃后自动重启
+
+        Returns:
+            BrowserContext: 可用的浏览器上下文
+        """
+        if self._alive:
+            return self._context
+
+        async with self._lock:
+            if not self._alive:
+                if self._playwright or self._context:
+                    # 之前的浏览器已崩溃或被关闭，清理后重启
+                    print("Metaso browser is gone, restarting", file=sys.stderr)
+                    await self._shutdown()
+                    self.restarts += 1
+                await self._launch()
+        return self._context
+
+    async def new_page(self) -> Page:
+        """在当前上下文中新建页面
+
+        Returns:
+            Page: 新页面
+        """
+        context = await self.ensure_started()
+        return await context.new_page()
+
+    async def close(self):
+        """关闭浏览器并停止playwright"""
+        async with self._lock:
+            await self._shutdown()
+
+    async def _launch(self):
+        """启动playwright和持久化浏览器上下文"""
+        self._playwright = await async_playwright().start()
+        try:
+            self._context = await self._playwright.chromium.launch_persistent_context(
+                self._browser_data_dir,
+                headless=True,
+                ignore_https_errors=True,
+                user_agent=FAKE_HEADERS["User-Agent"],
+                viewport=None,
+                args=BROWSER_ARGS
+            )
+            self._context.on("close", self._on_close)
+
+            await self._context.add_init_script(STEALTH_SCRIPT)
+            await self._context.set_extra_http_headers(FAKE_HEADERS)
+            await self._context.add_cookies([
+                {
+                    "name": "uid",
+                    "value": self._uid,
+                    "url": BASE_URL
+                },
+                {
+                    "name": "sid",
+                    "value": self._sid,
+                    "url": BASE_URL
+                }
+            ])
+            if self.resource_policy:
+                await self.resource_policy.install(self._context)
+        except Exception:
+            await self._shutdown()
+            raise
+
+        self._alive = True
+        self.generation += 1
+
+    def _on_close(self, _context: BrowserContext):
+        """浏览器上下文关闭（含崩溃）时标记为不可用"""
+        self._alive = False
+
+    async def _shutdown(self):
+        """释放上下文和playwright句柄"""
+        self._alive = False
+        context, self._context = self._context, None
+        playwright, self._playwright = self._playwright, None
+        try:
+            if context:
+                await context.close()
+        except Exception as e:
+            print(f"Error closing browser context: {e}", file=sys.stderr)
+        try:
+            if playwright:
+                await playwright.stop()
+        except Exception as e:
+            print(f"Error stopping playwright: {e}", file=sys.stderr)
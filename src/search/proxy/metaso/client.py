@@ -5,141 +5,202 @@
 网站: AI全书（https://aibook.ren）
 """
 
-from typing import AsyncGenerator, Optional, Dict, Any, List
-from playwright.async_api import async_playwright, Page, CDPSession, Browser, BrowserContext
+from typing import AsyncGenerator, Awaitable, Callable, Optional, Dict, Tuple
+from playwright.async_api import Page
 import asyncio
-import json
+import os
+import sys
 import time
-import re
 from .constants import *
 from .exceptions import *
 from .response_handler import MetasoResponseHandler
+from .browser import MetasoBrowser
+from .page_pool import PagePool, PooledPage
+from .lifecycle import BrowserRecycler
+from .dispatcher import FetchDispatcher
+from .sse import SSEDecoder
+from .http_transport import MetasoHttpTransport
+from .resource_policy import ResourcePolicy
+from .token_cache import MetaTokenCache
+from .conversations import ConversationStore
+from ..common import RateLimiter
+from .config import (
+    PAGE_POOL_SIZE, STREAM_READ_SIZE, TRANSPORT, TOKEN_TTL,
+    TOKEN_REFRESH_MARGIN, TOKEN_VALIDATE_INTERVAL, BLOCK_RESOURCES,
+    BLOCKED_RESOURCE_TYPES, BLOCKED_URL_PATTERNS, ALLOWED_URL_PATTERNS,
+    RATE_LIMIT, RATE_LIMIT_MAX_WAIT, CONVERSATION_MAX, CONVERSATION_TTL, PAGE_MAX_USES, PAGE_MAX_AGE, BROWSER_MAX_QUERIES, BROWSER_MAX_AGE,
+    BROWSER_MAX_RSS_MB, PROFILE_CACHE_MAX_MB, LIFECYCLE_CHECK_INTERVAL,
+    check_rate_limit
+)
+
+# 内容片段回调
+ChunkCallback = Callable[[str], Awaitable[None]]
 
 class MetasoClient:
     """秘塔AI客户端"""
     
-    def __init__(self, uid: str, sid: str, browser_data_dir: str = "tmp/browser"):
+    def __init__(
+        self,
+        uid: str,
+        sid: str,
+        browser_data_dir: str = "tmp/browser",
+        page_pool_size: int = PAGE_POOL_SIZE,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
         """初始化客户端
         
         Args:
             uid: 用户ID
             sid: 会话ID
             browser_data_dir: 浏览器数据目录，默认为 "tmp/browser"
+            page_pool_size: 页面池大小，即同时进行的最大查询数
+            rate_limiter: 该账号的速率限制器，默认按RATE_LIMIT为该客户端新建
         """
         self._uid = uid
         self._sid = sid
         self._browser_data_dir = browser_data_dir
-        self._browser: Optional[Browser] = None
-        self._context: Optional[BrowserContext] = None
-        self._page: Optional[Page] = None
-        self._client: Optional[CDPSession] = None
-        self._meta_token: Optional[str] = None
-        self._response_handler = MetasoResponseHandler()
+        self._rate_limiter = rate_limiter or RateLimiter.from_config(RATE_LIMIT)
+        resource_policy = ResourcePolicy(
+            BLOCKED_RESOURCE_TYPES, BLOCKED_URL_PATTERNS, ALLOWED_URL_PATTERNS
+        ) if BLOCK_RESOURCES else None
+        self._browser = MetasoBrowser(uid, sid, browser_data_dir, resource_policy)
+        self._pool = PagePool(
+            self._browser,
+            page_pool_size,
+            self._setup_page,
+            max_uses=PAGE_MAX_USES,
+            max_age=PAGE_MAX_AGE
+        )
+        self._recycler = BrowserRecycler(
+            self._browser,
+            self._pool,
+            browser_data_dir,
+            max_queries=BROWSER_MAX_QUERIES,
+            max_age=BROWSER_MAX_AGE,
+            max_rss_mb=BROWSER_MAX_RSS_MB,
+            profile_max_mb=PROFILE_CACHE_MAX_MB,
+            check_interval=LIFECYCLE_CHECK_INTERVAL
+        )
+        self._http = MetasoHttpTransport()
+        self._conversations = ConversationStore(CONVERSATION_MAX, CONVERSATION_TTL)
+        self._token_cache = MetaTokenCache(
+            os.path.join(browser_data_dir, TOKEN_CACHE_FILE),
+            uid,
+            fetch=self._fetch_credentials,
+            validate=self._http.check_token,
+            ttl=TOKEN_TTL,
+            refresh_margin=TOKEN_REFRESH_MARGIN,
+            validate_interval=TOKEN_VALIDATE_INTERVAL
+        )
         
     async def __aenter__(self):
         """异步上下文管理器入口"""
-        await self._init_browser()
+        await self.start()
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """异步上下文管理器出口"""
         await self.close()
         
+    async def start(self):
+        """启动浏览器并准备一个页面
+        
+        可重复调用：浏览器已就绪时直接返回，浏览器崩溃后会重新启动。
+        """
+        self._recycler.start()
+        if self._browser.is_alive:
+            return
+        await self._pool.release(await self._pool.acquire())
+        
+    async def prewarm(self, pages: int = 1):
+        """预热：启动浏览器、打开若干页面并准备好meta token
+        
+        Args:
+            pages: 预热的页面数
+        """
+        self._recycler.start()
+        await self._browser.ensure_started()
+        await self._pool.warm(pages)
+        await self._get_credentials()
+        
     async def close(self):
         """关闭客户端"""
+        await self._token_cache.stop()
+        await self._recycler.stop()
         try:
-            if self._client:
-                await self._client.detach()
-                self._client = None
-            if self._page:
-                await self._page.close()
-                self._page = None
-            if self._context:
-                await self._context.close()
-                self._context = None
-            if self._browser:
-                await self._browser.close()
-                self._browser = None
+            await self._pool.close()
         except Exception as e:
-            print(f"Error during cleanup: {e}")
+            print(f"Error during cleanup: {e}", file=sys.stderr)
+        await self._browser.close()
+        
+    async def _get_credentials(self) -> Tuple[str, Dict[str, str]]:
+        """获取缓存的meta token和cookies，缓存失效时才需要浏览器
+        
+        Returns:
+            Tuple[str, Dict[str, str]]: meta token和metaso.cn的cookies
+        """
+        token, cookies = await self._token_cache.get()
+        cookies.setdefault("uid", self._uid)
+        cookies.setdefault("sid", self._sid)
+        return token, cookies
+        
+    async def _fetch_credentials(self) -> Tuple[str, Dict[str, str]]:
+        """用浏览器加载首页获取新的meta token和cookies"""
+        async with self._pool.page() as slot:
+            # 借到的是新建的页面时，初始化已加载首页并读取了token，无需再次加载
+            token = slot.meta_token or await self._get_meta_token(slot.page)
+            return token, await self._get_browser_cookies()
             
-    async def _init_browser(self):
-        """初始化浏览器"""
-        playwright = await async_playwright().start()
-        self._context = await playwright.chromium.launch_persistent_context(
-            self._browser_data_dir,
-            headless=True,
-            ignore_https_errors=True,
-            user_agent=FAKE_HEADERS["User-Agent"],
-            viewport=None,
-            args=[
-                "--no-sandbox",
-                "--disable-setuid-sandbox", 
-                "--disable-dev-shm-usage",
-                "--disable-extensions",
-                "--hide-scrollbars",
-                "--mute-audio",
-                "--disable-gpu",
-                "--disable-web-security",
-                "--process-per-tab"
-            ]
-        )
-        self._page = await self._context.new_page()
-        
-        # 隐藏webdriver特征
-        await self._page.add_init_script("""
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => false,
-            });
-            window.navigator.chrome = {
-                runtime: {}
-            };
-            delete navigator.__proto__.webdriver;
-        """)
-        
-        # 设置User-Agent
-        await self._page.set_extra_http_headers(FAKE_HEADERS)
-        
-        # 设置cookies
-        await self._context.add_cookies([
-            {
-                "name": "uid", 
-                "value": self._uid,
-                "url": "https://metaso.cn"
-            },
-            {
-                "name": "sid", 
-                "value": self._sid,
-                "url": "https://metaso.cn"
-            }
-        ])
+    async def _get_browser_cookies(self) -> Dict[str, str]:
+        """读取浏览器中metaso.cn的cookies"""
+        return {
+            cookie["name"]: cookie["value"]
+            for cookie in await self._browser.context.cookies(BASE_URL)
+        }
+        
+    async def _get_page_token(self, page: Page) -> str:
+        """浏览器路径获取meta token：缓存失效时用已借到的页面刷新，避免再占用一个页面"""
+        if self._token_cache.is_fresh():
+            return self._token_cache.token
+        token = await self._get_meta_token(page)
+        self._token_cache.update(token, await self._get_browser_cookies())
+        return token
         
+    def _invalidate_token(self):
+        """token失效时标记，下次调用时重新获取"""
+        self._token_cache.invalidate()
+        
+    async def _setup_page(self, pooled: PooledPage):
+        """初始化池中的新页面：创建CDP会话并打开首页"""
         # 创建CDP会话
-        self._client = await self._page.context.new_cdp_session(self._page)
-        await self._client.send("Fetch.enable", {
+        pooled.cdp = await pooled.page.context.new_cdp_session(pooled.page)
+        await pooled.cdp.send("Fetch.enable", {
             "patterns": [{
                 "urlPattern": "https://metaso.cn/api/searchV2*",
                 "requestStage": "Response"
             }]
         })
+        pooled.dispatcher = FetchDispatcher(pooled.cdp)
         
-        # 获取初始meta token
-        self._meta_token = await self._get_meta_token()
+        # 打开首页，使页面处于metaso.cn同源环境，并读取token供本次借用复用；token缓存失效时顺带更新
+        pooled.meta_token = await self._get_meta_token(pooled.page)
+        if not self._token_cache.is_fresh():
+            self._token_cache.update(pooled.meta_token, await self._get_browser_cookies())
 
-    async def _get_meta_token(self) -> str:
+    async def _get_meta_token(self, page: Page) -> str:
         """获取meta token
         
+        Args:
+            page: 用于加载首页的页面
+            
         Returns:
             str: meta token
         """
-        if self._meta_token:
-            return self._meta_token
-            
         # 导航到首页
-        await self._page.goto(BASE_URL)
+        await page.goto(BASE_URL)
         
         # 等待meta-token元素加载，不要求可见
-        meta_token_element = await self._page.wait_for_selector('meta#meta-token', state='attached')
+        meta_token_element = await page.wait_for_selector('meta#meta-token', state='attached')
         if not meta_token_element:
             raise MetasoException(*API_REQUEST_FAILED)
             
@@ -150,10 +211,12 @@ class MetasoClient:
             
         return meta_token
         
-    async def _create_conversation(self, content: str, model: str = DEFAULT_MODEL) -> str:
+    async def _create_conversation(self, page: Page, token: str, content: str, model: str = DEFAULT_MODEL) -> str:
         """创建会话
         
         Args:
+            page: 用于发送请求的页面
+            token: meta token
             content: 对话内容
             model: 模型名称,默认为detail
             
@@ -163,7 +226,7 @@ class MetasoClient:
         headers = {
             **FAKE_HEADERS,
             'Content-Type': 'application/json',
-            'Token': self._meta_token,
+            'Token': token,
             'Is-Mini-Webview': '0',
             'Cookie': f'uid={self._uid}; sid={self._sid}',
             'Origin': 'https://metaso.cn',
@@ -220,132 +283,283 @@ class MetasoClient:
             "data": data
         }
         
-        response = await self._page.evaluate(js_code, args)
+        response = await page.evaluate(js_code, args)
         
         # 检查响应
         if not response:
             raise MetasoException(*API_REQUEST_FAILED)
             
         if 'data' not in response or 'id' not in response['data']:
-            print(f"Response missing id: {response}")
+            print(f"Response missing id: {response}", file=sys.stderr)
             raise MetasoException(*API_REQUEST_FAILED)
             
         return response['data']['id']
         
-    async def get_completion(self, content: str, model: str = DEFAULT_MODEL) -> Dict:
+    async def get_completion(
+        self,
+        content: str,
+        model: str = DEFAULT_MODEL,
+        on_chunk: Optional[ChunkCallback] = None,
+        deadline: Optional[float] = None,
+        conversation_id: Optional[str] = None
+    ) -> Dict:
         """非流式对话
         
+        优先通过HTTP直接请求，失败时回退到浏览器拦截方式。
+        
         Args:
             content: 对话内容
             model: 使用的模型名称
+            on_chunk: 每收到一段回答内容时调用的回调，用于向调用方转发进度
+            deadline: 本次调用的时间预算(秒)，到期时中止响应流并返回已收到的部分内容，
+                结果中的partial为True
+            conversation_id: 要继续的会话ID（之前结果meta中的conversation_id），
+                为None时创建新会话
             
         Returns:
             Dict: 包含处理后的完整响应
         """
-        try:
-            # 创建新的响应处理器实例
-            self._response_handler = MetasoResponseHandler()
-            
-            # 创建会话
-            conv_id = await self._create_conversation(content, model)
-            
-            # 构造搜索URL
-            search_url = f"{BASE_URL}/search/{conv_id}?q={content}"
-            
-            # 创建队列和事件
-            queue = asyncio.Queue()
-            response_event = asyncio.Event()
+        conversation = None
+        if conversation_id:
+            conversation = self._conversations.get(conversation_id)
+            if conversation is None:
+                raise MetasoException(*API_CONVERSATION_NOT_FOUND)
+                
+        deadline_at = asyncio.get_running_loop().time() + deadline if deadline else None
+        await check_rate_limit(
+            self._rate_limiter,
+            max(0.0, min(RATE_LIMIT_MAX_WAIT, self._time_left(deadline_at, RATE_LIMIT_MAX_WAIT)))
+        )
+        
+        if conversation is None:
+            result = await self._complete(content, model, on_chunk, deadline_at)
+        else:
+            # 同一会话的追问串行执行
+            async with conversation.lock:
+                result = await self._complete(content, model, on_chunk, deadline_at, conversation.id)
+        self._conversations.add(result["meta"]["conversation_id"], model)
+        return result
+        
+    async def _complete(
+        self,
+        content: str,
+        model: str,
+        on_chunk: Optional[ChunkCallback],
+        deadline_at: Optional[float],
+        conv_id: Optional[str] = None
+    ) -> Dict:
+        """按配置的传输方式获取完整响应，conv_id不为None时在已有会话中追问"""
+        if TRANSPORT == "http":
+            forwarded = False
             
-            # 定义元信息
-            meta_info = {
-                "model": model,
-                "conversation_id": conv_id,
-                "query": content,
-                "timestamp": int(time.time())
-            }
+            async def forward(chunk: str):
+                nonlocal forwarded
+                forwarded = True
+                await on_chunk(chunk)
+                
+            try:
+                return await self._get_completion_http(
+                    content, model, forward if on_chunk else None, deadline_at, conv_id
+                )
+            except Exception as e:
+                if isinstance(e, MetasoException) and e.code in (
+                    API_DEADLINE_EXCEEDED[0], API_ACCOUNT_THROTTLED[0]
+                ):
+                    # 截止时间已到或账号被限流时，回退到浏览器也无济于事
+                    raise
+                if forwarded:
+                    # 已经转发过部分内容，回退会让调用方收到重复内容
+                    print(f"Error in get_completion: {e}", file=sys.stderr)
+                    raise MetasoException(*API_REQUEST_FAILED)
+                if self._time_left(deadline_at) <= 0:
+                    raise MetasoException(*API_DEADLINE_EXCEEDED)
+                print(f"HTTP transport failed, falling back to browser: {e}", file=sys.stderr)
+                
+        return await self._get_completion_browser(content, model, on_chunk, deadline_at, conv_id)
+        
+    def has_conversation(self, conversation_id: str) -> bool:
+        """会话是否由本客户端创建且未过期"""
+        return self._conversations.get(conversation_id) is not None
+        
+    def _time_left(self, deadline_at: Optional[float], default: float = RESPONSE_TIMEOUT) -> float:
+        """距截止时间的剩余秒数，未设置截止时间时返回默认值"""
+        if deadline_at is None:
+            return default
+        return deadline_at - asyncio.get_running_loop().time()
+        
+    def _deadline_result(self, handler: Optional[MetasoResponseHandler], meta_info: Optional[Dict]) -> Dict:
+        """截止时间到达时，用已收到的内容构建部分结果"""
+        if handler is None or meta_info is None or not (handler.content or handler.references):
+            raise MetasoException(*API_DEADLINE_EXCEEDED)
+        result = self._build_result(handler, meta_info)
+        result["partial"] = True
+        return result
+        
+    async def _get_completion_http(
+        self,
+        content: str,
+        model: str,
+        on_chunk: Optional[ChunkCallback] = None,
+        deadline_at: Optional[float] = None,
+        conv_id: Optional[str] = None
+    ) -> Dict:
+        """通过HTTP传输获取完整响应"""
+        handler = MetasoResponseHandler()
+        meta_info = None
+        
+        async def run():
+            nonlocal meta_info, conv_id
+            token, cookies = await self._get_credentials()
+            try:
+                if conv_id is None:
+                    conv_id = await self._http.create_conversation(token, cookies, content, model)
+                meta_info = self._make_meta_info(model, conv_id, content)
+                
+                async def consume():
+                    async for event_data in self._http.stream_search(
+                        token, cookies, conv_id, content, model, read_size=STREAM_READ_SIZE
+                    ):
+                        cleaned = handler.clean_response(event_data)
+                        if cleaned and on_chunk:
+                            await on_chunk(cleaned)
+                        
+                await asyncio.wait_for(consume(), timeout=RESPONSE_TIMEOUT if deadline_at is None else None)
+            except MetasoException as e:
+                if e.code == API_TOKEN_EXPIRES[0]:
+                    self._invalidate_token()
+                raise
+                
+        if deadline_at is None:
+            await run()
+        else:
+            try:
+                # 超时会取消run()，退出stream上下文时关闭响应，即中止上游的流
+                await asyncio.wait_for(run(), timeout=self._time_left(deadline_at))
+            except asyncio.TimeoutError:
+                return self._deadline_result(handler, meta_info)
+                
+        return self._build_result(handler, meta_info)
+        
+    async def _get_completion_browser(
+        self,
+        content: str,
+        model: str,
+        on_chunk: Optional[ChunkCallback] = None,
+        deadline_at: Optional[float] = None,
+        conv_id: Optional[str] = None
+    ) -> Dict:
+        """通过浏览器导航并拦截searchV2获取完整响应"""
+        handler = None
+        meta_info = None
+        
+        async def run():
+            nonlocal handler, meta_info, conv_id
+            await self.start()
             
-            async def handle_response(event):
-                try:
-                    request_id = event["requestId"]
+            try:
+                # 从页面池借用页面，每个查询使用独立的响应处理器
+                async with self._pool.page() as slot:
+                    handler = slot.reset_handler()
+                    
+                    # 创建会话，追问时复用已有会话
+                    if conv_id is None:
+                        token = await self._get_page_token(slot.page)
+                        conv_id = await self._create_conversation(slot.page, token, content, model)
+                    
+                    # 构造搜索URL
+                    search_url = f"{BASE_URL}/search/{conv_id}?q={content}"
+                    
+                    # 创建队列和事件
+                    queue = asyncio.Queue()
+                    response_event = asyncio.Event()
+                    
+                    # 定义元信息
+                    meta_info = self._make_meta_info(model, conv_id, content)
+                    
+                    # 按会话ID接收本查询的响应流
+                    slot.dispatcher.register(
+                        conv_id,
+                        self._make_stream_consumer(slot, handler, queue, response_event)
+                    )
                     
-                    # 获取响应流
-                    stream_result = await self._client.send("Fetch.takeResponseBodyAsStream", {"requestId": request_id})
-                    stream_handle = stream_result["stream"]
-                    if not stream_handle:
-                        return
-                        
                     try:
-                        buffer = ""
-                        while True:
-                            read_result = await self._client.send("IO.read", {"handle": stream_handle, "size": 256})
-                            if not read_result:
-                                break
-                                
-                            data = read_result.get("data")
-                            eof = read_result.get("eof")
-                            
-                            if data:
-                                buffer += data
-                                # 按data:分割处理
-                                parts = buffer.split("data:")
-                                # 处理完整的部分
-                                for part in parts[:-1]:
-                                    if part.strip():
-                                        cleaned = self._response_handler.clean_response(f"data:{part}")
-                                        if cleaned:
-                                            await queue.put(cleaned)
-                                # 保留最后一个可能不完整的部分        
-                                buffer = "data:" + parts[-1] if parts else ""
-                            
-                            if eof:
-                                # 处理剩余数据
-                                if buffer.strip():
-                                    cleaned = self._response_handler.clean_response(buffer)
-                                    if cleaned:
-                                        await queue.put(cleaned)
-                                break
-                                
-                    except Exception as e:
-                        print(f"Error reading stream: {e}")
+                        # 导航到搜索页面
+                        await slot.page.goto(search_url)
+                        # 等待响应完成，期间转发内容片段
+                        await asyncio.wait_for(
+                            self._forward_chunks(queue, response_event, on_chunk),
+                            timeout=RESPONSE_TIMEOUT if deadline_at is None else None
+                        )
+                        
                     finally:
-                        await self._client.send("IO.close", {"handle": stream_handle})
-                        response_event.set()
-                    
-                except Exception as e:
-                    print(f"Error processing response: {e}")
-                    response_event.set()
+                        # 取消注册
+                        slot.dispatcher.unregister(conv_id)
+                        
+                    # 构建返回结果
+                    return self._build_result(handler, meta_info)
                     
-            # 监听响应
-            self._client.on("Fetch.requestPaused", handle_response)
-            
-            try:
-                # 导航到搜索页面
-                await self._page.goto(search_url)
-                # 等待响应完成
-                await asyncio.wait_for(response_event.wait(), timeout=30)
-                
-            finally:
-                # 移除监听器
-                self._client.remove_listener("Fetch.requestPaused", handle_response)
+            except Exception as e:
+                print(f"Error in get_completion: {e}", file=sys.stderr)
+                raise MetasoException(*API_REQUEST_FAILED)
                 
-            # 构建返回结果
-            result = {
-                "content": self._response_handler.content,
-                "references": self._response_handler.references,
-                "images": self._response_handler.images,
-                "tables": self._response_handler.tables,
-                "recommended_questions": self._response_handler.recommended_questions,
-                "highlights": self._response_handler.highlights,
-                "query_info": self._response_handler.query_info,
-                "markdown": self._response_handler.format_markdown({}),
-                "meta": meta_info
-            }
+        if deadline_at is None:
+            return await run()
+        try:
+            # 超时会取消run()，页面被丢弃并关闭，拦截中的响应流随之中止
+            return await asyncio.wait_for(run(), timeout=self._time_left(deadline_at))
+        except asyncio.TimeoutError:
+            return self._deadline_result(handler, meta_info)
             
-            return result
+    async def _forward_chunks(
+        self,
+        queue: asyncio.Queue,
+        response_event: asyncio.Event,
+        on_chunk: Optional[ChunkCallback]
+    ):
+        """等待响应流读取结束，期间把队列中的内容片段转发给回调"""
+        if on_chunk is None:
+            await response_event.wait()
+            return
             
-        except Exception as e:
-            print(f"Error in get_completion: {e}")
-            raise MetasoException(*API_REQUEST_FAILED)
+        finished = asyncio.ensure_future(response_event.wait())
+        getter = None
+        try:
+            while True:
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter, finished}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    break
+                await on_chunk(getter.result())
+            # 消费者先写入全部片段再设置事件，剩余片段直接取出
+            while not queue.empty():
+                await on_chunk(queue.get_nowait())
+        finally:
+            finished.cancel()
+            if getter is not None:
+                getter.cancel()
+            
+    def _make_meta_info(self, model: str, conv_id: str, content: str) -> Dict:
+        """构造响应元信息"""
+        return {
+            "model": model,
+            "conversation_id": conv_id,
+            "query": content,
+            "timestamp": int(time.time())
+        }
+        
+    def _build_result(self, handler: MetasoResponseHandler, meta_info: Dict) -> Dict:
+        """根据响应处理器构建返回结果"""
+        return {
+            "content": handler.content,
+            "references": handler.references,
+            "images": handler.images,
+            "tables": handler.tables,
+            "recommended_questions": handler.recommended_questions,
+            "highlights": handler.highlights,
+            "query_info": handler.query_info,
+            "markdown": handler.format_markdown({}),
+            "meta": meta_info
+        }
         
     async def get_completion_stream(self, content: str, model: str = DEFAULT_MODEL) -> AsyncGenerator[str, None]:
         """获取流式补全
@@ -357,91 +571,146 @@ class MetasoClient:
         Yields:
             str: 清理后的补全内容片段
         """
-        try:
-            # 创建会话
-            conv_id = await self._create_conversation(content, model)
-            
-            # 构造搜索URL
-            search_url = f"{BASE_URL}/search/{conv_id}?q={content}"
+        await check_rate_limit(limiter=self._rate_limiter)
+        
+        if TRANSPORT == "http":
+            started = False
+            try:
+                async for chunk in self._get_completion_stream_http(content, model):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    print(f"Error in get_completion_stream: {e}", file=sys.stderr)
+                    raise MetasoException(*API_REQUEST_FAILED)
+                print(f"HTTP transport failed, falling back to browser: {e}", file=sys.stderr)
+                
+        async for chunk in self._get_completion_stream_browser(content, model):
+            yield chunk
             
-            # 创建队列用于存储响应片段
-            queue = asyncio.Queue()
-            response_event = asyncio.Event()
+    async def _get_completion_stream_http(self, content: str, model: str) -> AsyncGenerator[str, None]:
+        """通过HTTP传输获取流式补全"""
+        token, cookies = await self._get_credentials()
+        handler = MetasoResponseHandler()
+        
+        try:
+            conv_id = await self._http.create_conversation(token, cookies, content, model)
+            async for event_data in self._http.stream_search(
+                token, cookies, conv_id, content, model, read_size=STREAM_READ_SIZE
+            ):
+                cleaned = handler.clean_response(event_data)
+                if cleaned:
+                    yield cleaned
+        except MetasoException as e:
+            if e.code == API_TOKEN_EXPIRES[0]:
+                self._invalidate_token()
+            raise
             
-            async def handle_response(event):
+    async def _get_completion_stream_browser(self, content: str, model: str) -> AsyncGenerator[str, None]:
+        """通过浏览器导航并拦截searchV2获取流式补全"""
+        await self.start()
+        
+        try:
+            # 从页面池借用页面，每个查询使用独立的响应处理器
+            async with self._pool.page() as slot:
+                handler = slot.reset_handler()
+                
+                # 创建会话
+                token = await self._get_page_token(slot.page)
+                conv_id = await self._create_conversation(slot.page, token, content, model)
+                
+                # 构造搜索URL
+                search_url = f"{BASE_URL}/search/{conv_id}?q={content}"
+                
+                # 创建队列用于存储响应片段
+                queue = asyncio.Queue()
+                response_event = asyncio.Event()
+                
+                # 按会话ID接收本查询的响应流
+                slot.dispatcher.register(
+                    conv_id,
+                    self._make_stream_consumer(slot, handler, queue, response_event)
+                )
+                
                 try:
-                    request_id = event["requestId"]
+                    # 导航到搜索页面
+                    await slot.page.goto(search_url)
                     
-                    # 获取响应流
-                    stream_result = await self._client.send("Fetch.takeResponseBodyAsStream", {"requestId": request_id})
-                    stream_handle = stream_result["stream"]
-                    if not stream_handle:
-                        return
-                        
-                    try:
-                        buffer = ""
-                        while True:
-                            read_result = await self._client.send("IO.read", {"handle": stream_handle, "size": 256})
-                            if not read_result:
+                    # 持续获取响应片段
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(queue.get(), timeout=1.0)
+                            if chunk:  # 只返回非空内容
+                                yield chunk
+                        except asyncio.TimeoutError:
+                            # 检查是否完成
+                            if response_event.is_set():
                                 break
                                 
-                            data = read_result.get("data")
-                            eof = read_result.get("eof")
+                finally:
+                    # 取消注册
+                    slot.dispatcher.unregister(conv_id)
+                    
+        except Exception as e:
+            print(f"Error in get_completion_stream: {e}", file=sys.stderr)
+            raise MetasoException(*API_REQUEST_FAILED)
+            
+    def _make_stream_consumer(
+        self,
+        slot: PooledPage,
+        handler: MetasoResponseHandler,
+        queue: asyncio.Queue,
+        response_event: asyncio.Event
+    ):
+        """创建读取searchV2响应流的消费者，由分发器按会话ID调用
+        
+        Args:
+            slot: 当前查询借用的页面
+            handler: 当前查询的响应处理器
+            queue: 清理后的内容片段写入的队列
+            response_event: 响应流读取结束时设置的事件
+        """
+        async def handle_response(request_id: str):
+            try:
+                # 获取响应流
+                stream_result = await slot.cdp.send("Fetch.takeResponseBodyAsStream", {"requestId": request_id})
+                stream_handle = stream_result["stream"]
+                if not stream_handle:
+                    return
+                    
+                try:
+                    decoder = SSEDecoder()
+                    while True:
+                        read_result = await slot.cdp.send("IO.read", {"handle": stream_handle, "size": STREAM_READ_SIZE})
+                        if not read_result:
+                            break
                             
-                            if data:
-                                buffer += data
-                                # 按data:分割处理
-                                parts = buffer.split("data:")
-                                # 处理完整的部分
-                                for part in parts[:-1]:
-                                    if part.strip():
-                                        cleaned = self._response_handler.clean_response(f"data:{part}")
-                                        if cleaned:
-                                            await queue.put(cleaned)
-                                # 保留最后一个可能不完整的部分        
-                                buffer = "data:" + parts[-1] if parts else ""
+                        data = read_result.get("data")
+                        eof = read_result.get("eof")
+                        
+                        events = decoder.feed(data, read_result.get("base64Encoded", False)) if data else []
+                        if eof:
+                            # 处理剩余数据
+                            events.extend(decoder.flush())
                             
-                            if eof:
-                                # 处理剩余数据
-                                if buffer.strip():
-                                    cleaned = self._response_handler.clean_response(buffer)
-                                    if cleaned:
-                                        await queue.put(cleaned)
-                                break
+                        for event_data in events:
+                            cleaned = handler.clean_response(event_data)
+                            if cleaned:
+                                await queue.put(cleaned)
                                 
-                    except Exception as e:
-                        print(f"Error reading stream: {e}")
-                    finally:
-                        # 关闭流
-                        await self._client.send("IO.close", {"handle": stream_handle})
-                        response_event.set()
-                    
+                        if eof:
+                            break
+                            
                 except Exception as e:
-                    print(f"Error processing response: {e}")
+                    print(f"Error reading stream: {e}", file=sys.stderr)
+                finally:
+                    # 关闭流
+                    await slot.cdp.send("IO.close", {"handle": stream_handle})
                     response_event.set()
-                    
-            # 监听响应
-            self._client.on("Fetch.requestPaused", handle_response)
-            
-            try:
-                # 导航到搜索页面
-                await self._page.goto(search_url)
                 
-                # 持续获取响应片段
-                while True:
-                    try:
-                        chunk = await asyncio.wait_for(queue.get(), timeout=1.0)
-                        if chunk:  # 只返回非空内容
-                            yield chunk
-                    except asyncio.TimeoutError:
-                        # 检查是否完成
-                        if response_event.is_set():
-                            break
-                            
-            finally:
-                # 移除监听器
-                self._client.remove_listener("Fetch.requestPaused", handle_response)
-                    
-        except Exception as e:
-            print(f"Error in get_completion_stream: {e}")
-            raise MetasoException(*API_REQUEST_FAILED)
\ No newline at end of file
+            except Exception as e:
+                print(f"Error processing response: {e}", file=sys.stderr)
+                response_event.set()
+                
+        return handle_response
@@ -1,17 +1,37 @@
 """Configuration for Metaso Search API"""
 
 import os
-import time
+from typing import List, Tuple
+from .exceptions import MetasoException, API_RATE_LIMITED
+from ..common import RateLimiter, RateLimitTimeout, env_bool
+from .resource_policy import DEFAULT_BLOCKED_TYPES, DEFAULT_BLOCKED_PATTERNS
 
 # 认证信息
 METASO_UID = os.getenv("METASO_UID")
 METASO_SID = os.getenv("METASO_SID")
-if not METASO_UID or not METASO_SID:
-    METASO_UID = "你获取的 metaso uid"
-    METASO_SID = "你获取的 metaso sid"
 
-if not METASO_UID or not METASO_SID:
-    raise ValueError("需要设置METASO UID和METASO SID环境变量")
+def _parse_accounts(value: str) -> List[Tuple[str, str]]:
+    """解析"uid1:sid1,uid2:sid2"格式的账号列表"""
+    accounts = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        uid, sep, sid = item.partition(":")
+        if not sep or not uid.strip() or not sid.strip():
+            raise ValueError(f"METASO_ACCOUNTS格式错误，应为uid:sid，多个账号用逗号分隔: {item}")
+        accounts.append((uid.strip(), sid.strip()))
+    return accounts
+
+# 账号列表：每个账号使用独立的浏览器、速率限制和健康状态，未配置METASO_ACCOUNTS时使用METASO_UID/METASO_SID
+ACCOUNTS = _parse_accounts(os.getenv("METASO_ACCOUNTS", ""))
+if not ACCOUNTS and METASO_UID and METASO_SID:
+    ACCOUNTS = [(METASO_UID, METASO_SID)]
+
+# 账号被限流或连续失败后的基础冷却时间(秒)，多次冷却时按指数增长
+ACCOUNT_COOLDOWN = float(os.getenv("METASO_ACCOUNT_COOLDOWN", "60"))
+# 连续失败多少次后进入冷却
+ACCOUNT_MAX_FAILURES = int(os.getenv("METASO_ACCOUNT_MAX_FAILURES", "3"))
 
 # 模型配置
 MODELS = {
@@ -29,36 +49,80 @@ MODELS = {
 DEFAULT_MODEL = "detail"  # 默认使用深入模式
 DEFAULT_SCHOLAR = False   # 默认使用普通搜索
 
+# 数据传输方式：http（浏览器只用于获取token和cookies，失败时回退到浏览器）或 browser
+TRANSPORT = os.getenv("METASO_TRANSPORT", "http")
+
+# meta token缓存：有效期、过期前提前刷新的时间和后台校验间隔(秒)
+TOKEN_TTL = float(os.getenv("METASO_TOKEN_TTL", "3600"))
+TOKEN_REFRESH_MARGIN = float(os.getenv("METASO_TOKEN_REFRESH_MARGIN", "300"))
+TOKEN_VALIDATE_INTERVAL = float(os.getenv("METASO_TOKEN_VALIDATE_INTERVAL", "600"))
+
+def _env_list(name: str, default=()) -> tuple:
+    """读取逗号分隔的环境变量"""
+    value = os.getenv(name)
+    if value is None:
+        return tuple(default)
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+# 浏览器资源拦截：查询只需要页面脚本和searchV2流，图片、字体、样式表和统计脚本都不下载
+BLOCK_RESOURCES = env_bool("METASO_BLOCK_RESOURCES", True)
+BLOCKED_RESOURCE_TYPES = _env_list("METASO_BLOCKED_RESOURCE_TYPES", DEFAULT_BLOCKED_TYPES)
+BLOCKED_URL_PATTERNS = _env_list("METASO_BLOCKED_URL_PATTERNS", DEFAULT_BLOCKED_PATTERNS)
+# 白名单URL通配符，优先级高于拦截规则
+ALLOWED_URL_PATTERNS = _env_list("METASO_ALLOWED_URL_PATTERNS")
+
+# 页面池大小：同一浏览器内可同时进行的查询数
+PAGE_POOL_SIZE = int(os.getenv("METASO_PAGE_POOL_SIZE", "2"))
+
+# 页面回收：使用次数和存活时间(秒)上限，0表示不限制
+PAGE_MAX_USES = int(os.getenv("METASO_PAGE_MAX_USES", "50"))
+PAGE_MAX_AGE = float(os.getenv("METASO_PAGE_MAX_AGE", "1800"))
+
+# 浏览器回收：查询数、运行时长(秒)和内存(MB，需安装psutil)上限，0表示不限制
+BROWSER_MAX_QUERIES = int(os.getenv("METASO_BROWSER_MAX_QUERIES", "500"))
+BROWSER_MAX_AGE = float(os.getenv("METASO_BROWSER_MAX_AGE", "21600"))
+BROWSER_MAX_RSS_MB = float(os.getenv("METASO_BROWSER_MAX_RSS_MB", "1024"))
+# 浏览器持久化目录中的缓存超过该大小(MB)时清理，0表示不清理
+PROFILE_CACHE_MAX_MB = float(os.getenv("METASO_PROFILE_CACHE_MAX_MB", "200"))
+# 回收条件检查间隔(秒)
+LIFECYCLE_CHECK_INTERVAL = float(os.getenv("METASO_LIFECYCLE_CHECK_INTERVAL", "60"))
+
+# 追问会话：最多保存的会话数和未使用多久(秒)后过期
+CONVERSATION_MAX = int(os.getenv("METASO_CONVERSATION_MAX", "256"))
+CONVERSATION_TTL = float(os.getenv("METASO_CONVERSATION_TTL", "1800"))
+
+# 研究模式后台任务：同时执行的任务数、未完成任务上限、结果保留时间(秒)和单个任务的最长时间(秒)
+JOB_WORKERS = int(os.getenv("METASO_JOB_WORKERS", "1"))
+JOB_MAX_PENDING = int(os.getenv("METASO_JOB_MAX_PENDING", "16"))
+JOB_RESULT_TTL = float(os.getenv("METASO_JOB_RESULT_TTL", "1800"))
+RESEARCH_TIMEOUT = float(os.getenv("METASO_RESEARCH_TIMEOUT", "600"))
+
+# 服务启动预热时打开的页面数
+PREWARM_PAGES = int(os.getenv("METASO_PREWARM_PAGES", "1"))
+
+# 每次IO.read读取响应流的字节数，越大则CDP往返次数越少
+STREAM_READ_SIZE = int(os.getenv("METASO_STREAM_READ_SIZE", str(64 * 1024)))
+
 # 速率限制配置
 RATE_LIMIT = {
     "per_second": 1,
     "per_minute": 60
 }
 
-request_count = {
-    "second": 0,
-    "minute": 0,
-    "last_reset": time.time(),
-    "last_minute_reset": time.time()
-}
+# 等待速率限制许可的最长时间(秒)
+RATE_LIMIT_MAX_WAIT = float(os.getenv("METASO_RATE_LIMIT_MAX_WAIT", "30"))
 
-def check_rate_limit():
-    """检查并更新速率限制"""
-    now = time.time()
+async def check_rate_limit(limiter: RateLimiter, max_wait: float = RATE_LIMIT_MAX_WAIT):
+    """等待速率限制许可
     
-    # 重置秒级计数器
-    if now - request_count["last_reset"] > 1:
-        request_count["second"] = 0
-        request_count["last_reset"] = now
+    Args:
+        limiter: 使用的限制器，每个账号一个，按RATE_LIMIT创建
+        max_wait: 最长等待秒数
         
-    # 重置分钟级计数器
-    if now - request_count["last_minute_reset"] > 60:
-        request_count["minute"] = 0
-        request_count["last_minute_reset"] = now
-    
-    if (request_count["second"] >= RATE_LIMIT["per_second"] or 
-        request_count["minute"] >= RATE_LIMIT["per_minute"]):
-        raise Exception("超出速率限制")
-    
-    request_count["second"] += 1
-    request_count["minute"] += 1 
\ No newline at end of file
+    Raises:
+        MetasoException: 超过最长等待时间仍未获得许可
+    """
+    try:
+        await limiter.acquire(max_wait)
+    except RateLimitTimeout:
+        raise MetasoException(*API_RATE_LIMITED)
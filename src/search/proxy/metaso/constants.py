@@ -14,6 +14,12 @@ MAX_RETRY_COUNT = 3
 # 重试延迟(秒)
 RETRY_DELAY = 5
 
+# 等待完整响应的超时时间(秒)
+RESPONSE_TIMEOUT = 30
+
+# meta token持久化文件名（位于浏览器数据目录下）
+TOKEN_CACHE_FILE = "meta_token.json"
+
 # 伪装headers
 FAKE_HEADERS = {
     "Accept": "*/*",
@@ -0,0 +1,98 @@
+"""
+秘塔AI会话存储
+
+记录近期创建的秘塔会话，追问时复用已有会话，秘塔可以利用会话中已有的检索结果和上下文，
+无需重新创建会话并完整搜索一遍。
+- 条目数有上限，超出时淘汰最久未使用的会话
+- 超过有效期未使用的会话过期
+- 同一会话的追问串行执行
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional
+
+class Conversation:
+    """一个秘塔会话"""
+
+    def __init__(self, conversation_id: str, model: str):
+        """初始化
+
+        Args:
+            conversation_id: 秘塔会话ID
+            model: 创建会话时使用的模型
+        """
+        self.id = conversation_id
+        self.model = model
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.turns = 1
+        self.lock = asyncio.Lock()
+
+class ConversationStore:
+    """有界、可过期的会话存储"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 1800):
+        """初始化
+
+        Args:
+            max_entries: 最多保存的会话数
+            ttl: 会话未使用多少秒后过期
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def _expired(self, conversation: Conversation) -> bool:
+        return time.monotonic() - conversation.last_used >= self.ttl
+
+    def add(self, conversation_id: str, model: str) -> Conversation:
+        """记录新会话或刷新已有会话的使用时间
+
+        Args:
+            conversation_id: 秘塔会话ID
+            model: 使用的模型
+
+        Returns:
+            Conversation: 会话
+        """
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            conversation = Conversation(conversation_id, model)
+            self._conversations[conversation_id] = conversation
+            while len(self._conversations) > self.max_entries:
+                self._conversations.popitem(last=False)
+        else:
+            conversation.last_used = time.monotonic()
+            conversation.turns += 1
+            self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        """获取未过期的会话
+
+        Args:
+            conversation_id: 秘塔会话ID
+
+        Returns:
+            Optional[Conversation]: 会话，不存在或已过期时返回None
+        """
+        conversation = self._conversations.get(conversation_id)
+        if conversation is None:
+            return None
+        if self._expired(conversation):
+            del self._conversations[conversation_id]
+            return None
+        self._conversations.move_to_end(conversation_id)
+        return conversation
+
+    def discard(self, conversation_id: str):
+        """删除会话（例如秘塔端已失效）"""
+        self._conversations.pop(conversation_id, None)
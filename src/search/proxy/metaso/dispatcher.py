@@ -0,0 +1,96 @@
+"""
+秘塔AI响应分发器
+
+每个CDP会话只注册一个Fetch.requestPaused监听器，按会话ID把被拦截的
+searchV2响应交给对应查询的消费者，使同一会话上的多个查询互不干扰。
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import json
+import sys
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+from playwright.async_api import CDPSession
+
+# searchV2请求中可能携带会话ID的字段
+CONVERSATION_ID_FIELDS = ("sessionId", "conversationId", "id")
+
+StreamConsumer = Callable[[str], Awaitable[None]]
+
+def extract_conversation_id(request: Dict[str, Any]) -> Optional[str]:
+    """从被拦截的searchV2请求中提取会话ID
+
+    依次检查URL查询参数和JSON请求体。
+
+    Args:
+        request: Fetch.requestPaused事件中的request字段
+
+    Returns:
+        Optional[str]: 会话ID，无法识别时返回None
+    """
+    query = parse_qs(urlparse(request.get("url", "")).query)
+    for field in CONVERSATION_ID_FIELDS:
+        if query.get(field):
+            return query[field][0]
+
+    post_data = request.get("postData")
+    if post_data:
+        try:
+            body = json.loads(post_data)
+        except (TypeError, ValueError):
+            body = None
+        if isinstance(body, dict):
+            for field in CONVERSATION_ID_FIELDS:
+                if body.get(field):
+                    return str(body[field])
+    return None
+
+class FetchDispatcher:
+    """Fetch.requestPaused事件分发器"""
+
+    def __init__(self, cdp: CDPSession):
+        """初始化并在CDP会话上注册唯一的监听器
+
+        Args:
+            cdp: 已启用Fetch域的CDP会话
+        """
+        self._cdp = cdp
+        self._consumers: Dict[str, StreamConsumer] = {}
+        cdp.on("Fetch.requestPaused", self._on_request_paused)
+
+    def register(self, conversation_id: str, consumer: StreamConsumer):
+        """注册查询的响应流消费者
+
+        Args:
+            conversation_id: 会话ID
+            consumer: 接收requestId并读取响应流的协程函数
+        """
+        self._consumers[conversation_id] = consumer
+
+    def unregister(self, conversation_id: str):
+        """取消注册（查询结束或超时时调用）"""
+        self._consumers.pop(conversation_id, None)
+
+    async def _on_request_paused(self, event: Dict[str, Any]):
+        """把被拦截的响应交给唯一匹配的消费者"""
+        request_id = event["requestId"]
+        conversation_id = extract_conversation_id(event.get("request", {}))
+
+        consumer = None
+        if conversation_id is not None:
+            consumer = self._consumers.pop(conversation_id, None)
+        elif len(self._consumers) == 1:
+            # 无法识别会话ID但只有一个查询在等待时，交给该查询
+            consumer = self._consumers.pop(next(iter(self._consumers)))
+
+        if consumer is None:
+            # 没有对应的查询，放行响应，避免页面请求一直挂起
+            try:
+                await self._cdp.send("Fetch.continueRequest", {"requestId": request_id})
+            except Exception as e:
+                print(f"Error continuing unmatched request: {e}", file=sys.stderr)
+            return
+
+        await consumer(request_id)
@@ -22,4 +22,8 @@ API_FILE_EXECEEDS_SIZE = (-2004, '远程文件超出大小')
 API_CHAT_STREAM_PUSHING = (-2005, '已有对话流正在输出')
 API_CONTENT_FILTERED = (-2006, '内容由于合规问题已被阻止生成')
 API_IMAGE_GENERATION_FAILED = (-2007, '图像生成失败')
-API_CONTENT_EMPTY = (-2008, '消息不能为空') 
\ No newline at end of file
+API_CONTENT_EMPTY = (-2008, '消息不能为空')
+API_RATE_LIMITED = (-2009, '超出速率限制')
+API_DEADLINE_EXCEEDED = (-2010, '已超过截止时间')
+API_CONVERSATION_NOT_FOUND = (-2011, '会话不存在或已过期')
+API_ACCOUNT_THROTTLED = (-2012, '账号被秘塔限流')
@@ -0,0 +1,176 @@
+"""
+秘塔AI HTTP传输层
+
+浏览器只负责获取meta token和cookies，会话创建和searchV2流直接通过
+流式HTTP请求完成，无需为每个查询加载搜索页面。
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+from typing import AsyncIterator, Dict
+import httpx
+from .constants import *
+from .exceptions import *
+from .sse import SSEDecoder
+from ..common import get_http_client
+
+# 流式读取时两次数据之间允许的最长间隔(秒)
+STREAM_READ_TIMEOUT = 60
+
+class MetasoHttpTransport:
+    """基于httpx的秘塔AI传输层"""
+
+    def _get_headers(self, token: str, cookies: Dict[str, str]) -> Dict[str, str]:
+        """构造请求头
+
+        Args:
+            token: meta token
+            cookies: metaso.cn的cookies
+
+        Returns:
+            Dict[str, str]: 请求头字典
+        """
+        return {
+            **FAKE_HEADERS,
+            # httpx未安装brotli/zstandard时无法解码br和zstd，只接受gzip和deflate
+            'Accept-Encoding': 'gzip, deflate',
+            'Token': token,
+            'Is-Mini-Webview': '0',
+            'Cookie': "; ".join(f"{name}={value}" for name, value in cookies.items()),
+            'Referer': f'{BASE_URL}/'
+        }
+
+    async def check_token(self, token: str, cookies: Dict[str, str]) -> bool:
+        """通过my-info接口校验token是否有效
+        
+        Args:
+            token: meta token
+            cookies: metaso.cn的cookies
+            
+        Returns:
+            bool: token是否有效
+        """
+        response = await get_http_client().get(
+            API_MY_INFO_URL,
+            headers=self._get_headers(token, cookies)
+        )
+        if response.status_code in (401, 403):
+            return False
+        if response.status_code != 200:
+            raise MetasoException(API_REQUEST_FAILED[0], f"{API_REQUEST_FAILED[1]}: {response.status_code}")
+        try:
+            result = response.json()
+        except ValueError:
+            return False
+        return not result.get("errCode")
+
+    async def create_conversation(
+        self,
+        token: str,
+        cookies: Dict[str, str],
+        content: str,
+        model: str = DEFAULT_MODEL
+    ) -> str:
+        """创建会话
+
+        Args:
+            token: meta token
+            cookies: metaso.cn的cookies
+            content: 对话内容
+            model: 模型名称
+
+        Returns:
+            str: 会话ID
+        """
+        data = {
+            "question": content,
+            "mode": model,
+            "engineType": "",
+            "scholarSearchDomain": "all"
+        }
+        try:
+            response = await get_http_client().post(
+                API_SESSION_URL,
+                json=data,
+                headers=self._get_headers(token, cookies)
+            )
+        except httpx.HTTPError as e:
+            raise MetasoException(API_REQUEST_FAILED[0], f"{API_REQUEST_FAILED[1]}: {e}")
+
+        if response.status_code in (401, 403):
+            raise MetasoException(*API_TOKEN_EXPIRES)
+        if response.status_code == 429:
+            raise MetasoException(*API_ACCOUNT_THROTTLED)
+        try:
+            result = response.json()
+        except ValueError as e:
+            raise MetasoException(API_REQUEST_FAILED[0], f"{API_REQUEST_FAILED[1]}: {e}")
+        if response.status_code != 200 or result.get("errCode"):
+            raise MetasoException(
+                API_REQUEST_FAILED[0],
+                f"{API_REQUEST_FAILED[1]}: {result.get('errMsg', response.status_code)}"
+            )
+        if "id" not in result.get("data", {}):
+            raise MetasoException(*API_REQUEST_FAILED)
+        return result["data"]["id"]
+
+    async def stream_search(
+        self,
+        token: str,
+        cookies: Dict[str, str],
+        conversation_id: str,
+        content: str,
+        model: str = DEFAULT_MODEL,
+        read_size: int = 64 * 1024
+    ) -> AsyncIterator[str]:
+        """请求searchV2并逐个返回SSE事件的data内容
+
+        Args:
+            token: meta token
+            cookies: metaso.cn的cookies
+            conversation_id: 会话ID
+            content: 对话内容
+            model: 模型名称
+            read_size: 每次读取的字节数
+
+        Yields:
+            str: SSE事件的data内容
+        """
+        params = {
+            "sessionId": conversation_id,
+            "question": content,
+            "lang": "zh",
+            "mode": model,
+            "is-mini-webview": "0",
+            "token": token
+        }
+        headers = {
+            **self._get_headers(token, cookies),
+            "Accept": "text/event-stream"
+        }
+        timeout = httpx.Timeout(get_http_client().timeout.connect, read=STREAM_READ_TIMEOUT)
+
+        try:
+            async with get_http_client().stream(
+                "GET", API_SEARCH_URL, params=params, headers=headers, timeout=timeout
+            ) as response:
+                if response.status_code in (401, 403):
+                    raise MetasoException(*API_TOKEN_EXPIRES)
+                if response.status_code == 429:
+                    raise MetasoException(*API_ACCOUNT_THROTTLED)
+                if response.status_code != 200:
+                    raise MetasoException(API_REQUEST_FAILED[0], f"{API_REQUEST_FAILED[1]}: {response.status_code}")
+                if "text/event-stream" not in response.headers.get("content-type", ""):
+                    # 出错时服务端返回JSON而不是事件流
+                    body = await response.aread()
+                    raise MetasoException(API_REQUEST_FAILED[0], f"{API_REQUEST_FAILED[1]}: {body[:200]!r}")
+
+                decoder = SSEDecoder()
+                async for chunk in response.aiter_bytes(read_size):
+                    for event_data in decoder.feed(chunk):
+                        yield event_data
+                for event_data in decoder.flush():
+                    yield event_data
+        except httpx.HTTPError as e:
+            raise MetasoException(API_REQUEST_FAILED[0], f"{API_REQUEST_FAILED[1]}: {e}")
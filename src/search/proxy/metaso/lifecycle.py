@@ -0,0 +1,253 @@
+"""
+秘塔AI浏览器生命周期管理
+
+长期运行时，无头Chromium的内存和持久化目录都会持续增长。后台任务定期检查：
+- 浏览器处理的查询数、运行时长或内存占用(RSS)超过阈值时回收浏览器
+  内存只统计本账号浏览器的进程树，多账号时各账号分别计算
+- 持久化目录中的缓存超过大小上限时，同样通过回收浏览器来清理（浏览器关闭时才能删除）
+  只删除缓存目录，cookies和meta_token.json等文件保留
+
+回收前先等待进行中的查询结束，期间新查询排队等待，不会丢失请求。
+页面级别的回收（使用次数、存活时间）由页面池在归还页面时处理。
+
+内存检测依赖可选的psutil（pip install psutil 或 pip install search-server[memory]），未安装时只按查询数和时长回收。
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import time
+from typing import Optional
+from .browser import MetasoBrowser
+from .page_pool import PagePool
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# 可安全删除的缓存目录（相对于持久化目录），不包含cookies和meta token
+PROFILE_CACHE_DIRS = (
+    "Default/Cache",
+    "Default/Code Cache",
+    "Default/GPUCache",
+    "Default/DawnCache",
+    "Default/Service Worker/CacheStorage",
+    "Default/Service Worker/ScriptCache",
+    "ShaderCache",
+    "GrShaderCache",
+    "GraphiteDawnCache",
+    "component_crx_cache",
+)
+
+def find_browser_process(profile_dir: str) -> Optional["psutil.Process"]:
+    """查找使用该持久化目录启动的浏览器主进程
+
+    多账号时每个账号各自启动浏览器，按--user-data-dir区分，只返回本账号的浏览器。
+    psutil未安装或找不到时返回None。
+    """
+    if psutil is None:
+        return None
+    target = os.path.realpath(profile_dir)
+    matches = {}
+    for child in psutil.Process().children(recursive=True):
+        try:
+            cmdline = child.cmdline()
+            ppid = child.ppid()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+        for arg in cmdline:
+            if arg.startswith("--user-data-dir=") and os.path.realpath(arg.split("=", 1)[1]) == target:
+                matches[child.pid] = (child, ppid)
+                break
+    # 浏览器的子进程也可能带有--user-data-dir参数，取最上层的进程
+    for child, ppid in matches.values():
+        if ppid not in matches:
+            return child
+    return None
+
+def browser_rss(process: "psutil.Process") -> Optional[int]:
+    """浏览器主进程及其所有子进程（渲染进程等）的RSS总和(字节)，进程已退出时返回None"""
+    try:
+        processes = [process, *process.children(recursive=True)]
+    except (psutil.NoSuchProcess, psutil.AccessDenied):
+        return None
+    total = 0
+    for child in processes:
+        try:
+            total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            pass
+    return total
+
+def dir_size(path: str) -> int:
+    """目录占用的字节数"""
+    total = 0
+    for root, _dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def profile_cache_size(profile_dir: str) -> int:
+    """持久化目录中可清理的缓存占用的字节数"""
+    return sum(dir_size(os.path.join(profile_dir, relative)) for relative in PROFILE_CACHE_DIRS)
+
+def trim_profile(profile_dir: str) -> int:
+    """删除持久化目录中的缓存目录，返回释放的字节数
+
+    只能在浏览器关闭时调用。
+    """
+    freed = 0
+    for relative in PROFILE_CACHE_DIRS:
+        path = os.path.join(profile_dir, relative)
+        if os.path.isdir(path):
+            freed += dir_size(path)
+            shutil.rmtree(path, ignore_errors=True)
+    return freed
+
+class BrowserRecycler:
+    """浏览器回收器"""
+
+    def __init__(
+        self,
+        browser: MetasoBrowser,
+        pool: PagePool,
+        profile_dir: str,
+        max_queries: int = 0,
+        max_age: float = 0,
+        max_rss_mb: float = 0,
+        profile_max_mb: float = 0,
+        check_interval: float = 60
+    ):
+        """初始化回收器
+
+        Args:
+            browser: 浏览器管理器
+            pool: 页面池
+            profile_dir: 浏览器持久化目录
+            max_queries: 浏览器处理多少次查询后回收，0表示不限制
+            max_age: 浏览器运行多少秒后回收，0表示不限制
+            max_rss_mb: 内存占用超过多少MB后回收，0表示不限制
+            profile_max_mb: 持久化目录中的缓存超过多少MB后清理，0表示不限制
+            check_interval: 检查间隔(秒)
+        """
+        self._browser = browser
+        self._pool = pool
+        self._profile_dir = profile_dir
+        self.max_queries = max_queries
+        self.max_age = max_age
+        self.max_rss_mb = max_rss_mb
+        self.profile_max_mb = profile_max_mb
+        self.check_interval = check_interval
+        self._generation = browser.generation
+        self._started_at = time.monotonic()
+        self._acquired_at_start = pool.acquired
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._process = None  # 本账号浏览器的主进程，按需查找，浏览器重启后重新查找
+        self.recycles = 0
+
+    def _sync_generation(self):
+        """浏览器（崩溃后）重新启动时重置计数"""
+        if self._browser.generation != self._generation:
+            self._generation = self._browser.generation
+            self._started_at = time.monotonic()
+            self._acquired_at_start = self._pool.acquired
+            self._process = None
+
+    def _browser_rss(self) -> Optional[int]:
+        """本账号浏览器进程树的RSS(字节)，无法测量时返回None"""
+        if self._process is None or not self._process.is_running():
+            self._process = find_browser_process(self._profile_dir)
+            if self._process is None:
+                return None
+        return browser_rss(self._process)
+
+    def recycle_reason(self) -> Optional[str]:
+        """判断是否需要回收浏览器
+
+        Returns:
+            Optional[str]: 需要回收的原因，不需要时返回None
+        """
+        if not self._browser.is_alive:
+            return None
+        self._sync_generation()
+
+        queries = self._pool.acquired - self._acquired_at_start
+        if self.max_queries and queries >= self.max_queries:
+            return f"served {queries} queries"
+        age = time.monotonic() - self._started_at
+        if self.max_age and age >= self.max_age:
+            return f"running for {age:.0f}s"
+        if self.max_rss_mb:
+            rss = self._browser_rss()
+            if rss is not None and rss >= self.max_rss_mb * 1024 * 1024:
+                return f"RSS {rss / 1024 / 1024:.0f}MB"
+        return None
+
+    async def recycle(self, reason: str = "requested"):
+        """等待进行中的查询结束后重启浏览器，并清理持久化目录中的缓存"""
+        async with self._lock:
+            async with self._pool.drained():
+                print(f"Recycling Metaso browser: {reason}", file=sys.stderr)
+                await self._browser.close()
+                freed = await asyncio.to_thread(trim_profile, self._profile_dir)
+                if freed:
+                    print(f"Trimmed {freed / 1024 / 1024:.1f}MB of browser cache", file=sys.stderr)
+                await self._browser.ensure_started()
+            self.recycles += 1
+            self._sync_generation()
+
+    async def maybe_recycle(self) -> bool:
+        """满足回收条件时回收浏览器
+
+        Returns:
+            bool: 是否进行了回收
+        """
+        reason = self.recycle_reason()
+        if reason is None and self.profile_max_mb and self._browser.is_alive:
+            # 缓存目录只能在浏览器关闭时删除，因此同样通过回收清理
+            size = await asyncio.to_thread(profile_cache_size, self._profile_dir)
+            if size >= self.profile_max_mb * 1024 * 1024:
+                reason = f"profile cache {size / 1024 / 1024:.0f}MB"
+        if reason is None:
+            return False
+        await self.recycle(reason)
+        return True
+
+    def start(self):
+        """启动后台检查任务（可重复调用）"""
+        if not any((self.max_queries, self.max_age, self.max_rss_mb, self.profile_max_mb)):
+            return
+        if self._task is None or self._task.done():
+            if self.max_rss_mb and psutil is None:
+                print("按内存回收浏览器需要安装psutil(pip install psutil)，已忽略内存上限", file=sys.stderr)
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """停止后台检查任务"""
+        task, self._task = self._task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        """定期检查回收条件"""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.maybe_recycle()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error recycling Metaso browser: {e}", file=sys.stderr)
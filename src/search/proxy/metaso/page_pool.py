@@ -0,0 +1,236 @@
+"""
+秘塔AI页面池
+
+在同一个浏览器中维护多个页面及其CDP会话，每个页面同一时间只服务一个查询。
+页面全部繁忙时，调用方按先来先服务的顺序排队等待。
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import asyncio
+import sys
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Optional
+from playwright.async_api import Page, CDPSession
+from .browser import MetasoBrowser
+from .dispatcher import FetchDispatcher
+from .response_handler import MetasoResponseHandler
+
+class PooledPage:
+    """池中的一个页面"""
+
+    def __init__(self, page: Page, generation: int):
+        """初始化
+
+        Args:
+            page: 浏览器页面
+            generation: 创建页面时浏览器的启动代数
+        """
+        self.page = page
+        self.generation = generation
+        self.cdp: Optional[CDPSession] = None
+        self.dispatcher: Optional[FetchDispatcher] = None
+        self.handler = MetasoResponseHandler()
+        self.meta_token: Optional[str] = None  # 初始化时从首页读取的meta token，只在本次借用中有效
+        self.crashed = False
+        self.uses = 0
+        self.created_at = time.monotonic()
+        page.on("crash", self._on_crash)
+
+    def _on_crash(self, _page: Page):
+        self.crashed = True
+
+    def reset_handler(self) -> MetasoResponseHandler:
+        """为新查询创建独立的响应处理器"""
+        self.handler = MetasoResponseHandler()
+        return self.handler
+
+    async def close(self):
+        """关闭CDP会话和页面"""
+        cdp, self.cdp = self.cdp, None
+        try:
+            if cdp:
+                await cdp.detach()
+        except Exception:
+            pass
+        try:
+            if not self.page.is_closed():
+                await self.page.close()
+        except Exception as e:
+            print(f"Error closing page: {e}", file=sys.stderr)
+
+class PagePool:
+    """页面池"""
+
+    def __init__(
+        self,
+        browser: MetasoBrowser,
+        size: int,
+        setup: Callable[[PooledPage], Awaitable[None]],
+        max_uses: int = 0,
+        max_age: float = 0
+    ):
+        """初始化页面池
+
+        Args:
+            browser: 浏览器管理器
+            size: 最大页面数（即最大并发查询数）
+            setup: 新页面的初始化回调（创建CDP会话、打开首页等）
+            max_uses: 页面使用多少次后回收，0表示不限制
+            max_age: 页面创建多少秒后回收，0表示不限制
+        """
+        if size < 1:
+            raise ValueError("页面池大小必须大于0")
+        self._browser = browser
+        self._setup = setup
+        self.size = size
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self._idle: Deque[PooledPage] = deque()
+        # asyncio.Semaphore按等待顺序唤醒，保证排队公平
+        self._slots = asyncio.Semaphore(size)
+        self._in_use = 0
+        self.acquired = 0  # 累计借出次数
+        self.recycled = 0  # 因使用次数或存活时间回收的页面数
+
+    @property
+    def in_use(self) -> int:
+        """正在使用的页面数"""
+        return self._in_use
+
+    @property
+    def idle(self) -> int:
+        """空闲的页面数"""
+        return len(self._idle)
+
+    def _is_healthy(self, pooled: PooledPage) -> bool:
+        """页面是否仍可使用"""
+        return (
+            not pooled.crashed
+            and not pooled.page.is_closed()
+            and self._browser.is_alive
+            and pooled.generation == self._browser.generation
+        )
+
+    def _is_expired(self, pooled: PooledPage) -> bool:
+        """页面是否已达到使用次数或存活时间上限"""
+        return bool(
+            (self.max_uses and pooled.uses >= self.max_uses)
+            or (self.max_age and time.monotonic() - pooled.created_at >= self.max_age)
+        )
+
+    def _is_reusable(self, pooled: PooledPage) -> bool:
+        """页面是否可以继续借出，过期的页面计入回收数"""
+        if not self._is_healthy(pooled):
+            return False
+        if self._is_expired(pooled):
+            self.recycled += 1
+            return False
+        return True
+
+    async def _create(self) -> PooledPage:
+        """新建并初始化页面"""
+        page = await self._browser.new_page()
+        pooled = PooledPage(page, self._browser.generation)
+        try:
+            await self._setup(pooled)
+        except Exception:
+            await pooled.close()
+            raise
+        return pooled
+
+    async def acquire(self) -> PooledPage:
+        """获取一个页面，全部繁忙时排队等待
+
+        Returns:
+            PooledPage: 独占使用的页面
+        """
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                pooled = self._idle.popleft()
+                if self._is_reusable(pooled):
+                    break
+                await pooled.close()
+            else:
+                pooled = await self._create()
+        except BaseException:
+            self._slots.release()
+            raise
+        pooled.uses += 1
+        self._in_use += 1
+        self.acquired += 1
+        return pooled
+
+    async def release(self, pooled: PooledPage, discard: bool = False):
+        """归还页面
+
+        Args:
+            pooled: 要归还的页面
+            discard: 是否丢弃该页面（出错后页面状态不可信时使用）
+        """
+        self._in_use -= 1
+        pooled.meta_token = None
+        try:
+            if discard or not self._is_reusable(pooled):
+                await pooled.close()
+            else:
+                self._idle.append(pooled)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[PooledPage]:
+        """以上下文管理器方式借用页面，出错时丢弃页面"""
+        pooled = await self.acquire()
+        discard = False
+        try:
+            yield pooled
+        except BaseException:
+            discard = True
+            raise
+        finally:
+            await self.release(pooled, discard=discard)
+
+    async def warm(self, count: int):
+        """预先创建并初始化页面，使其在池中空闲待用
+
+        Args:
+            count: 预热的页面数，不超过池大小
+        """
+        count = min(count, self.size)
+        results = await asyncio.gather(
+            *(self.acquire() for _ in range(count)),
+            return_exceptions=True
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        for result in results:
+            if isinstance(result, PooledPage):
+                await self.release(result)
+        if errors:
+            raise errors[0]
+
+    @asynccontextmanager
+    async def drained(self) -> AsyncIterator[None]:
+        """等待所有借出的页面归还并暂停借出，期间可以安全地重启浏览器
+
+        信号量按等待顺序唤醒，此后到达的查询会排在后面等待，不会被丢弃。
+        """
+        held = 0
+        try:
+            while held < self.size:
+                await self._slots.acquire()
+                held += 1
+            await self.close()
+            yield
+        finally:
+            for _ in range(held):
+                self._slots.release()
+
+    async def close(self):
+        """关闭所有空闲页面"""
+        while self._idle:
+            await self._idle.popleft().close()
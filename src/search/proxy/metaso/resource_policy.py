@@ -0,0 +1,96 @@
+"""
+秘塔AI浏览器资源拦截策略
+
+查询只需要页面脚本和被拦截的searchV2流，图片、字体、样式表、媒体和统计脚本
+都不需要下载。策略在浏览器上下文级别生效，所有页面共享：
+- 按资源类型和URL模式拦截
+- 白名单中的URL始终放行，优先级高于拦截规则
+- 文档和接口请求（document/xhr/fetch/eventsource）不按类型拦截
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import sys
+from fnmatch import fnmatchcase
+from typing import Iterable, Tuple
+from playwright.async_api import BrowserContext, Route, Request
+
+# 默认拦截的资源类型
+DEFAULT_BLOCKED_TYPES = ("image", "font", "stylesheet", "media")
+
+# 默认拦截的URL模式（统计、埋点和广告脚本）
+DEFAULT_BLOCKED_PATTERNS = (
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*hm.baidu.com/*",
+    "*cnzz.com/*",
+    "*umeng.com/*",
+    "*sentry.io/*",
+    "*clarity.ms/*",
+    "*doubleclick.net/*",
+)
+
+# 无论如何都不按类型拦截的资源类型，避免破坏页面逻辑和数据流
+ESSENTIAL_TYPES = frozenset(("document", "script", "xhr", "fetch", "eventsource", "websocket"))
+
+class ResourcePolicy:
+    """浏览器资源拦截策略"""
+
+    def __init__(
+        self,
+        blocked_types: Iterable[str] = DEFAULT_BLOCKED_TYPES,
+        blocked_patterns: Iterable[str] = DEFAULT_BLOCKED_PATTERNS,
+        allowed_patterns: Iterable[str] = ()
+    ):
+        """初始化策略
+
+        Args:
+            blocked_types: 拦截的资源类型（Playwright的resource_type）
+            blocked_patterns: 拦截的URL通配符模式
+            allowed_patterns: 始终放行的URL通配符模式
+        """
+        self.blocked_types = frozenset(blocked_types) - ESSENTIAL_TYPES
+        self.blocked_patterns: Tuple[str, ...] = tuple(blocked_patterns)
+        self.allowed_patterns: Tuple[str, ...] = tuple(allowed_patterns)
+        self.blocked = 0
+        self.allowed = 0
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """判断请求是否应被拦截
+
+        Args:
+            resource_type: 资源类型
+            url: 请求URL
+
+        Returns:
+            bool: 是否拦截
+        """
+        if any(fnmatchcase(url, pattern) for pattern in self.allowed_patterns):
+            return False
+        if resource_type in self.blocked_types:
+            return True
+        return any(fnmatchcase(url, pattern) for pattern in self.blocked_patterns)
+
+    async def install(self, context: BrowserContext):
+        """在浏览器上下文上注册拦截路由"""
+        if not self.blocked_types and not self.blocked_patterns:
+            return
+        await context.route("**/*", self._handle_route)
+
+    async def _handle_route(self, route: Route, request: Request):
+        """拦截或放行单个请求"""
+        try:
+            if self.should_block(request.resource_type, request.url):
+                self.blocked += 1
+                await route.abort("blockedbyclient")
+            else:
+                self.allowed += 1
+                await route.continue_()
+        except Exception as e:
+            # 页面关闭时路由可能已失效
+            print(f"Error handling route {request.url}: {e}", file=sys.stderr)
+
+    def stats(self) -> dict:
+        """拦截统计"""
+        return {"blocked": self.blocked, "allowed": self.allowed}
@@ -7,7 +7,11 @@
 
 import json
 import re
-from typing import Dict, List, Optional
+import sys
+from typing import Any, Dict, List
+
+# 回答中的引用标记 [[n]]
+CITATION_PATTERN = re.compile(r'\[\[([^\[\]]+)\]\]')
 
 class MetasoResponseHandler:
     """秘塔AI响应数据处理器"""
@@ -15,8 +19,10 @@ class MetasoResponseHandler:
     def __init__(self):
         """初始化处理器"""
         self._references: List = []  # 引用列表
+        self._references_by_id: Dict[Any, List[Dict]] = {}  # 按id索引的引用
         self._images: List = []  # 图片列表
         self._markdown_images: List = []  # markdown中的图片
+        self._meta_images: List = []  # img-meta事件中的图片（即markdown以外的图片）
         self._recommended_questions: List = []  # 推荐问题
         self._highlights: List = [] # 高亮列表
         self._tables: List = [] # 表格数据
@@ -120,6 +126,7 @@ class MetasoResponseHandler:
                         
                 elif data_type == "set-reference":
                     self._references = []
+                    self._references_by_id = {}
                     for ref in data.get("list", []):
                         ref_data = {
                             "id": ref.get("id"),
@@ -143,6 +150,7 @@ class MetasoResponseHandler:
                             } if ref.get("file_meta") else None
                         }
                         self._references.append(ref_data)
+                        self._references_by_id.setdefault(ref_data["id"], []).append(ref_data)
                         
                 elif data_type == "img-meta":
                     for img in data.get("list", []):
@@ -167,6 +175,7 @@ class MetasoResponseHandler:
                             "image_id": img.get("image_id")
                         }
                         self._images.append(img_data)
+                        self._meta_images.append(img_data)
                         
                 elif data_type == "recommended-question":
                     if "data" in data:
@@ -178,24 +187,22 @@ class MetasoResponseHandler:
                         
                 elif data_type == "update-reference":
                     for update in data.get("list", []):
-                        ref_id = update.get("id")
-                        for ref in self._references:
-                            if ref["id"] == ref_id:
-                                ref["matched_snippet"] = update.get("matched_snippet")
+                        for ref in self._references_by_id.get(update.get("id"), ()):
+                            ref["matched_snippet"] = update.get("matched_snippet")
                                 
                 elif data_type == "heartbeat":
                     return ""
                     
             except json.JSONDecodeError as e:
-                print(f"Error decoding JSON: {e}")
-                print(f"Problematic text: {text}")
+                print(f"Error decoding JSON: {e}", file=sys.stderr)
+                print(f"Problematic text: {text}", file=sys.stderr)
                 return ""
             
             return ""
             
         except Exception as e:
-            print(f"Error in clean_response: {e}")
-            print(f"Full input text: {text}")
+            print(f"Error in clean_response: {e}", file=sys.stderr)
+            print(f"Full input text: {text}", file=sys.stderr)
             return ""
         
     def format_markdown(self, data: Dict) -> str:
@@ -203,24 +210,23 @@ class MetasoResponseHandler:
         # 直接拼接content_parts，保持原有格式
         content = "".join(self._content_parts)
         
-        # 处理引用标记
-        for ref in self._references:
-            ref_id = ref.get("display_id")
-            if ref_id:
-                # 使用更精确的正则表达式
-                pattern = r'\[\[' + re.escape(str(ref_id)) + r'\]\]'
-                content = re.sub(pattern, f"[{ref_id}]", content)
+        # 处理引用标记：一次扫描把已知引用的 [[n]] 替换为 [n]
+        display_ids = {
+            str(ref["display_id"]) for ref in self._references if ref.get("display_id")
+        }
+        if display_ids:
+            content = CITATION_PATTERN.sub(
+                lambda match: f"[{match.group(1)}]" if match.group(1) in display_ids else match.group(0),
+                content
+            )
         
-        # 添加额外图片
-        if self._images:
-            extra_images = [img for img in self._images 
-                           if img not in self._markdown_images]
-            if extra_images:
-                content += "\n\n**相关图片:**\n"
-                for img in extra_images:
-                    if img.get("name") and img.get("thumbnail_url"):
-                        caption = img.get("caption", img["name"])
-                        content += f"![{caption}]({img['thumbnail_url']})\n"
+        # 添加额外图片（markdown中已有的图片不重复添加）
+        if self._meta_images:
+            content += "\n\n**相关图片:**\n"
+            for img in self._meta_images:
+                if img.get("name") and img.get("thumbnail_url"):
+                    caption = img.get("caption", img["name"])
+                    content += f"![{caption}]({img['thumbnail_url']})\n"
         
         return content.strip()
         
@@ -0,0 +1,218 @@
+"""
+秘塔AI多账号会话池
+
+每个账号使用独立的MetasoClient（浏览器数据目录、页面池、meta token）、
+速率限制和健康状态：
+- 查询分配给当前进行中查询最少的健康账号，相同时选择速率余量最多的账号
+- 账号被秘塔限流或连续失败后进入冷却期，多次冷却时冷却时间按指数增长
+- 被限流（包括本地速率预算用尽）的查询在尚未输出内容时自动换一个账号重试
+- 追问路由到创建该会话的账号
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .client import MetasoClient, ChunkCallback
+from .constants import DEFAULT_MODEL
+from .config import RATE_LIMIT
+from .exceptions import *
+from ..common import RateLimiter
+
+class MetasoSession:
+    """会话池中的一个账号"""
+
+    def __init__(self, uid: str, client: MetasoClient, rate_limiter: RateLimiter):
+        """初始化
+
+        Args:
+            uid: 账号的用户ID
+            client: 该账号的客户端
+            rate_limiter: 该账号的速率限制器
+        """
+        self.uid = uid
+        self.client = client
+        self.rate_limiter = rate_limiter
+        self.in_flight = 0
+        self.failures = 0         # 连续失败次数
+        self.cooldowns = 0        # 连续进入冷却的次数，用于计算冷却时间
+        self.cooldown_until = 0.0
+        self.completed = 0
+
+    @property
+    def healthy(self) -> bool:
+        """是否不在冷却期"""
+        return time.monotonic() >= self.cooldown_until
+
+    def cool_down(self, base: float, reason: str):
+        """进入冷却期"""
+        duration = min(base * 2 ** self.cooldowns, base * 16)
+        self.cooldowns += 1
+        self.cooldown_until = time.monotonic() + duration
+        self.failures = 0
+        print(f"Metaso account {self.uid} cooling down for {duration:.0f}s: {reason}", file=sys.stderr)
+
+    def record_success(self):
+        """查询成功，重置失败计数和冷却退避"""
+        self.failures = 0
+        self.cooldowns = 0
+        self.completed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """账号状态"""
+        return {
+            "uid": self.uid,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failures": self.failures,
+            "cooldown_remaining": max(0.0, self.cooldown_until - time.monotonic()),
+            "headroom": self.rate_limiter.headroom()
+        }
+
+class MetasoSessionPool:
+    """多账号会话池"""
+
+    def __init__(
+        self,
+        accounts: Sequence[Tuple[str, str]],
+        browser_data_dir: str,
+        cooldown: float = 60,
+        max_failures: int = 3
+    ):
+        """初始化会话池
+
+        Args:
+            accounts: (uid, sid) 列表
+            browser_data_dir: 浏览器数据根目录，多账号时每个账号使用以uid命名的子目录
+            cooldown: 基础冷却时间(秒)
+            max_failures: 连续失败多少次后进入冷却
+        """
+        if not accounts:
+            raise ValueError("至少需要一个秘塔账号")
+        self.cooldown = cooldown
+        self.max_failures = max_failures
+        self.sessions: List[MetasoSession] = []
+        for uid, sid in accounts:
+            # 单账号时沿用原有目录，保留已有的浏览器数据和meta token
+            data_dir = browser_data_dir if len(accounts) == 1 else os.path.join(browser_data_dir, uid)
+            os.makedirs(data_dir, exist_ok=True)
+            rate_limiter = RateLimiter.from_config(RATE_LIMIT)
+            client = MetasoClient(uid, sid, browser_data_dir=data_dir, rate_limiter=rate_limiter)
+            self.sessions.append(MetasoSession(uid, client, rate_limiter))
+
+    def _candidates(self) -> List[MetasoSession]:
+        """按优先级排序的候选账号：健康的在前，进行中查询少的在前，速率余量多的在前"""
+        return sorted(
+            self.sessions,
+            key=lambda session: (
+                not session.healthy,
+                session.cooldown_until if not session.healthy else 0.0,
+                session.in_flight,
+                -session.rate_limiter.headroom()
+            )
+        )
+
+    def _session_for_conversation(self, conversation_id: str) -> Optional[MetasoSession]:
+        """查找创建了该会话的账号"""
+        for session in self.sessions:
+            if session.client.has_conversation(conversation_id):
+                return session
+        return None
+
+    def _record_failure(self, session: MetasoSession, error: Exception):
+        """记录失败，被秘塔限流或连续失败时进入冷却"""
+        code = error.code if isinstance(error, MetasoException) else None
+        if code == API_ACCOUNT_THROTTLED[0]:
+            session.cool_down(self.cooldown, "throttled by Metaso")
+            return
+        if code in (API_RATE_LIMITED[0], API_DEADLINE_EXCEEDED[0], API_CONVERSATION_NOT_FOUND[0]):
+            # 本地速率预算用尽等与账号健康无关的错误
+            return
+        session.failures += 1
+        if session.failures >= self.max_failures:
+            session.cool_down(self.cooldown, f"{session.failures} consecutive failures")
+
+    async def get_completion(
+        self,
+        content: str,
+        model: str = DEFAULT_MODEL,
+        on_chunk: Optional[ChunkCallback] = None,
+        deadline: Optional[float] = None,
+        conversation_id: Optional[str] = None
+    ) -> Dict:
+        """选择账号执行查询，参数与MetasoClient.get_completion相同"""
+        if conversation_id:
+            session = self._session_for_conversation(conversation_id)
+            if session is None:
+                raise MetasoException(*API_CONVERSATION_NOT_FOUND)
+            candidates = [session]
+        else:
+            candidates = self._candidates()
+
+        forwarded = False
+
+        async def forward(chunk: str):
+            nonlocal forwarded
+            forwarded = True
+            await on_chunk(chunk)
+
+        deadline_at = time.monotonic() + deadline if deadline else None
+        last_error: Optional[Exception] = None
+        for session in candidates:
+            remaining = None if deadline_at is None else deadline_at - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            session.in_flight += 1
+            try:
+                result = await session.client.get_completion(
+                    content,
+                    model=model,
+                    on_chunk=forward if on_chunk else None,
+                    deadline=remaining,
+                    conversation_id=conversation_id
+                )
+            except Exception as e:
+                self._record_failure(session, e)
+                last_error = e
+                # 只有被限流且尚未输出内容时才换账号重试
+                if forwarded or not (
+                    isinstance(e, MetasoException)
+                    and e.code in (API_RATE_LIMITED[0], API_ACCOUNT_THROTTLED[0])
+                ):
+                    raise
+                continue
+            finally:
+                session.in_flight -= 1
+            session.record_success()
+            return result
+
+        if last_error is not None:
+            raise last_error
+        raise MetasoException(*API_DEADLINE_EXCEEDED)
+
+    async def prewarm(self, pages: int = 1):
+        """并发预热所有账号"""
+        results = await asyncio.gather(
+            *(session.client.prewarm(pages) for session in self.sessions),
+            return_exceptions=True
+        )
+        for session, result in zip(self.sessions, results):
+            if isinstance(result, Exception):
+                print(f"Error prewarming Metaso account {session.uid}: {result}", file=sys.stderr)
+
+    async def close(self):
+        """关闭所有账号的客户端"""
+        for session in self.sessions:
+            try:
+                await session.client.close()
+            except Exception as e:
+                print(f"Error closing Metaso account {session.uid}: {e}", file=sys.stderr)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """各账号的状态"""
+        return [session.stats() for session in self.sessions]
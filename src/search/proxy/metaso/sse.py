@@ -0,0 +1,113 @@
+"""
+增量式SSE解码器
+
+逐块解析Server-Sent Events流，每个字节只扫描一次：
+- 以空行作为事件边界，支持\\n、\\r\\n和\\r换行
+- 多行data字段按规范用\\n拼接
+- 支持base64编码的数据块，并正确处理被截断的UTF-8多字节字符
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import base64
+import codecs
+from typing import List, Union
+
+class SSEDecoder:
+    """增量式SSE解码器"""
+
+    def __init__(self):
+        """初始化解码器"""
+        self._utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial_line: List[str] = []  # 尚未遇到换行的行片段
+        self._data_lines: List[str] = []    # 当前事件的data行
+        self._pending_cr = False            # 上一块以\r结尾，需忽略下一块开头的\n
+
+    def feed(self, chunk: Union[str, bytes], base64_encoded: bool = False) -> List[str]:
+        """输入一块数据
+
+        Args:
+            chunk: 数据块（文本、字节或base64字符串）
+            base64_encoded: chunk是否为base64编码
+
+        Returns:
+            List[str]: 本次解析出的完整事件的data内容
+        """
+        if base64_encoded:
+            chunk = base64.b64decode(chunk)
+        text = self._utf8.decode(chunk) if isinstance(chunk, bytes) else chunk
+        return self._process(text)
+
+    def flush(self) -> List[str]:
+        """流结束时调用，输出剩余的事件
+
+        Returns:
+            List[str]: 剩余事件的data内容
+        """
+        events = self._process(self._utf8.decode(b"", final=True))
+        if self._partial_line:
+            line = "".join(self._partial_line)
+            self._partial_line.clear()
+            self._handle_line(line, events)
+        self._dispatch(events)
+        return events
+
+    def _process(self, text: str) -> List[str]:
+        """按行处理文本"""
+        events: List[str] = []
+        if self._pending_cr and text.startswith("\n"):
+            text = text[1:]
+        self._pending_cr = False
+        if not text:
+            return events
+
+        if "\r" in text:
+            # \r结尾时，下一块开头的\n属于同一个\r\n
+            self._pending_cr = text.endswith("\r")
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        lines = text.split("\n")
+        if len(lines) == 1:
+            # 整块都在同一行内
+            self._partial_line.append(text)
+            return events
+
+        if self._partial_line:
+            self._partial_line.append(lines[0])
+            lines[0] = "".join(self._partial_line)
+            self._partial_line.clear()
+
+        # 最后一段没有换行结尾，留到下一块
+        tail = lines.pop()
+        if tail:
+            self._partial_line.append(tail)
+
+        for line in lines:
+            self._handle_line(line, events)
+        return events
+
+    def _handle_line(self, line: str, events: List[str]):
+        """处理一行完整的SSE数据"""
+        if not line:
+            self._dispatch(events)
+            return
+        if line.startswith("data:"):
+            value = line[5:]
+            self._data_lines.append(value[1:] if value.startswith(" ") else value)
+            return
+        if line.startswith(":"):
+            # 注释行
+            return
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            self._data_lines.append(value)
+
+    def _dispatch(self, events: List[str]):
+        """结束当前事件"""
+        if self._data_lines:
+            events.append("\n".join(self._data_lines))
+            self._data_lines = []
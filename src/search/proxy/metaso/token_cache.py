@@ -0,0 +1,186 @@
+"""
+秘塔AI meta token缓存
+
+缓存meta token和cookies并持久化到磁盘，服务重启后可直接复用：
+- 超过配置的有效期或检测到失效时重新获取
+- 后台任务在过期前主动刷新，并定期通过my-info接口低成本校验
+查询路径只读取缓存，不再为获取token加载首页。
+
+作者: 凌封（微信：fengin）
+网站: AI全书（https://aibook.ren）
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+Credentials = Tuple[str, Dict[str, str]]
+
+class MetaTokenCache:
+    """meta token缓存"""
+
+    def __init__(
+        self,
+        path: str,
+        uid: str,
+        fetch: Callable[[], Awaitable[Credentials]],
+        validate: Optional[Callable[[str, Dict[str, str]], Awaitable[bool]]] = None,
+        ttl: float = 3600,
+        refresh_margin: float = 300,
+        validate_interval: float = 600
+    ):
+        """初始化缓存
+
+        Args:
+            path: 持久化文件路径
+            uid: 用户ID，持久化的token只在uid一致时复用
+            fetch: 获取新token和cookies的协程函数（通常需要浏览器）
+            validate: 校验token是否仍然有效的协程函数
+            ttl: token有效期(秒)
+            refresh_margin: 过期前多少秒开始后台刷新
+            validate_interval: 后台校验间隔(秒)
+        """
+        self._path = path
+        self._uid = uid
+        self._fetch = fetch
+        self._validate = validate
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.validate_interval = validate_interval
+        self._token: Optional[str] = None
+        self._cookies: Dict[str, str] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self._load()
+
+    @property
+    def token(self) -> Optional[str]:
+        """当前缓存的token（可能已过期）"""
+        return self._token
+
+    @property
+    def expires_at(self) -> float:
+        """过期时间（时间戳）"""
+        return self._fetched_at + self.ttl
+
+    def is_fresh(self) -> bool:
+        """token是否存在且未过期"""
+        return self._token is not None and time.time() < self.expires_at
+
+    async def get(self) -> Credentials:
+        """获取有效的token和cookies，必要时重新获取
+
+        Returns:
+            Credentials: meta token和cookies
+        """
+        self.start_background_refresh()
+        if not self.is_fresh():
+            await self.refresh(force=False)
+        return self._token, dict(self._cookies)
+
+    def update(self, token: str, cookies: Dict[str, str]):
+        """用新获取的token更新缓存（例如浏览器顺带加载首页时）"""
+        self._token = token
+        self._cookies = dict(cookies)
+        self._fetched_at = time.time()
+        self._save()
+
+    def invalidate(self):
+        """标记token失效，下次使用前重新获取"""
+        self._fetched_at = 0.0
+
+    async def refresh(self, force: bool = True):
+        """重新获取token
+
+        Args:
+            force: 为False时，若等待锁期间其他调用已刷新则直接返回
+        """
+        async with self._lock:
+            if not force and self.is_fresh():
+                return
+            token, cookies = await self._fetch()
+            self.update(token, cookies)
+            self.refreshes += 1
+
+    async def validate(self) -> bool:
+        """通过校验函数检查token是否有效，未配置校验函数时按有效期判断"""
+        if not self.is_fresh():
+            return False
+        if self._validate is None:
+            return True
+        try:
+            return await self._validate(self._token, dict(self._cookies))
+        except Exception as e:
+            print(f"Error validating meta token: {e}", file=sys.stderr)
+            # 校验请求本身失败时不判定为失效
+            return True
+
+    def start_background_refresh(self):
+        """启动后台刷新任务（可重复调用）"""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+
+    async def stop(self):
+        """停止后台刷新任务"""
+        task, self._refresh_task = self._refresh_task, None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _refresh_loop(self):
+        """过期前主动刷新，并定期校验"""
+        failures = 0
+        while True:
+            until_refresh = self.expires_at - self.refresh_margin - time.time()
+            delay = min(until_refresh, self.validate_interval)
+            if failures:
+                # 刷新失败后指数退避，避免频繁启动浏览器
+                delay = max(delay, min(self.validate_interval, 5 * 2 ** failures))
+            await asyncio.sleep(max(1.0, delay))
+            try:
+                if self.expires_at - self.refresh_margin <= time.time() or not await self.validate():
+                    await self.refresh()
+                failures = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                failures += 1
+                print(f"Error refreshing meta token: {e}", file=sys.stderr)
+
+    def _load(self):
+        """从磁盘加载持久化的token"""
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("uid") != self._uid or not data.get("token"):
+            return
+        self._token = data["token"]
+        self._cookies = data.get("cookies", {})
+        self._fetched_at = float(data.get("fetched_at", 0))
+
+    def _save(self):
+        """持久化token到磁盘"""
+        data = {
+            "uid": self._uid,
+            "token": self._token,
+            "cookies": self._cookies,
+            "fetched_at": self._fetched_at
+        }
+        try:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            tmp_path = f"{self._path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self._path)
+        except OSError as e:
+            print(f"Error saving meta token: {e}", file=sys.stderr)
@@ -4,33 +4,33 @@ This module provides web search and academic search functionality using Metaso S
 It includes both the API implementation and tool descriptions.
 """
 
-from typing import Dict, Any
+from typing import Awaitable, Callable, Dict, Any, Optional
 import mcp.types as types
 import warnings
 import sys
 from pathlib import Path
-import os
 import time
-from .metaso.client import MetasoClient
-
-# 认证信息
-# METASO_UID = os.getenv("METASO_UID")
-METASO_UID = "67b0341c6ea19779a9be263f"
-# METASO_SID = os.getenv("METASO_SID")
-METASO_SID = "b8fb1b5a22ac4347b95e5306aae5a44d"
+from .metaso.session_pool import MetasoSessionPool
+from .metaso.config import (
+    ACCOUNTS, ACCOUNT_COOLDOWN, ACCOUNT_MAX_FAILURES, PREWARM_PAGES, JOB_WORKERS, JOB_MAX_PENDING, JOB_RESULT_TTL, RESEARCH_TIMEOUT
+)
+from .common import PARTIAL_PREFIX, JobQueue, JobQueueFull, close_http_client
+from .common.jobs import DONE, FAILED, CANCELLED
 
-if not METASO_UID or not METASO_SID:
-    raise ValueError("需要设置METASO_UID和METASO_SID环境变量")
+if not ACCOUNTS:
+    raise ValueError("需要设置METASO_ACCOUNTS，或METASO_UID和METASO_SID环境变量")
 
 # 模型配置
 MODELS = {
     "web": {
         "concise": "concise",        # 简洁模式
-        "detail": "detail"           # 深入模式（默认）
+        "detail": "detail",          # 深入模式（默认）
+        "research": "research"       # 研究模式（耗时较长，通过后台任务执行）
     },
     "scholar": {
         "concise": "concise-scholar",  # 学术-简洁模式
-        "detail": "detail-scholar"     # 学术-深入模式
+        "detail": "detail-scholar",    # 学术-深入模式
+        "research": "research-scholar" # 学术-研究模式
     }
 }
 
@@ -38,40 +38,6 @@ MODELS = {
 DEFAULT_MODEL = "detail"  # 默认使用深入模式
 DEFAULT_SCHOLAR = False   # 默认使用普通搜索
 
-# 速率限制配置
-RATE_LIMIT = {
-    "per_second": 1,
-    "per_minute": 60
-}
-
-request_count = {
-    "second": 0,
-    "minute": 0,
-    "last_reset": time.time(),
-    "last_minute_reset": time.time()
-}
-
-def check_rate_limit():
-    """检查并更新速率限制"""
-    now = time.time()
-    
-    # 重置秒级计数器
-    if now - request_count["last_reset"] > 1:
-        request_count["second"] = 0
-        request_count["last_reset"] = now
-        
-    # 重置分钟级计数器
-    if now - request_count["last_minute_reset"] > 60:
-        request_count["minute"] = 0
-        request_count["last_minute_reset"] = now
-    
-    if (request_count["second"] >= RATE_LIMIT["per_second"] or 
-        request_count["minute"] >= RATE_LIMIT["per_minute"]):
-        raise Exception("超出速率限制")
-    
-    request_count["second"] += 1
-    request_count["minute"] += 1
-
 def get_tool_descriptions() -> list[types.Tool]:
     """返回Metaso搜索工具的描述列表"""
     return [
@@ -97,6 +63,15 @@ def get_tool_descriptions() -> list[types.Tool]:
                         "description": "搜索模式(concise:简洁, detail:深入)",
                         "enum": ["concise", "detail"],
                         "default": "detail"
+                    },
+                    "deadline": {
+                        "type": "number",
+                        "description": "最长等待秒数，到期时返回已生成的部分回答和参考文献",
+                        "exclusiveMinimum": 0
+                    },
+                    "conversation_id": {
+                        "type": "string",
+                        "description": "追问时传入之前结果中的会话ID，在原会话中继续提问，复用已有的检索结果"
                     }
                 },
                 "required": ["query"]
@@ -124,13 +99,80 @@ def get_tool_descriptions() -> list[types.Tool]:
                         "description": "搜索模式(concise:简洁, detail:深入)",
                         "enum": ["concise", "detail"],
                         "default": "detail"
+                    },
+                    "deadline": {
+                        "type": "number",
+                        "description": "最长等待秒数，到期时返回已生成的部分回答和参考文献",
+                        "exclusiveMinimum": 0
+                    },
+                    "conversation_id": {
+                        "type": "string",
+                        "description": "追问时传入之前结果中的会话ID，在原会话中继续提问，复用已有的检索结果"
+                    }
+                },
+                "required": ["query"]
+            }
+        ),
+        types.Tool(
+            name="research_submit",
+            description=(
+                "提交研究模式搜索任务，立即返回任务ID。"
+                "研究模式会进行多轮检索和深度分析，通常需要数分钟，"
+                "之后用research_poll获取结果。"
+                "（当前使用Metaso Search API实现）"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "query": {
+                        "type": "string",
+                        "description": "研究问题"
+                    },
+                    "scholar": {
+                        "type": "boolean",
+                        "description": "是否使用学术研究模式",
+                        "default": False
                     }
                 },
                 "required": ["query"]
             }
+        ),
+        types.Tool(
+            name="research_poll",
+            description=(
+                "查询研究任务的状态。任务完成时返回研究结果，结果只返回一次，"
+                "未及时获取的结果会在一段时间后过期。"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "research_submit返回的任务ID"
+                    }
+                },
+                "required": ["job_id"]
+            }
+        ),
+        types.Tool(
+            name="research_cancel",
+            description="取消排队中或执行中的研究任务。",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {
+                        "type": "string",
+                        "description": "research_submit返回的任务ID"
+                    }
+                },
+                "required": ["job_id"]
+            }
         )
     ]
 
+# 研究任务相关工具，结果随任务状态变化，不能缓存或合并
+JOB_TOOLS = ("research_submit", "research_poll", "research_cancel")
+
 # 配置 Windows asyncio 事件循环
 if sys.platform == 'win32':
     # 忽略 ResourceWarning
@@ -140,34 +182,115 @@ if sys.platform == 'win32':
 browser_data_dir = Path(__file__).parent / "metaso/browser_data"
 browser_data_dir.mkdir(parents=True, exist_ok=True)
 
-# 创建客户端实例
-client = MetasoClient(
-    METASO_UID, 
-    METASO_SID,
-    browser_data_dir=str(browser_data_dir)
+# 创建客户端实例：账号来自METASO_ACCOUNTS或METASO_UID/METASO_SID
+client = MetasoSessionPool(
+    ACCOUNTS,
+    browser_data_dir=str(browser_data_dir),
+    cooldown=ACCOUNT_COOLDOWN,
+    max_failures=ACCOUNT_MAX_FAILURES
+)
+
+# 研究模式后台任务队列
+research_jobs = JobQueue(
+    workers=JOB_WORKERS,
+    max_pending=JOB_MAX_PENDING,
+    result_ttl=JOB_RESULT_TTL
 )
 
-async def handle_tool_call(name: str, arguments: Dict[str, Any]) -> types.TextContent:
-    """统一处理工具调用"""
+async def prewarm() -> None:
+    """启动浏览器、预热页面并获取meta token，使首次搜索无需等待初始化"""
+    await client.prewarm(PREWARM_PAGES)
+
+async def shutdown() -> None:
+    """取消研究任务，关闭浏览器，释放playwright资源和共享连接池"""
+    await research_jobs.close()
+    await client.close()
+    await close_http_client()
+
+async def handle_tool_call(
+    name: str,
+    arguments: Dict[str, Any],
+    progress: Optional[Callable[[str], Awaitable[None]]] = None
+) -> types.TextContent:
+    """统一处理工具调用
+    
+    Args:
+        name: 工具名称
+        arguments: 工具参数
+        progress: 进度回调，回答内容边生成边转发，最终结果仍完整返回
+    """
+    if name in JOB_TOOLS:
+        return types.TextContent(type="text", text=handle_job_tool(name, arguments))
+        
     if not arguments or "query" not in arguments:
         raise ValueError("缺少query参数")
 
     query = arguments["query"]
     mode = arguments.get("mode", DEFAULT_MODEL)
+    deadline = arguments.get("deadline")
+    conversation_id = arguments.get("conversation_id")
     
     if name == "search":
-        results = await perform_search(query, mode, is_scholar=False)
+        results = await perform_search(
+            query, mode, is_scholar=False, progress=progress,
+            deadline=deadline, conversation_id=conversation_id
+        )
     elif name == "scholar_search":
-        results = await perform_search(query, mode, is_scholar=True)
+        results = await perform_search(
+            query, mode, is_scholar=True, progress=progress,
+            deadline=deadline, conversation_id=conversation_id
+        )
     else:
         raise ValueError(f"Metaso搜索不支持的工具: {name}")
         
     return types.TextContent(type="text", text=results)
 
-async def perform_search(query: str, mode: str = DEFAULT_MODEL, is_scholar: bool = DEFAULT_SCHOLAR) -> str:
-    """执行搜索"""
-    check_rate_limit()
+def handle_job_tool(name: str, arguments: Dict[str, Any]) -> str:
+    """处理研究任务的提交、查询和取消"""
+    if name == "research_submit":
+        if not arguments or "query" not in arguments:
+            raise ValueError("缺少query参数")
+        query = arguments["query"]
+        is_scholar = arguments.get("scholar", False)
+        try:
+            job_id = research_jobs.submit(
+                lambda: perform_search(query, "research", is_scholar=is_scholar, deadline=RESEARCH_TIMEOUT)
+            )
+        except JobQueueFull as e:
+            raise Exception(f"研究任务提交失败: {e}")
+        return f"研究任务已提交，任务ID: {job_id}\n请稍后使用research_poll查询结果。"
+        
+    if not arguments or "job_id" not in arguments:
+        raise ValueError("缺少job_id参数")
+    job_id = arguments["job_id"]
     
+    if name == "research_cancel":
+        if research_jobs.cancel(job_id):
+            return f"研究任务已取消: {job_id}"
+        return f"任务不存在或已结束: {job_id}"
+        
+    job = research_jobs.get(job_id, pop_finished=True)
+    if job is None:
+        return f"任务不存在或结果已过期: {job_id}"
+    if job.status == DONE:
+        return job.result
+    if job.status == FAILED:
+        return f"研究任务失败: {job.error}"
+    if job.status == CANCELLED:
+        return f"研究任务已取消: {job_id}"
+    if job.started_at is not None:
+        return f"研究任务执行中，已用时{time.time() - job.started_at:.0f}秒，请稍后再查询。"
+    return f"研究任务排队中，前面还有{research_jobs.position(job_id)}个任务，请稍后再查询。"
+
+async def perform_search(
+    query: str,
+    mode: str = DEFAULT_MODEL,
+    is_scholar: bool = DEFAULT_SCHOLAR,
+    progress: Optional[Callable[[str], Awaitable[None]]] = None,
+    deadline: Optional[float] = None,
+    conversation_id: Optional[str] = None
+) -> str:
+    """执行搜索"""
     # 确定使用的模型
     model_type = "scholar" if is_scholar else "web"
     if mode not in MODELS[model_type]:
@@ -175,29 +298,38 @@ async def perform_search(query: str, mode: str = DEFAULT_MODEL, is_scholar: bool
     model = MODELS[model_type][mode]
     
     try:
-        # 使用MetasoClient执行搜索
-        async with client as c:  # 使用上下文管理器
-            result = await c.get_completion(query, model=model)
-            
-            # 处理返回结果
-            content = result.get("content", "")
-            if not content:
-                raise Exception("API返回内容为空")
-                
-            references = result.get("references", [])
+        # 复用长期运行的浏览器执行搜索，首次调用时自动启动
+        result = await client.get_completion(
+            query, model=model, on_chunk=progress,
+            deadline=deadline, conversation_id=conversation_id
+        )
+        
+        # 处理返回结果
+        content = result.get("content", "")
+        partial = result.get("partial", False)
+        if not content and not partial:
+            raise Exception("API返回内容为空")
             
-            # 格式化输出
-            output = [content, "\n\n参考文献:"]
+        references = result.get("references", [])
+        
+        # 格式化输出
+        output = [content, "\n\n参考文献:"]
+        if partial:
+            output.insert(0, f"{PARTIAL_PREFIX} 已达到{deadline}秒截止时间，以下回答未生成完整。\n")
+        
+        for i, ref in enumerate(references, 1):
+            output.append(
+                f"\n[{i}] {ref.get('title', '无标题')}"
+                f"\n    链接: {ref.get('link', '无链接')}"
+                f"\n    来源: {ref.get('source', '未知来源')}"
+                f"\n    日期: {ref.get('date', '未知日期')}"
+            )
             
-            for i, ref in enumerate(references, 1):
-                output.append(
-                    f"\n[{i}] {ref.get('title', '无标题')}"
-                    f"\n    链接: {ref.get('link', '无链接')}"
-                    f"\n    来源: {ref.get('source', '未知来源')}"
-                    f"\n    日期: {ref.get('date', '未知日期')}"
-                )
-                
-            return "\n".join(output)
+        conv_id = result.get("meta", {}).get("conversation_id")
+        if conv_id:
+            output.append(f"\n\n会话ID: {conv_id}（追问时传入conversation_id可在此会话中继续提问）")
             
+        return "\n".join(output)
+        
     except Exception as e:
         raise Exception(f"搜索执行错误: {str(e)}") 
\ No newline at end of file
@@ -5,51 +5,68 @@
 
 from typing import Any, Dict, List, Optional
 import asyncio
+import importlib
+import inspect
 import os
 from mcp.server.models import InitializationOptions
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
+from mcp.server.session import ServerSession
 import mcp.server.stdio
+import sys
 from sys import stdin, stdout
 
 # mcp核心协议源码对unicode编码处理还有bug，需手动指定为utf-8
-stdin.reconfigure(encoding='utf-8')
-stdout.reconfigure(encoding='utf-8')
+# （被替换为不支持reconfigure的流时跳过，例如在pytest中导入）
+for stream in (stdin, stdout):
+    if hasattr(stream, "reconfigure"):
+        stream.reconfigure(encoding='utf-8')
 
-# 导入搜索引擎模块
-from .proxy.brave_search import (
-    handle_tool_call as brave_handle_tool,
-    get_tool_descriptions as brave_tools
-)
-from .proxy.metaso_search import (
-    handle_tool_call as metaso_handle_tool,
-    get_tool_descriptions as metaso_tools
-)
-from .proxy.bocha_search import (
-    handle_tool_call as bocha_handle_tool,
-    get_tool_descriptions as bocha_tools
-)
+from .cache import ResultCache, make_cache_key
+from .config import CACHE_CONFIG, COALESCE_ENABLED, PREWARM_ENABLED, PREFETCH_CONFIG
+from .prefetch import Prefetcher, next_page_arguments
+from .proxy.common import PARTIAL_PREFIX
+from .singleflight import SingleFlight
 
-# 搜索引擎配置
+# 搜索引擎配置：引擎模块在首次使用时才导入，只加载当前选择的引擎及其依赖
+# （例如只有秘塔引擎需要Playwright和浏览器），字符串值为引擎模块中的属性名
 SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "bocha")
 AVAILABLE_ENGINES = {
     "brave": {
-        "handle_tool": brave_handle_tool,
-        "tools": brave_tools,
+        "module": ".proxy.brave_search",
+        "handle_tool": "handle_tool_call",
+        "tools": "get_tool_descriptions",
+        "shutdown": "shutdown",
+        "headroom": "rate_limit_headroom",
+        "request_count": "upstream_request_count",
+        "paginate": {"search": "offset"},  # 分页工具及其分页参数，用于预取下一页
         "description": "Brave Search API，支持网络搜索和位置搜索"
     },
     "metaso": {
-        "handle_tool": metaso_handle_tool,
-        "tools": metaso_tools,
+        "module": ".proxy.metaso_search",
+        "handle_tool": "handle_tool_call",
+        "tools": "get_tool_descriptions",
+        "prewarm": "prewarm",
+        "shutdown": "shutdown",
+        "supports_progress": True,  # handle_tool接受progress回调，边生成边转发回答内容
+        "uncached_tools": "JOB_TOOLS",  # 结果随调用时机变化的工具，不缓存也不合并
         "description": "Metaso Search API，支持网络搜索和学术搜索，提供简洁、深入、研究三种模式"
     },
     "bocha": {
-        "handle_tool": bocha_handle_tool,
-        "tools": bocha_tools,
+        "module": ".proxy.bocha_search",
+        "handle_tool": "handle_tool_call",
+        "tools": "get_tool_descriptions",
+        "shutdown": "shutdown",
+        "headroom": "rate_limit_headroom",
+        "request_count": "upstream_request_count",
+        "paginate": {"search": "page"},
         "description": "博查搜索API，支持网络搜索，提供时间范围过滤、详细摘要等功能"
     }
 }
 
+# 需要从引擎模块中解析的属性
+ENGINE_ATTRIBUTES = ("handle_tool", "tools", "prewarm", "shutdown", "uncached_tools", "headroom", "request_count")
+
 if SEARCH_ENGINE not in AVAILABLE_ENGINES:
     raise ValueError(
         f"不支持的搜索引擎: {SEARCH_ENGINE}\n"
@@ -60,10 +77,162 @@ if SEARCH_ENGINE not in AVAILABLE_ENGINES:
 
 server = Server("search")
 
+# 工具调用结果缓存
+result_cache = ResultCache(
+    max_entries=CACHE_CONFIG["max_entries"],
+    max_bytes=CACHE_CONFIG["max_bytes"],
+    ttls=CACHE_CONFIG["ttl"]
+)
+
+# 相同并发请求合并
+inflight = SingleFlight()
+
+# 以这些前缀开头的结果表示搜索出错或结果不完整，不写入缓存
+ERROR_PREFIXES = ("错误:", "搜索执行错误:", "搜索失败:", PARTIAL_PREFIX)
+
+# 表示没有结果的返回内容，此时不预取下一页
+EMPTY_RESULTS = ("", "未找到相关结果")
+
+# 分页搜索的下一页预取
+prefetcher = Prefetcher(
+    budget=PREFETCH_CONFIG["budget"],
+    min_headroom=PREFETCH_CONFIG["min_headroom"],
+    max_wait=PREFETCH_CONFIG["max_wait"],
+    unused_after=PREFETCH_CONFIG["unused_after"],
+    backoff_after=PREFETCH_CONFIG["backoff_after"],
+    backoff=PREFETCH_CONFIG["backoff"]
+)
+
+# 引擎预热完成（无论成功与否）后设置，工具调用在此之前等待
+engine_ready = asyncio.Event()
+_prewarm_task: Optional[asyncio.Task] = None
+
+# 已加载的当前搜索引擎
+_engine: Optional[Dict[str, Any]] = None
+_engine_lock = asyncio.Lock()
+
+def import_engine(name: str) -> Dict[str, Any]:
+    """导入搜索引擎模块，把配置中的属性名解析为模块中的对象"""
+    spec = AVAILABLE_ENGINES[name]
+    module = importlib.import_module(spec["module"], __package__)
+    return {
+        key: getattr(module, value) if key in ENGINE_ATTRIBUTES else value
+        for key, value in spec.items()
+    }
+
+async def get_engine() -> Dict[str, Any]:
+    """获取当前搜索引擎，首次调用时在线程中导入，不阻塞MCP握手等其他请求"""
+    global _engine
+    if _engine is None:
+        async with _engine_lock:
+            if _engine is None:
+                _engine = await asyncio.to_thread(import_engine, SEARCH_ENGINE)
+    return _engine
+
+_tool_defaults: Dict[str, Dict[str, Any]] = {}
+
+def get_tool_defaults(engine: Dict[str, Any], name: str) -> Dict[str, Any]:
+    """从工具的inputSchema中读取参数默认值"""
+    if not _tool_defaults:
+        for tool in engine["tools"]():
+            _tool_defaults[tool.name] = {
+                prop: spec["default"]
+                for prop, spec in tool.inputSchema.get("properties", {}).items()
+                if "default" in spec
+            }
+    return _tool_defaults.get(name, {})
+
+def is_cacheable(result: types.TextContent | types.ImageContent | types.EmbeddedResource) -> bool:
+    """判断工具结果是否可以缓存"""
+    return isinstance(result, types.TextContent) and not result.text.startswith(ERROR_PREFIXES)
+
+# 较早的mcp版本的进度通知不支持message参数，此时只发送进度计数
+PROGRESS_MESSAGE_SUPPORTED = "message" in inspect.signature(
+    ServerSession.send_progress_notification
+).parameters
+
+def make_progress_callback():
+    """客户端请求了进度通知时，创建把回答片段作为进度消息转发的回调"""
+    try:
+        ctx = server.request_context
+    except LookupError:
+        return None
+    progress_token = ctx.meta.progressToken if ctx.meta else None
+    if progress_token is None:
+        return None
+    progress = 0
+
+    async def report(message: str):
+        nonlocal progress
+        progress += 1
+        try:
+            if PROGRESS_MESSAGE_SUPPORTED:
+                await ctx.session.send_progress_notification(
+                    progress_token, progress, message=message
+                )
+            else:
+                await ctx.session.send_progress_notification(progress_token, progress)
+        except Exception as e:
+            # 进度通知失败不影响搜索本身
+            print(f"Error sending progress notification: {e}", file=sys.stderr)
+
+    return report
+
+async def call_upstream(
+    engine: Dict[str, Any],
+    name: str,
+    arguments: Dict[str, Any],
+    cache_key: Any,
+    progress=None
+) -> List[types.TextContent | types.ImageContent | types.EmbeddedResource]:
+    """调用搜索引擎，结果可缓存时写入缓存"""
+    if progress:
+        result = await engine["handle_tool"](name, arguments, progress=progress)
+    else:
+        result = await engine["handle_tool"](name, arguments)
+    if CACHE_CONFIG["enabled"] and is_cacheable(result):
+        result_cache.set(cache_key, [result], len(result.text.encode("utf-8")))
+    return [result]
+
+def maybe_prefetch(
+    engine: Dict[str, Any],
+    name: str,
+    arguments: Dict[str, Any],
+    defaults: Dict[str, Any],
+    result: List[types.TextContent | types.ImageContent | types.EmbeddedResource]
+) -> None:
+    """返回分页搜索的一页后，在后台预取下一页"""
+    if not (PREFETCH_CONFIG["enabled"] and CACHE_CONFIG["enabled"]):
+        return
+    param = engine.get("paginate", {}).get(name)
+    if not param or "headroom" not in engine:
+        return
+    if not result or not is_cacheable(result[0]) or result[0].text.strip() in EMPTY_RESULTS:
+        return
+    next_arguments = next_page_arguments(arguments, param, defaults)
+    next_key = make_cache_key(SEARCH_ENGINE, name, next_arguments, defaults)
+    if next_key in result_cache:
+        return
+
+    async def fetch() -> bool:
+        if COALESCE_ENABLED:
+            # 预取进行中时到达的同一页请求与预取合并
+            await inflight.do(
+                next_key, lambda: call_upstream(engine, name, next_arguments, next_key)
+            )
+        else:
+            await call_upstream(engine, name, next_arguments, next_key)
+        return next_key in result_cache
+
+    # 需要的速率余量按预取实际发出的上游请求数计算
+    requests = engine["request_count"](name, next_arguments) if "request_count" in engine else 1
+    prefetcher.schedule(next_key, fetch, engine["headroom"], requests)
+
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
     """列出可用的搜索工具"""
-    return AVAILABLE_ENGINES[SEARCH_ENGINE]["tools"]()
+    engine = await get_engine()
+    return engine["tools"]()
 
 @server.call_tool()
 async def handle_call_tool(
@@ -75,8 +244,39 @@ async def handle_call_tool(
         if not arguments:
             raise ValueError("缺少参数")
             
-        result = await AVAILABLE_ENGINES[SEARCH_ENGINE]["handle_tool"](name, arguments)
-        return [result]
+        engine = await get_engine()
+        # 预热进行中时等待其完成，而不是各自重复初始化（不缓存的工具同样需要等待）
+        if _prewarm_task is not None:
+            await engine_ready.wait()
+
+        if name in engine.get("uncached_tools", ()):
+            return [await engine["handle_tool"](name, arguments)]
+            
+        defaults = get_tool_defaults(engine, name)
+        cache_key = make_cache_key(SEARCH_ENGINE, name, arguments, defaults)
+        if PREFETCH_CONFIG["enabled"]:
+            prefetcher.record_request(cache_key)
+        if CACHE_CONFIG["enabled"]:
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                maybe_prefetch(engine, name, arguments, defaults, cached)
+                return cached
+
+        # 合并的并发请求只有第一个调用方收到进度通知，其余等待最终结果
+        progress = make_progress_callback() if engine.get("supports_progress") else None
+
+        if COALESCE_ENABLED:
+            # 截止时间不影响完整结果的缓存，但可能得到部分结果，只与相同截止时间的请求合并
+            flight_key = cache_key
+            if arguments.get("deadline") is not None:
+                flight_key = (*cache_key, ("deadline", arguments["deadline"]))
+            result = await inflight.do(
+                flight_key, lambda: call_upstream(engine, name, arguments, cache_key, progress)
+            )
+        else:
+            result = await call_upstream(engine, name, arguments, cache_key, progress)
+        maybe_prefetch(engine, name, arguments, defaults, result)
+        return result
             
     except Exception as e:
         return [types.TextContent(
@@ -84,21 +284,70 @@ async def handle_call_tool(
             text=f"错误: {str(e)}"
         )]
 
+def is_engine_ready() -> bool:
+    """搜索引擎是否已完成预热（未启用预热时始终为True）"""
+    return _prewarm_task is None or engine_ready.is_set()
+
+async def prewarm_engine():
+    """在后台预热当前搜索引擎，失败时由首次工具调用按需初始化"""
+    try:
+        engine = await get_engine()
+        await engine["prewarm"]()
+    except Exception as e:
+        print(f"Error during prewarm: {e}", file=sys.stderr)
+    finally:
+        engine_ready.set()
+
+async def shutdown_engine():
+    """释放当前搜索引擎持有的资源（连接池、浏览器等），引擎未加载时无需处理"""
+    if _engine is None:
+        return
+    shutdown = _engine.get("shutdown")
+    if shutdown:
+        try:
+            await shutdown()
+        except Exception as e:
+            print(f"Error during shutdown: {e}", file=sys.stderr)
+
+def log_stats():
+    """把缓存等运行统计输出到stderr（stdout是MCP协议通道）"""
+    if CACHE_CONFIG["enabled"]:
+        print(f"Result cache stats: {result_cache.stats()}", file=sys.stderr)
+    if COALESCE_ENABLED:
+        print(f"Request coalescing stats: {inflight.stats()}", file=sys.stderr)
+    if PREFETCH_CONFIG["enabled"]:
+        print(f"Prefetch stats: {prefetcher.stats()}", file=sys.stderr)
+
 async def main():
-    # 使用标准输入/输出流运行服务器
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="search",
-                server_version="0.0.1",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+    global _prewarm_task
+    if PREWARM_ENABLED and "prewarm" in AVAILABLE_ENGINES[SEARCH_ENGINE]:
+        # 与MCP握手并行进行
+        _prewarm_task = asyncio.create_task(prewarm_engine())
+    try:
+        # 使用标准输入/输出流运行服务器
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="search",
+                    server_version="0.0.1",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
+    finally:
+        await prefetcher.close()
+        if _prewarm_task is not None and not _prewarm_task.done():
+            _prewarm_task.cancel()
+            try:
+                await _prewarm_task
+            except asyncio.CancelledError:
+                pass
+        await shutdown_engine()
+        log_stats()
 
 # 如果你想连接到自定义客户端，这是必需的
 if __name__ == "__main__":
@@ -0,0 +1,70 @@
+"""Single-flight coalescing of identical in-flight calls
+
+The first caller for a key starts the upstream call; identical callers that
+arrive while it is still running await the same task instead of sending their
+own request. A cancelled waiter only stops waiting: the shared call keeps
+running while anyone else still waits for it.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+class _Call:
+    """一次正在进行的共享调用"""
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    """合并相同键的并发调用"""
+
+    def __init__(self):
+        """初始化"""
+        self._calls: Dict[Hashable, _Call] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """执行调用，相同键的并发调用共享同一个结果
+
+        Args:
+            key: 调用键
+            fn: 实际执行调用的协程函数
+
+        Returns:
+            T: 调用结果（异常同样会传递给所有等待者）
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+        self.calls += 1
+
+        call.waiters += 1
+        try:
+            # shield保证单个等待者被取消时不会取消共享调用
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                # 所有等待者都已离开，取消共享调用
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        """调用结束后移除记录"""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def stats(self) -> Dict[str, int]:
+        """获取统计信息"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls)
+        }
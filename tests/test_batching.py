@@ -0,0 +1,91 @@
+"""键批量合并测试：时间窗口内合并、批次上限、共享进行中的键和异常传递"""
+
+import asyncio
+
+import pytest
+
+from search.proxy.common import MicroBatcher
+
+class RecordingFetch:
+    """记录每批请求的键，返回 键 -> 值"""
+
+    def __init__(self, missing=(), delay: float = 0):
+        self.batches = []
+        self.missing = set(missing)
+        self.delay = delay
+
+    async def __call__(self, keys):
+        self.batches.append(list(keys))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return {key: f"value-{key}" for key in keys if key not in self.missing}
+
+def test_concurrent_loads_are_merged_into_one_batch():
+    async def main():
+        fetch = RecordingFetch(missing={"c"})
+        batcher = MicroBatcher(fetch, max_batch=10, window=0.01)
+        first, second = await asyncio.gather(batcher.load(["a", "b"]), batcher.load(["b", "c"]))
+        assert first == {"a": "value-a", "b": "value-b"}
+        # 不存在的键不包含在结果中
+        assert second == {"b": "value-b"}
+        assert fetch.batches == [["a", "b", "c"]]
+        assert batcher.stats()["requested"] == 4
+        assert batcher.stats()["fetched"] == 3
+
+    asyncio.run(main())
+
+def test_batches_are_split_at_max_batch():
+    async def main():
+        fetch = RecordingFetch()
+        batcher = MicroBatcher(fetch, max_batch=2, window=0.01)
+        result = await batcher.load(["a", "b", "c", "d", "e"])
+        assert len(result) == 5
+        assert sorted(len(batch) for batch in fetch.batches) == [1, 2, 2]
+
+    asyncio.run(main())
+
+def test_inflight_keys_are_shared():
+    async def main():
+        fetch = RecordingFetch(delay=0.05)
+        batcher = MicroBatcher(fetch, max_batch=10, window=0.001)
+        first = asyncio.ensure_future(batcher.load(["a"]))
+        await asyncio.sleep(0.01)
+        # a正在获取中，不重复请求
+        second = await batcher.load(["a", "b"])
+        assert await first == {"a": "value-a"}
+        assert second == {"a": "value-a", "b": "value-b"}
+        assert fetch.batches == [["a"], ["b"]]
+
+    asyncio.run(main())
+
+def test_fetch_error_is_raised_to_every_caller_in_the_batch():
+    async def main():
+        async def fail(keys):
+            raise RuntimeError("batch failed")
+
+        batcher = MicroBatcher(fail, max_batch=10, window=0.001)
+        results = await asyncio.gather(
+            batcher.load(["a"]), batcher.load(["b"]), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    asyncio.run(main())
+
+def test_cancelled_caller_does_not_cancel_shared_keys():
+    async def main():
+        fetch = RecordingFetch(delay=0.05)
+        batcher = MicroBatcher(fetch, max_batch=10, window=0.001)
+        first = asyncio.ensure_future(batcher.load(["a"]))
+        second = asyncio.ensure_future(batcher.load(["a"]))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert await second == {"a": "value-a"}
+        assert fetch.batches == [["a"]]
+
+    asyncio.run(main())
+
+def test_max_batch_must_be_positive():
+    with pytest.raises(ValueError):
+        MicroBatcher(RecordingFetch(), max_batch=0)
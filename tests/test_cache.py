@@ -0,0 +1,82 @@
+"""结果缓存测试：缓存键规范化、TTL过期和LRU淘汰"""
+
+import pytest
+
+from search import cache as cache_module
+from search.cache import ResultCache, make_cache_key
+
+class FakeClock:
+    """可手动推进的monotonic时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+def test_cache_key_normalizes_equivalent_arguments():
+    defaults = {"count": 10, "offset": 0}
+    key = make_cache_key("brave", "search", {"query": "  hello   world "}, defaults)
+    assert key == make_cache_key("brave", "search", {"query": "hello world", "count": 10.0, "offset": 0}, defaults)
+    assert key != make_cache_key("brave", "search", {"query": "hello world", "count": 20}, defaults)
+    # 不参与缓存键的参数（如deadline）不影响结果
+    assert key == make_cache_key("brave", "search", {"query": "hello world", "deadline": 5}, defaults)
+
+def test_entries_expire_after_engine_ttl(clock):
+    cache = ResultCache(max_entries=10, max_bytes=1000, ttls={"brave": 60})
+    key = ("brave", "search", ())
+    assert cache.set(key, "value", 5)
+    assert cache.get(key) == "value"
+
+    clock.now += 59
+    assert key in cache
+    clock.now += 1
+    assert key not in cache
+    assert cache.get(key) is None
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+def test_zero_ttl_and_oversized_values_are_not_cached():
+    cache = ResultCache(max_entries=10, max_bytes=100, ttls={"brave": 60, "metaso": 0})
+    assert not cache.set(("metaso", "search", ()), "value", 5)
+    assert not cache.set(("bocha", "search", ()), "value", 5)
+    assert not cache.set(("brave", "search", ()), "value", 101)
+    assert len(cache) == 0
+
+def test_lru_eviction_by_entry_count(clock):
+    cache = ResultCache(max_entries=2, max_bytes=1000, ttls={"brave": 60})
+    first, second, third = (("brave", "search", (("query", q),)) for q in "abc")
+    cache.set(first, 1, 1)
+    cache.set(second, 2, 1)
+    # 读取first使其成为最近使用的条目，随后淘汰second
+    assert cache.get(first) == 1
+    cache.set(third, 3, 1)
+    assert first in cache
+    assert second not in cache
+    assert third in cache
+    assert cache.stats()["evictions"] == 1
+
+def test_lru_eviction_by_byte_size(clock):
+    cache = ResultCache(max_entries=10, max_bytes=10, ttls={"brave": 60})
+    first, second, third = (("brave", "search", (("query", q),)) for q in "abc")
+    cache.set(first, 1, 4)
+    cache.set(second, 2, 4)
+    cache.set(third, 3, 4)
+    assert first not in cache
+    assert second in cache and third in cache
+    assert cache.stats()["bytes"] == 8
+
+def test_overwrite_updates_byte_count(clock):
+    cache = ResultCache(max_entries=10, max_bytes=10, ttls={"brave": 60})
+    key = ("brave", "search", ())
+    cache.set(key, "old", 8)
+    cache.set(key, "new", 3)
+    assert cache.get(key) == "new"
+    assert cache.stats()["bytes"] == 3
+    assert cache.stats()["evictions"] == 0
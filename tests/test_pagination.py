@@ -0,0 +1,150 @@
+"""自动分页测试：分页计算、按页顺序产出、提前停止和部分失败"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from search import server
+from search.cache import ResultCache
+from search.proxy import brave_search
+from search.proxy.brave import client as brave_client
+from search.proxy.brave.client import BraveClient
+from search.proxy.common import PARTIAL_PREFIX, collect_results, http_client, iter_pages, plan_pages
+
+def test_plan_pages():
+    assert plan_pages(0, 10, 10) == (range(0, 1), 0)
+    assert plan_pages(0, 25, 10) == (range(0, 3), 0)
+    assert plan_pages(15, 10, 10) == (range(1, 3), 5)
+    # 超出接口允许的页数时截断到最后一页
+    assert plan_pages(0, 100, 20, max_pages=3) == (range(0, 3), 0)
+
+def test_plan_pages_rejects_first_result_out_of_range():
+    with pytest.raises(ValueError, match="分页超出范围"):
+        plan_pages(60, 10, 20, max_pages=3)
+
+def make_pages(pages, fail=(), last=None, started=None):
+    """每页返回[页码*10, 页码*10+10)，fail中的页抛出异常，last页表示没有后续结果"""
+    async def fetch_page(page):
+        if started is not None:
+            started.append(page)
+        await asyncio.sleep(0.01 * (len(pages) - page))
+        if page in fail:
+            raise RuntimeError(f"page {page} failed")
+        return list(range(page * 10, page * 10 + 10)), page != last
+    return fetch_page
+
+def test_iter_pages_yields_in_page_order_with_concurrency():
+    async def main():
+        pages = range(4)
+        results = [page async for page in iter_pages(make_pages(pages), pages, concurrency=3, skip=5)]
+        assert [page[0] for page in results] == [5, 10, 20, 30]
+        assert len(results[0]) == 5
+
+    asyncio.run(main())
+
+def test_iter_pages_stops_when_no_more_results():
+    async def main():
+        pages = range(5)
+        started = []
+        results = [page async for page in iter_pages(make_pages(pages, last=1, started=started), pages)]
+        assert len(results) == 2
+        assert started == [0, 1]
+
+    asyncio.run(main())
+
+def test_collect_results_deduplicates_and_stops_at_count():
+    async def main():
+        async def fetch_page(page):
+            return [page, page + 1, page + 2], True
+
+        results, error = await collect_results(iter_pages(fetch_page, range(5)), 4, key=lambda item: item)
+        assert results == [0, 1, 2, 3]
+        assert error is None
+
+    asyncio.run(main())
+
+def test_collect_results_raises_when_first_page_fails():
+    async def main():
+        pages = range(3)
+        with pytest.raises(RuntimeError, match="page 0 failed"):
+            await collect_results(iter_pages(make_pages(pages, fail={0}), pages), 30, key=lambda item: item)
+
+    asyncio.run(main())
+
+def test_collect_results_returns_error_when_later_page_fails():
+    async def main():
+        pages = range(3)
+        results, error = await collect_results(
+            iter_pages(make_pages(pages, fail={1}), pages, concurrency=2), 30, key=lambda item: item
+        )
+        assert results == list(range(10))
+        assert isinstance(error, RuntimeError)
+
+    asyncio.run(main())
+
+def brave_transport(fail_offsets):
+    """模拟Brave网络搜索接口，fail_offsets中的分页返回500"""
+    def handler(request):
+        offset = int(request.url.params["offset"])
+        if offset in fail_offsets:
+            return httpx.Response(500, text="upstream error")
+        count = int(request.url.params["count"])
+        results = [
+            {"title": f"t{offset}-{i}", "description": "d", "url": f"https://example.com/{offset}/{i}"}
+            for i in range(count)
+        ]
+        return httpx.Response(200, json={"web": {"results": results}, "query": {"more_results_available": True}})
+    return httpx.MockTransport(handler)
+
+@pytest.fixture
+def brave_engine(monkeypatch):
+    """使用模拟接口的Brave引擎和空的结果缓存"""
+    async def no_rate_limit(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(brave_client, "check_rate_limit", no_rate_limit)
+    monkeypatch.setattr(brave_search, "_client", BraveClient(api_key="test-key"))
+    monkeypatch.setattr(server, "result_cache", ResultCache(max_entries=10, max_bytes=1 << 20, ttls={"brave": 600}))
+    monkeypatch.setitem(server.CACHE_CONFIG, "enabled", True)
+    monkeypatch.setattr(server, "SEARCH_ENGINE", "brave")
+
+    async def use_transport(transport):
+        """在当前事件循环中用模拟接口替换共享连接池"""
+        http_client._client = httpx.AsyncClient(transport=transport)
+        http_client._client_loop = asyncio.get_running_loop()
+
+    yield {"handle_tool": brave_search.handle_tool_call}, use_transport
+    http_client._client = None
+    http_client._client_loop = None
+
+def test_partial_results_are_marked_and_not_cached(brave_engine):
+    """第一页之后的请求失败时，不完整的结果不能被当作完整结果缓存"""
+    engine, use_transport = brave_engine
+
+    async def main():
+        await use_transport(brave_transport(fail_offsets={1}))
+        key = ("brave", "search", (("query", "q"), ("count", 40)))
+        result = await server.call_upstream(engine, "search", {"query": "q", "count": 40}, key)
+        await http_client.close_http_client()
+        return key, result[0].text
+
+    key, text = asyncio.run(main())
+    assert text.startswith(PARTIAL_PREFIX)
+    assert "t0-19" in text
+    assert key not in server.result_cache
+
+def test_complete_results_are_cached(brave_engine):
+    engine, use_transport = brave_engine
+
+    async def main():
+        await use_transport(brave_transport(fail_offsets=set()))
+        key = ("brave", "search", (("query", "q"), ("count", 40)))
+        result = await server.call_upstream(engine, "search", {"query": "q", "count": 40}, key)
+        await http_client.close_http_client()
+        return key, result[0].text
+
+    key, text = asyncio.run(main())
+    assert not text.startswith(PARTIAL_PREFIX)
+    assert text.count("标题:") == 40
+    assert key in server.result_cache
@@ -0,0 +1,118 @@
+"""下一页预取测试：速率余量、预算、命中与浪费统计和退避"""
+
+import asyncio
+
+from search.prefetch import Prefetcher, next_page_arguments
+
+def make_fetch(calls, cached=True):
+    async def fetch():
+        calls.append(1)
+        return cached
+    return fetch
+
+def test_next_page_arguments():
+    assert next_page_arguments({"query": "q", "offset": 2}, "offset") == {"query": "q", "offset": 3}
+    assert next_page_arguments({"query": "q"}, "page", {"page": 1}) == {"query": "q", "page": 2}
+
+def test_prefetched_page_counts_as_hit_when_requested():
+    async def main():
+        prefetcher = Prefetcher(budget=10)
+        calls = []
+        assert prefetcher.schedule("next", make_fetch(calls), lambda: 5)
+        # 同一页不重复预取
+        assert not prefetcher.schedule("next", make_fetch(calls), lambda: 5)
+        await asyncio.sleep(0.01)
+        assert calls == [1]
+        assert prefetcher.stats()["outstanding"] == 1
+
+        assert prefetcher.record_request("next")
+        assert not prefetcher.record_request("other")
+        stats = prefetcher.stats()
+        assert stats["hits"] == 1
+        assert stats["outstanding"] == 0
+        assert stats["hit_rate"] == 1.0
+        await prefetcher.close()
+
+    asyncio.run(main())
+
+def test_prefetch_requires_headroom_for_every_upstream_request():
+    async def main():
+        prefetcher = Prefetcher(budget=10, min_headroom=1, max_wait=0.05)
+        calls = []
+        # 需要3次上游请求，但只有2个可用许可
+        assert prefetcher.schedule("next", make_fetch(calls), lambda: 2, requests=3)
+        await asyncio.sleep(0.3)
+        assert calls == []
+        assert prefetcher.stats()["skipped"] == 1
+
+        assert prefetcher.schedule("next", make_fetch(calls), lambda: 3, requests=3)
+        await asyncio.sleep(0.01)
+        assert calls == [1]
+        await prefetcher.close()
+
+    asyncio.run(main())
+
+def test_out_of_range_page_is_not_prefetched():
+    async def main():
+        prefetcher = Prefetcher(budget=10)
+        assert not prefetcher.schedule("next", make_fetch([]), lambda: 5, requests=0)
+        assert prefetcher.stats()["scheduled"] == 0
+
+    asyncio.run(main())
+
+def test_budget_limits_prefetches_per_minute():
+    async def main():
+        prefetcher = Prefetcher(budget=2)
+        calls = []
+        results = [prefetcher.schedule(f"page-{i}", make_fetch(calls), lambda: 5) for i in range(3)]
+        assert results == [True, True, False]
+        assert prefetcher.stats()["skipped"] == 1
+        await prefetcher.close()
+
+    asyncio.run(main())
+
+def test_request_while_waiting_for_headroom_cancels_prefetch():
+    async def main():
+        prefetcher = Prefetcher(budget=10, max_wait=5)
+        calls = []
+        prefetcher.schedule("next", make_fetch(calls), lambda: 0)
+        await asyncio.sleep(0.01)
+        # 调用方自己请求这一页，预取不再发出
+        assert not prefetcher.record_request("next")
+        await asyncio.sleep(0.01)
+        assert calls == []
+        assert prefetcher.stats()["skipped"] == 1
+        await prefetcher.close()
+
+    asyncio.run(main())
+
+def test_unused_prefetches_expire_on_timer_and_trigger_backoff():
+    async def main():
+        prefetcher = Prefetcher(budget=10, unused_after=0.05, backoff_after=2, backoff=60)
+        calls = []
+        prefetcher.schedule("a", make_fetch(calls), lambda: 5)
+        prefetcher.schedule("b", make_fetch(calls), lambda: 5)
+        await asyncio.sleep(0.01)
+        assert not prefetcher.paused
+
+        # 没有新请求时也按时判定浪费
+        await asyncio.sleep(0.1)
+        assert prefetcher.wasted == 2
+        assert prefetcher.paused
+        assert not prefetcher.schedule("c", make_fetch(calls), lambda: 5)
+        await prefetcher.close()
+
+    asyncio.run(main())
+
+def test_uncached_prefetch_result_is_not_tracked():
+    async def main():
+        prefetcher = Prefetcher(budget=10, unused_after=0.01, backoff_after=1)
+        prefetcher.schedule("next", make_fetch([], cached=False), lambda: 5)
+        await asyncio.sleep(0.05)
+        # 未写入缓存（如部分结果）的预取不计入浪费
+        assert prefetcher.stats()["outstanding"] == 0
+        assert prefetcher.wasted == 0
+        assert not prefetcher.paused
+        await prefetcher.close()
+
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""并发请求合并测试：共享结果、异常传递和等待者取消"""
+
+import asyncio
+
+import pytest
+
+from search.singleflight import SingleFlight
+
+def test_concurrent_calls_share_one_upstream_call():
+    async def main():
+        flight = SingleFlight()
+        started = 0
+        release = asyncio.Event()
+
+        async def fetch():
+            nonlocal started
+            started += 1
+            await release.wait()
+            return "result"
+
+        tasks = [asyncio.ensure_future(flight.do("key", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        assert await asyncio.gather(*tasks) == ["result"] * 3
+        assert started == 1
+        assert flight.stats() == {"calls": 3, "coalesced": 2, "in_flight": 0}
+
+    asyncio.run(main())
+
+def test_different_keys_are_not_coalesced():
+    async def main():
+        flight = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0)
+            return value
+
+        results = await asyncio.gather(flight.do("a", lambda: fetch(1)), flight.do("b", lambda: fetch(2)))
+        assert results == [1, 2]
+        assert flight.stats()["coalesced"] == 0
+
+    asyncio.run(main())
+
+def test_exception_is_raised_to_every_waiter():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("upstream failed")
+
+        results = await asyncio.gather(
+            flight.do("key", fail), flight.do("key", fail), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+        # 失败的调用不会留下记录，下一次调用重新请求
+        assert await flight.do("key", lambda: asyncio.sleep(0, "retry")) == "retry"
+
+    asyncio.run(main())
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "result"
+
+        first = asyncio.ensure_future(flight.do("key", fetch))
+        second = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release.set()
+        assert await second == "result"
+
+    asyncio.run(main())
+
+def test_shared_call_is_cancelled_when_all_waiters_leave():
+    async def main():
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def fetch():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiter = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+"""增量式SSE解码器测试：跨块的事件和换行、多行data、base64和UTF-8截断"""
+
+import base64
+
+from search.proxy.metaso.sse import SSEDecoder
+
+def decode_chunks(chunks, **kwargs):
+    decoder = SSEDecoder()
+    events = []
+    for chunk in chunks:
+        events.extend(decoder.feed(chunk, **kwargs))
+    return events + decoder.flush()
+
+def test_events_split_across_chunks():
+    stream = 'data: {"a": 1}\n\ndata: {"b": 2}\n\n'
+    for size in (1, 3, 7, len(stream)):
+        chunks = [stream[i:i + size] for i in range(0, len(stream), size)]
+        assert decode_chunks(chunks) == ['{"a": 1}', '{"b": 2}']
+
+def test_crlf_split_between_chunks():
+    assert decode_chunks(["data: a\r", "\n\r", "\ndata: b\r\n\r\n"]) == ["a", "b"]
+    assert decode_chunks(["data: a\r\rdata: b\r\r"]) == ["a", "b"]
+
+def test_multiline_data_comments_and_other_fields():
+    stream = ": keep-alive\nevent: message\nid: 1\ndata: first\ndata:second\n\n"
+    assert decode_chunks([stream]) == ["first\nsecond"]
+
+def test_flush_emits_event_without_trailing_blank_line():
+    assert decode_chunks(["data: last"]) == ["last"]
+    assert decode_chunks([""]) == []
+
+def test_utf8_character_split_across_byte_chunks():
+    data = "data: 西湖十景\n\n".encode("utf-8")
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    assert decode_chunks(chunks) == ["西湖十景"]
+
+def test_base64_encoded_chunks():
+    data = "data: 断桥残雪\n\n".encode("utf-8")
+    chunks = [base64.b64encode(data[:8]).decode(), base64.b64encode(data[8:]).decode()]
+    assert decode_chunks(chunks, base64_encoded=True) == ["断桥残雪"]